@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark line and scatter chart rendering on large synthetic datasets.
+
+Times ChartRenderer.render_png for a line and a scatter chart at several
+row counts. With downsampling, and density images for scatters above
+CHART_DENSITY_THRESHOLD rows, render time should stay roughly flat as rows
+grow. Only the linear reduction or binning pass gets slower.
+
+Usage:
+    python benchmarks/bench_downsampling.py [max_rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.chart_generator import ChartRenderer, apply_dark_theme
+from src.downsampling import lttb, reduce_scatter
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """A noisy random walk with rare spikes, plus a clustered scatter with outliers."""
+    rng = np.random.default_rng(1)
+    walk = np.cumsum(rng.normal(size=rows))
+    spikes = rng.random(rows) < 1e-5
+    walk[spikes] += 200
+    x = rng.normal(size=rows)
+    x[rng.random(rows) < 1e-4] *= 20
+    return pd.DataFrame({
+        "t": np.arange(rows),
+        "value": walk,
+        "x": x,
+        "y": x * 0.5 + rng.normal(size=rows),
+    })
+
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    apply_dark_theme()
+
+    sizes = [rows for rows in (10_000, 100_000, 1_000_000) if rows < max_rows] + [max_rows]
+    for rows in sizes:
+        df = make_frame(rows)
+        renderer = ChartRenderer(df)
+        timings = {}
+        for chart_type, x, y in (("line", "t", "value"), ("scatter", "x", "y")):
+            start = time.perf_counter()
+            renderer.render_png({"type": chart_type, "x": x, "y": y, "title": chart_type})
+            timings[chart_type] = time.perf_counter() - start
+
+        # How much of the signal survives: the spike maximum and the x range
+        kept = lttb(df["t"].to_numpy(float), df["value"].to_numpy(), 1000)
+        sample = reduce_scatter(df[["x", "y"]], "x", "y", 5000)
+        print(
+            f"rows={rows:>9,} line={timings['line']:.3f}s scatter={timings['scatter']:.3f}s "
+            f"line max kept={df['value'].iloc[kept].max() / df['value'].max():.0%} "
+            f"scatter x range kept={np.ptp(sample['x']) / np.ptp(df['x']):.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Measure load-time dtype optimization on a synthetic movies-like CSV.
+
+Loads the file with and without optimize_dtypes() and reports load time,
+deep memory usage, and the time of the bar chart's groupby-mean on the
+genre column.
+
+Usage:
+    python benchmarks/bench_dtypes.py [rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.dataset_handler import load_dataset
+from src.dtype_optimizer import memory_bytes
+
+GROUPBY_REPEATS = 5
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "genre": rng.choice(["Drama", "Comedy", "Action", "Horror", "Sci-Fi", "Documentary"], rows),
+        "language": rng.choice(["en", "fr", "es", "ja", "ko", "de", "it"], rows),
+        "year": rng.integers(1950, 2025, rows),
+        "vote_count": rng.integers(0, 30000, rows),
+        "vote_average": rng.normal(6.5, 1.2, rows).round(3),
+        "release_date": pd.Series(pd.Timestamp("1950-01-01") + pd.to_timedelta(rng.integers(0, 27000, rows), unit="D")).dt.strftime("%Y-%m-%d"),
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "movies.csv")
+        df.to_csv(path, index=False)
+        print(f"rows={rows} file={os.path.getsize(path) / 1024 / 1024:.1f}MB")
+
+        for label, optimize in (("plain", False), ("optimized", True)):
+            loaded, load_seconds = timed(lambda: load_dataset(path, optimize=optimize))
+            _, groupby_seconds = timed(lambda: [
+                loaded.groupby("genre", observed=True)["vote_average"].mean()
+                for _ in range(GROUPBY_REPEATS)
+            ])
+            print(
+                f"{label:<10} load={load_seconds:.2f}s memory={memory_bytes(loaded) / 1024 / 1024:.1f}MB "
+                f"groupby={groupby_seconds / GROUPBY_REPEATS * 1000:.1f}ms"
+            )
+            if optimize:
+                for col, change in loaded.attrs["memory_report"]["columns"].items():
+                    print(f"  {col}: {change['from']} -> {change['to']}")
+
+
+if __name__ == "__main__":
+    main()
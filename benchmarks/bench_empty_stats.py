@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DatasetAnalyzer.get_empty_data_stats on wide datasets.
+
+Compares the vectorized implementation against the previous per-column loop
+as the column count grows.
+
+Usage:
+    python benchmarks/bench_empty_stats.py [rows]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.dataset_analyzer import DatasetAnalyzer
+
+
+def per_column_empty_stats(df: pd.DataFrame) -> dict:
+    """The original column-by-column implementation, kept for comparison."""
+    row_count = len(df)
+    empty_stats = {}
+    for col in df.columns:
+        null_count = df[col].isnull().sum()
+        empty_count = 0
+        if df[col].dtype == "object" or pd.api.types.is_string_dtype(df[col]):
+            empty_count = (df[col] == "").sum()
+        total_empty = null_count + empty_count
+        empty_stats[col] = {
+            "null_count": int(null_count),
+            "empty_string_count": int(empty_count),
+            "total_empty": int(total_empty),
+            "percentage": round(total_empty / row_count * 100, 2) if row_count > 0 else 0,
+        }
+    return empty_stats
+
+
+def make_frame(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    """Build a frame with alternating numeric and string columns containing gaps."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        if i % 2 == 0:
+            values = rng.normal(size=rows)
+            values[rng.random(rows) < 0.1] = np.nan
+        else:
+            values = rng.choice(np.array(["a", "b", "", None], dtype=object), size=rows)
+        data[f"col_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def best_of(func, repeats: int = 3) -> float:
+    """Return the fastest wall-clock time of several runs."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+
+    print(f"rows={rows:,}")
+    print(f"{'columns':>8} {'loop (s)':>10} {'vectorized (s)':>15} {'speedup':>8}")
+    for columns in (10, 100, 500, 1000, 2000):
+        df = make_frame(rows, columns)
+        analyzer = DatasetAnalyzer(df)
+        assert analyzer.get_empty_data_stats() == per_column_empty_stats(df)
+
+        loop_time = best_of(lambda: per_column_empty_stats(df))
+        vectorized_time = best_of(analyzer.get_empty_data_stats)
+        print(
+            f"{columns:>8} {loop_time:>10.4f} {vectorized_time:>15.4f} "
+            f"{loop_time / vectorized_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
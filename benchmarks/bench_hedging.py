@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Offline tail-latency benchmark for hedged LLM requests.
+
+The primary FakeBackend is usually fast but occasionally stalls, like a
+provider with a heavy latency tail. The secondary is slower but steady.
+Compares sending every request to the primary alone with HedgedClient.
+
+Usage:
+    python benchmarks/bench_hedging.py [requests]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.llm_backend import FakeBackend, RateLimiter
+from src.llm_router import HedgedClient
+
+PRIMARY_LATENCY = 0.05
+PRIMARY_STALL = 1.0
+STALL_RATE = 0.05
+SECONDARY_LATENCY = 0.1
+
+
+class TailBackend(FakeBackend):
+    """FakeBackend whose requests sometimes stall."""
+
+    provider = "fake-tail"
+
+    def _complete(self, messages: list, temperature: float, max_tokens: int) -> str:
+        self._admit()
+        stalled = random.random() < STALL_RATE
+        time.sleep(PRIMARY_STALL if stalled else PRIMARY_LATENCY)
+        return " ".join(self._response_words(messages))
+
+
+class SteadyBackend(FakeBackend):
+    """FakeBackend with its own latency histogram."""
+
+    provider = "fake-steady"
+
+
+def unlimited() -> RateLimiter:
+    return RateLimiter(rpm=10 ** 9, tpm=10 ** 12, max_concurrency=16)
+
+
+def run(label: str, client, requests: int):
+    """Send requests one after another and print latency percentiles."""
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        client.chat(f"question {i}")
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+    print(f"{label:<8} p50={pct(50):.3f}s p95={pct(95):.3f}s p99={pct(99):.3f}s max={latencies[-1]:.3f}s")
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    random.seed(0)
+
+    primary = TailBackend(rate_limiter=unlimited())
+    secondary = SteadyBackend(latency=SECONDARY_LATENCY, rate_limiter=unlimited())
+
+    print(f"requests={requests} primary stalls {STALL_RATE:.0%} of requests for {PRIMARY_STALL:g}s")
+    run("primary", primary, requests)
+
+    hedged = HedgedClient(primary, secondary, percentile=90, min_samples=20)
+    run("hedged", hedged, requests)
+    print(f"hedge delay={hedged.hedge_delay():.3f}s stats={hedged.stats}")
+
+
+if __name__ == "__main__":
+    main()
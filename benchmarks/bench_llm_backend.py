@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for the shared LLM backend.
+
+Runs concurrent callers against FakeBackend, which simulates provider
+latency and a provider-side requests-per-minute limit, and compares
+unscheduled callers (every request sent at once, retries on 429) with the
+shared token-bucket scheduler.
+
+Usage:
+    python benchmarks/bench_llm_backend.py [callers] [requests_per_caller]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import llm_backend
+from src.llm_backend import FakeBackend, RateLimiter
+
+# Simulated provider limit. A one-second window stands in for a minute so
+# the benchmark finishes in seconds.
+SERVER_LIMIT = 20
+WINDOW = 1.0
+LATENCY = 0.05
+
+
+def run(label: str, limiter: RateLimiter, callers: int, per_caller: int):
+    """Run concurrent callers against one backend and print the results."""
+    backend = FakeBackend(latency=LATENCY, server_rpm=SERVER_LIMIT, window=WINDOW,
+                          rate_limiter=limiter)
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def caller(index: int):
+        for i in range(per_caller):
+            start = time.perf_counter()
+            try:
+                backend.chat(f"caller {index} question {i}")
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except RuntimeError as e:
+                with lock:
+                    failures.append(e)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    print(
+        f"{label:<12} ok={len(latencies):>4} failed={len(failures):>3} "
+        f"429s={backend.rejected:>4} throughput={len(latencies) / elapsed:6.1f}/s "
+        f"p50={statistics.median(latencies) if latencies else 0:.3f}s p95={p95:.3f}s"
+    )
+
+
+def main():
+    callers = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_caller = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    # Short backoff so the unscheduled run retries at a realistic pace
+    llm_backend.LLM_BACKOFF_BASE_SECONDS = 0.05
+    llm_backend.LLM_BACKOFF_MAX_SECONDS = 1.0
+
+    print(
+        f"callers={callers} requests each={per_caller} "
+        f"provider limit={SERVER_LIMIT} per {WINDOW:g}s"
+    )
+    unlimited = RateLimiter(rpm=10 ** 9, tpm=10 ** 12, max_concurrency=callers)
+    run("unscheduled", unlimited, callers, per_caller)
+
+    # Leave a little headroom below the provider's limit, and start with an
+    # empty bucket so the first window does not see a full burst on top of
+    # the steady rate
+    scheduled = RateLimiter(rpm=SERVER_LIMIT * 0.95, tpm=10 ** 12, max_concurrency=8,
+                            period=WINDOW)
+    scheduled.requests.level = 1
+    run("scheduled", scheduled, callers, per_caller)
+
+
+if __name__ == "__main__":
+    main()
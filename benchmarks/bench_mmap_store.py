@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Compare per-worker memory of private and memory-mapped dataset storage.
+
+Writes a synthetic dataset to a DatasetCache in 'memory' and 'mmap'
+storage modes, then starts several worker processes that open it from the
+cache at the same time and read every column, as gunicorn workers serving
+the same session would. Each worker reports its open time and its
+proportional set size (PSS), which splits shared pages between the
+processes mapping them. Linux only, since it reads /proc.
+
+Usage:
+    python benchmarks/bench_mmap_store.py [rows] [workers]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.dataset_cache import DatasetCache
+
+KEY = "bench"
+
+
+def pss_mb() -> float:
+    """Proportional set size of this process in MB."""
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def worker(cache_dir: str, mode: str, ready, results):
+    baseline = pss_mb()
+    start = time.perf_counter()
+    df, _ = DatasetCache(cache_dir, storage_mode=mode).get(KEY)
+    # Read every value so all pages are resident
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values.cat.codes.sum()
+        elif pd.api.types.is_numeric_dtype(values):
+            values.sum()
+        else:
+            values.str.len().sum()
+    elapsed = time.perf_counter() - start
+    # Measure while every worker still holds the dataset
+    ready.wait()
+    results.put((elapsed, pss_mb() - baseline))
+    ready.wait()
+
+
+def run(cache_dir: str, mode: str, workers: int):
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(cache_dir, mode, ready, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    open_seconds = max(elapsed for elapsed, _ in measured)
+    total = sum(pss for _, pss in measured)
+    print(f"{mode:<7} open+read={open_seconds:.2f}s  dataset PSS per worker={total / workers:.1f}MB  total={total:.1f}MB")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "title": pd.Series(rng.integers(0, rows, rows)).map("movie {}".format),
+        "genre": pd.Series(rng.choice(["Drama", "Comedy", "Action", "Horror"], rows)).astype("category"),
+        "year": rng.integers(1950, 2025, rows).astype(np.int16),
+        "vote_count": rng.integers(0, 30000, rows),
+        "vote_average": rng.normal(6.5, 1.2, rows),
+        "popularity": rng.exponential(20, rows),
+    })
+    print(f"rows={rows} workers={workers} frame={df.memory_usage(deep=True).sum() / 1024 / 1024:.1f}MB")
+
+    for mode in ("memory", "mmap"):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            DatasetCache(cache_dir, storage_mode=mode).put(KEY, df, {})
+            run(cache_dir, mode, workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Compare peak memory of in-memory and out-of-core analysis of a large CSV.
+
+Writes a synthetic movies-like CSV, then analyzes it in a fresh process
+per configuration: loaded with load_dataset() and DatasetAnalyzer, and
+streamed with ChunkedAnalyzer at several chunk sizes. Each run builds the
+summary and renders a bar chart and a histogram, and reports its time and
+the process's peak resident set size, next to the peak after imports.
+Peak memory out of core follows the chunk size, not the file size. Linux
+only, since it reads /proc.
+
+Usage:
+    python benchmarks/bench_out_of_core.py [rows]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.chart_generator import ChartRenderer
+from src.dataset_analyzer import DatasetAnalyzer
+from src.dataset_handler import load_dataset
+from src.out_of_core import ChunkedAnalyzer, ChunkedChartRenderer, ChunkedDataset
+
+CHARTS = [
+    {"type": "bar", "x": "genre", "y": "vote_average"},
+    {"type": "histogram", "column": "popularity"},
+]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MB.
+
+    Read from /proc because getrusage() carries the peak of the forked
+    parent across exec.
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def analyze(path: str, chunksize, results):
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if chunksize is None:
+        analyzer = DatasetAnalyzer(load_dataset(path), stats_mode="approximate")
+        renderer = ChartRenderer(analyzer.df)
+    else:
+        analyzer = ChunkedAnalyzer(ChunkedDataset(path, chunksize=chunksize))
+        renderer = ChunkedChartRenderer(analyzer.dataset, analyzer.get_summary())
+    analyzer.get_summary()
+    summary_seconds = time.perf_counter() - start
+    for config in CHARTS:
+        renderer.render_png(config)
+    results.put((summary_seconds, time.perf_counter() - start - summary_seconds, baseline, peak_rss_mb()))
+
+
+def run(path: str, chunksize):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=analyze, args=(path, chunksize, results))
+    process.start()
+    summary_seconds, chart_seconds, baseline, peak = results.get()
+    process.join()
+    label = "in-memory" if chunksize is None else f"chunks of {chunksize}"
+    print(
+        f"{label:<18} summary={summary_seconds:.2f}s charts={chart_seconds:.2f}s "
+        f"peak RSS={peak:.1f}MB (after imports {baseline:.1f}MB)"
+    )
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "title": pd.Series(rng.integers(0, rows, rows)).map("movie {}".format),
+        "genre": rng.choice(["Drama", "Comedy", "Action", "Horror", "Sci-Fi", "Documentary"], rows),
+        "year": rng.integers(1950, 2025, rows),
+        "vote_count": rng.integers(0, 30000, rows),
+        "vote_average": rng.normal(6.5, 1.2, rows).round(3),
+        "popularity": rng.exponential(20, rows).round(3),
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "movies.csv")
+        df.to_csv(path, index=False)
+        del df
+        print(f"rows={rows} file={os.path.getsize(path) / 1024 / 1024:.1f}MB")
+
+        for chunksize in (None, 200_000, 50_000, 10_000):
+            run(path, chunksize)
+
+
+if __name__ == "__main__":
+    main()
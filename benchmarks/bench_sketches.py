@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Compare exact statistics with streaming sketches on a synthetic CSV.
+
+The exact path loads the whole file and runs describe() and nunique().
+The sketch path streams the file in chunks through sketch_csv(). Both
+report time, peak traced memory, and the sketch's quartile rank error
+and distinct-count error.
+
+Usage:
+    python benchmarks/bench_sketches.py [rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.dataset_handler import read_csv_chunked, sketch_csv
+
+
+def measure(func):
+    """
+    Run func twice: once timed, once under tracemalloc, whose overhead
+    would distort the timing.
+
+    Returns:
+        The result, elapsed seconds and peak traced MB.
+    """
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "price": rng.lognormal(3, 1, rows).round(2),
+        "user_id": rng.integers(0, rows // 4, rows),
+        "city": rng.choice([f"city_{i}" for i in range(500)], rows),
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.csv")
+        df.to_csv(path, index=False)
+
+        def exact():
+            data, _ = read_csv_chunked(path)
+            return data.describe(), data.nunique()
+
+        (described, distinct), exact_time, exact_peak = measure(exact)
+        sketch, sketch_time, sketch_peak = measure(lambda: sketch_csv(path))
+
+    print(f"rows={rows:,}")
+    print(f"exact   time={exact_time:.2f}s peak={exact_peak:.0f}MB")
+    print(f"sketch  time={sketch_time:.2f}s peak={sketch_peak:.0f}MB")
+
+    stats = sketch.basic_stats()
+    for col in ("price", "user_id"):
+        errors = [
+            abs((df[col] <= stats[col][key]).mean() - q)
+            for q, key in ((0.25, "25%"), (0.5, "50%"), (0.75, "75%"))
+        ]
+        print(f"{col:<8} max quartile rank error={max(errors):.4f}")
+    for col, estimate in sketch.distinct_counts().items():
+        print(f"{col:<8} distinct exact={distinct[col]:,} sketch={estimate:,} "
+              f"error={estimate / distinct[col] - 1:+.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,16 @@ Data Analytics Assistant - Main Entry Point
 A tool for analyzing datasets and asking questions about them using AI.
 """
 
+import os
 import sys
 import json
 
-from src.dataset_handler import load_dataset, DatasetError
+from src.dataset_handler import DatasetError
 from src.dataset_analyzer import DatasetAnalyzer
+from src.dataset_cache import DatasetCache, open_dataset
 from src.chat_service import ChatService
+from src.config import OUT_OF_CORE_MIN_BYTES
+from src.out_of_core import ChunkedAnalyzer, ChunkedDataset
 
 
 def print_summary(analyzer: DatasetAnalyzer):
@@ -83,14 +87,18 @@ def main():
     # Load the dataset
     print(f"\n📂 Loading dataset: {file_path}")
     try:
-        df = load_dataset(file_path)
+        if file_path.lower().endswith(".csv") and os.path.isfile(file_path) \
+                and os.path.getsize(file_path) >= OUT_OF_CORE_MIN_BYTES:
+            # Summarized in chunks straight from the file
+            analyzer = ChunkedAnalyzer(ChunkedDataset(file_path))
+            analyzer.get_summary()
+        else:
+            _, analyzer = open_dataset(file_path, DatasetCache())
         print(f"✓ Dataset loaded successfully!")
     except DatasetError as e:
         print(f"❌ Error: {str(e)}")
         sys.exit(1)
     
-    # Analyze the dataset
-    analyzer = DatasetAnalyzer(df)
     print_summary(analyzer)
     
     # Check if Groq API is configured
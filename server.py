@@ -3,27 +3,54 @@ Flask server for Data Analytics Assistant.
 A modern API backend for the data analytics web application.
 """
 
+import json
 import os
 import tempfile
-from flask import Flask, request, jsonify, send_from_directory
+from contextlib import nullcontext
+from flask import (
+    Flask, Response, request, jsonify, send_from_directory, send_file,
+    stream_with_context
+)
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
-from src.dataset_handler import load_dataset, DatasetError
+from src.dataset_handler import DatasetError, load_dataset
 from src.dataset_analyzer import DatasetAnalyzer
+from src.dataset_cache import DatasetCache, hash_file, append_key
+from src.session_store import SessionStore
+from src.job_manager import JobManager
+from src.chart_cache import ChartCache
+from src.llm_backend import RateLimitError
 from src.chat_service import ChatService
-from src.chart_generator import ChartGenerator
-from src.config import validate_config, SUPPORTED_EXTENSIONS
+from src.intent_router import router_stats
+from src.chart_generator import ChartGenerator, KNOWN_CHART_TYPES, chart_columns
+from src.out_of_core import ChunkedAnalyzer, ChunkedChartGenerator, ChunkedStore
+from src.upload_stream import UploadStream, open_upload
+from src.preview import parse_filters, preview_page
+from src.query_engine import QueryPlanError
+from src.config import (
+    validate_config, SUPPORTED_EXTENSIONS, MAX_UPLOAD_BYTES, PREVIEW_MAX_ROWS, PROFILE_PREFETCH_ENABLED
+)
 
 app = Flask(__name__, static_folder='static')
-app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 
-# Session storage (in-memory for simplicity)
-session_data = {
-    'analyzer': None,
-    'chat_service': None,
-    'filename': None,
-    'df': None
-}
+# Parsed datasets and summaries, keyed by upload content hash
+dataset_cache = DatasetCache()
+
+# CSV files too large to load, analyzed chunk by chunk from disk
+out_of_core_store = ChunkedStore()
+
+# Rendered chart images, served by URL so browsers can cache them
+chart_cache = ChartCache()
+CHART_MAX_AGE = 365 * 24 * 60 * 60
+
+# Per-user dataset sessions, keyed by the token in the session cookie
+sessions = SessionStore()
+SESSION_COOKIE = 'session_id'
+
+# Slow upload stages run here so the summary can be returned immediately
+jobs = JobManager()
 
 
 def is_api_configured():
@@ -35,6 +62,182 @@ def is_api_configured():
         return False
 
 
+def get_session_token():
+    """Get the session token from the request cookie, if it is valid."""
+    token = request.cookies.get(SESSION_COOKIE)
+    return token if SessionStore.is_valid_token(token) else None
+
+
+def create_session(analyzer, filename, dataset_key=None):
+    """Build a session dictionary for an analyzed dataset."""
+    return {
+        'analyzer': analyzer,
+        'chat_service': ChatService(analyzer) if is_api_configured() else None,
+        'filename': filename,
+        'df': analyzer.df,
+        'dataset_key': dataset_key
+    }
+
+
+def get_session():
+    """
+    Get the current user's session.
+
+    Sessions evicted from memory, or created by another worker process, are
+    restored from the dataset cache using the persisted session index.
+    """
+    token = get_session_token()
+    if token is None:
+        return None
+
+    session = sessions.get(token)
+    if session is not None:
+        return session
+
+    index = sessions.get_index(token)
+    if index is None:
+        return None
+    cached = dataset_cache.get(index['dataset_key'])
+    if cached is not None:
+        df, summary = cached
+        analyzer = DatasetAnalyzer(df, summary=summary)
+    else:
+        analyzer = out_of_core_store.get(index['dataset_key'])
+        if analyzer is None:
+            return None
+
+    session = create_session(analyzer, index['filename'], index['dataset_key'])
+    sessions.put(token, session)
+    return session
+
+
+def get_uploaded_file():
+    """
+    Get the uploaded dataset file from the request.
+
+    Returns:
+        A tuple of (file, secure filename, lowercase extension).
+
+    Raises:
+        DatasetError: If no file was sent or its type is not supported.
+    """
+    if 'file' not in request.files:
+        raise DatasetError('No file provided')
+
+    file = request.files['file']
+    filename, ext = check_filename(file.filename)
+    return file, filename, ext
+
+
+def check_filename(filename):
+    """
+    Validate the name of an uploaded dataset file.
+
+    Returns:
+        A tuple of (secure filename, lowercase extension).
+
+    Raises:
+        DatasetError: If the name is empty or its type is not supported.
+    """
+    if not filename:
+        raise DatasetError('No file selected')
+
+    # Check file extension
+    filename = secure_filename(filename)
+    ext = os.path.splitext(filename)[1].lower()
+
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise DatasetError(f'Unsupported file type: {ext}. Supported: CSV, Excel, JSON')
+    return filename, ext
+
+
+def receive_upload(progress=None):
+    """
+    Start receiving the uploaded dataset file from the request body.
+
+    Unlike get_uploaded_file(), the body is not parsed and buffered first;
+    the returned stream yields the file's bytes as they arrive.
+
+    Args:
+        progress: Optional function called as progress(bytes_received, total_bytes).
+
+    Returns:
+        A tuple of (UploadStream at the start of the file, secure filename,
+        lowercase extension).
+
+    Raises:
+        DatasetError: If no file was sent or its type is not supported.
+    """
+    boundary = request.mimetype_params.get('boundary')
+    if request.mimetype != 'multipart/form-data' or not boundary:
+        raise DatasetError('No file provided')
+
+    upload = UploadStream(request.stream, boundary.encode(), request.content_length, progress)
+    filename, ext = check_filename(upload.open('file'))
+    return upload, filename, ext
+
+
+def track_upload():
+    """
+    Track the upload's progress as a job, under the ID the client sent in
+    the X-Upload-Id header so it can poll /api/jobs/<id> while uploading.
+    """
+    upload_id = request.headers.get('X-Upload-Id')
+    if JobManager.is_valid_id(upload_id) and jobs.get(upload_id) is None:
+        return jobs.track(upload_id, 'receiving')
+    return nullcontext()
+
+
+def summary_response(summary):
+    """Select the summary fields shown in the dataset panel."""
+    return {
+        'rows': summary['row_count'],
+        'columns': summary['column_count'],
+        'empty_values': sum(s['total_empty'] for s in summary['empty_data'].values()),
+        'column_types': summary['column_types'],
+        'empty_data': summary['empty_data'],
+        'basic_stats': summary['basic_stats'],
+        'memory': summary['memory'],
+        'out_of_core': 'out_of_core' in summary
+    }
+
+
+def preview_records(df, rows=10):
+    """Get the first rows as JSON-safe records, with dates as ISO strings and NaN as null."""
+    return json.loads(df.head(rows).to_json(orient='records', date_format='iso', date_unit='s'))
+
+
+def generate_charts_job(report, df, analyzer, dataset_key):
+    """Background job: ask the AI for chart suggestions and render them."""
+    if isinstance(analyzer, ChunkedAnalyzer):
+        chart_gen = ChunkedChartGenerator(analyzer)
+    else:
+        chart_gen = ChartGenerator(df, analyzer)
+    report('suggesting')
+    suggestions = chart_gen.get_ai_suggestions()
+    report('rendering')
+    charts = chart_gen.generate_charts(suggestions, dataset_key=dataset_key, cache=chart_cache,
+                                       source=dataset_cache.mapped_path(dataset_key))
+    for chart in charts:
+        chart['url'] = f"/api/charts/{chart.pop('key')}.png"
+    report('rendering', charts=charts)
+
+    # Users tend to look into the charted columns next
+    if PROFILE_PREFETCH_ENABLED and df is not None:
+        columns = []
+        for config in suggestions:
+            # Unknown chart types would name every column
+            if isinstance(config, dict) and config.get('type', 'histogram') in KNOWN_CHART_TYPES:
+                columns.extend(col for col in chart_columns(df, config) if col not in columns)
+        jobs.submit(prefetch_profiles_job, analyzer, columns)
+
+
+def prefetch_profiles_job(report, analyzer, columns):
+    """Background job: build column profiles before they are requested."""
+    report('profiling', columns=columns)
+    analyzer.prefetch_profiles(columns)
+
+
 @app.route('/')
 def index():
     """Serve the main application page."""
@@ -44,94 +247,253 @@ def index():
 @app.route('/api/status')
 def status():
     """Get current application status."""
+    session = get_session()
     return jsonify({
         'api_configured': is_api_configured(),
-        'dataset_loaded': session_data['analyzer'] is not None,
-        'filename': session_data['filename']
+        'dataset_loaded': session is not None,
+        'filename': session['filename'] if session else None,
+        'chat_routing': router_stats.to_dict()
     })
 
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
-    """Upload and analyze a dataset."""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
-    
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    
-    # Check file extension
-    filename = secure_filename(file.filename)
-    ext = os.path.splitext(filename)[1].lower()
-    
-    if ext not in SUPPORTED_EXTENSIONS:
-        return jsonify({
-            'error': f'Unsupported file type: {ext}. Supported: CSV, Excel, JSON'
-        }), 400
-    
+    """
+    Upload and analyze a dataset.
+
+    The file is received and hashed from the request body as it arrives;
+    see open_upload() for when it is parsed.
+    """
     try:
-        # Save to temp file and load
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-            file.save(tmp.name)
-            df = load_dataset(tmp.name)
-            os.unlink(tmp.name)  # Clean up temp file
-        
-        # Create analyzer and chat service
-        session_data['analyzer'] = DatasetAnalyzer(df)
-        session_data['filename'] = filename
-        session_data['df'] = df
+        with track_upload() as report:
+            progress = None
+            if report is not None:
+                def progress(received, total):
+                    report('receiving', bytes_received=received, total_bytes=total)
+
+            upload, filename, _ = receive_upload(progress)
+            dataset_key, analyzer = open_upload(upload, dataset_cache, out_of_core_store, report)
+        df = analyzer.df
         
-        if is_api_configured():
-            session_data['chat_service'] = ChatService(session_data['analyzer'])
+        # Create analyzer and chat service for this user's session
+        token = get_session_token() or SessionStore.new_token()
+        sessions.put(token, create_session(analyzer, filename, dataset_key))
         
         # Get summary
-        summary = session_data['analyzer'].get_summary()
-        
-        # Calculate total empty values
-        total_empty = sum(s['total_empty'] for s in summary['empty_data'].values())
+        summary = analyzer.get_summary()
         
         # Get preview data (first 10 rows)
-        preview = df.head(10).to_dict('records')
-        columns = list(df.columns)
+        if df is not None:
+            preview = preview_records(df)
+        else:
+            preview = preview_records(analyzer.dataset.head(10))
+        columns = analyzer.columns
         
-        # Generate AI-suggested charts
-        charts = []
+        # AI-suggested charts are generated in the background; the client
+        # polls /api/jobs/<job_id> for them
+        job_id = None
         if is_api_configured():
-            try:
-                chart_gen = ChartGenerator(df, session_data['analyzer'])
-                charts = chart_gen.generate_charts()
-            except Exception as e:
-                print(f"Chart generation error: {e}")
+            job_id = jobs.submit(generate_charts_job, df, analyzer, dataset_key)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'filename': filename,
-            'summary': {
-                'rows': summary['row_count'],
-                'columns': summary['column_count'],
-                'empty_values': total_empty,
-                'column_types': summary['column_types'],
-                'empty_data': summary['empty_data'],
-                'basic_stats': summary['basic_stats']
-            },
+            'summary': summary_response(summary),
             'preview': {
                 'columns': columns,
                 'data': preview
             },
-            'charts': charts
+            'charts': [],
+            'job_id': job_id
         })
+        response.set_cookie(SESSION_COOKIE, token, httponly=True, samesite='Lax')
+        return response
         
     except DatasetError as e:
         return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge:
+        limit = MAX_UPLOAD_BYTES // (1024 * 1024)
+        return jsonify({'error': f'File too large. Maximum size: {limit}MB'}), 413
     except Exception as e:
         return jsonify({'error': f'Failed to process file: {str(e)}'}), 500
 
 
+@app.route('/api/append', methods=['POST'])
+def append_rows():
+    """
+    Append the rows of an uploaded file to the current dataset.
+
+    The summary is updated from the new rows rather than recomputed, and the
+    chat keeps its history. The combined dataset is stored under a new key,
+    so charts are regenerated and a restored session sees the appended rows.
+    """
+    session = get_session()
+    if session is None:
+        return jsonify({'error': 'Please upload a dataset first'}), 400
+
+    try:
+        file, _, ext = get_uploaded_file()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+            file.save(tmp.name)
+        try:
+            chunk_key = hash_file(tmp.name)
+            chunk = load_dataset(tmp.name)
+        finally:
+            os.unlink(tmp.name)
+
+        analyzer = session['analyzer']
+        summary = analyzer.append(chunk)
+        df = analyzer.df
+
+        dataset_key = append_key(session['dataset_key'], chunk_key)
+        dataset_cache.put(dataset_key, df, summary)
+        if dataset_cache.mapped:
+            # Share the combined rows with other workers instead of keeping
+            # this worker's private copy
+            cached = dataset_cache.get(dataset_key)
+            if cached is not None:
+                df = analyzer.df = cached[0]
+        session['df'] = df
+        session['dataset_key'] = dataset_key
+        # Re-measures the session's memory and updates the session index
+        sessions.put(get_session_token(), session)
+
+        job_id = None
+        if is_api_configured():
+            job_id = jobs.submit(generate_charts_job, df, analyzer, dataset_key)
+
+        return jsonify({
+            'success': True,
+            'filename': session['filename'],
+            'appended_rows': len(chunk),
+            'summary': summary_response(summary),
+            'charts': [],
+            'job_id': job_id
+        })
+
+    except DatasetError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Failed to append rows: {str(e)}'}), 500
+
+
+@app.route('/api/preview')
+def preview():
+    """
+    Get one page of the dataset, optionally sorted and filtered.
+
+    Query parameters: offset (default 0), limit (default 50, at most
+    PREVIEW_MAX_ROWS), sort (a column), order ('asc' or 'desc') and
+    filters (a JSON list of query plan filters). Sorting and filtering run
+    on the server; their row positions are cached, so later pages of the
+    same view are as fast as the first rows of the dataset.
+    """
+    session = get_session()
+    if session is None:
+        return jsonify({'error': 'Please upload a dataset first'}), 400
+
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = min(int(request.args.get('limit', 50)), PREVIEW_MAX_ROWS)
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    if offset < 0 or limit < 1:
+        return jsonify({'error': 'offset must be at least 0 and limit at least 1'}), 400
+
+    sort = request.args.get('sort') or None
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': "order must be 'asc' or 'desc'"}), 400
+
+    analyzer = session['analyzer']
+    df = analyzer.df
+    try:
+        if df is None:
+            # Out-of-core datasets stay on disk and can only be paged in order
+            if sort is not None or request.args.get('filters'):
+                return jsonify({'error': 'Sorting and filtering are not available for datasets analyzed out of core'}), 400
+            page = analyzer.dataset.page(offset, limit)
+            total = matched = analyzer.row_count
+        else:
+            if sort is not None and sort not in df.columns:
+                return jsonify({'error': f'Unknown column: {sort}'}), 400
+            filters = parse_filters(request.args.get('filters'), df)
+            page, matched = preview_page(df, analyzer.view_cache, offset, limit,
+                                         sort=sort, descending=order == 'desc', filters=filters)
+            total = len(df)
+            # New views count against the session memory budget
+            sessions.update_views(get_session_token())
+
+        return jsonify({
+            'columns': analyzer.columns,
+            'data': preview_records(page, rows=len(page)),
+            'offset': offset,
+            'limit': limit,
+            'total_rows': total,
+            'matched_rows': matched
+        })
+
+    except QueryPlanError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Failed to load preview: {str(e)}'}), 500
+
+
+@app.route('/api/columns/<path:name>/profile')
+def column_profile(name):
+    """
+    Get a detailed profile of one column: distinct values, the most frequent
+    ones, and a histogram of its values, datetimes or string lengths.
+
+    Profiles are computed on first request and cached with the dataset.
+    """
+    session = get_session()
+    if session is None:
+        return jsonify({'error': 'Please upload a dataset first'}), 400
+
+    analyzer = session['analyzer']
+    if name not in analyzer.columns:
+        return jsonify({'error': f'Unknown column: {name}'}), 404
+
+    try:
+        return jsonify(analyzer.get_column_profile(name))
+    except DatasetError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Failed to profile column: {str(e)}'}), 500
+
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Get the status and results of a background job."""
+    job = jobs.get(job_id) if JobManager.is_valid_id(job_id) else None
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/api/charts/<key>.png')
+def chart_image(key):
+    """Serve a rendered chart image from the chart cache."""
+    if not ChartCache.is_valid_key(key):
+        return jsonify({'error': 'Chart not found'}), 404
+    path = chart_cache.path(key)
+    if not path.exists():
+        return jsonify({'error': 'Chart not found'}), 404
+
+    # Keys are content hashes, so an image never changes under its URL
+    response = send_file(path, mimetype='image/png', etag=key,
+                         max_age=CHART_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Send a message to the AI."""
-    if session_data['chat_service'] is None:
+    session = get_session()
+    if session is None or session['chat_service'] is None:
         return jsonify({'error': 'Please upload a dataset first'}), 400
     
     data = request.get_json()
@@ -139,21 +501,65 @@ def chat():
         return jsonify({'error': 'No message provided'}), 400
     
     try:
-        response = session_data['chat_service'].ask(data['message'])
+        response = session['chat_service'].ask(data['message'])
         return jsonify({
             'success': True,
             'response': response
         })
+    except RateLimitError as e:
+        return jsonify({'error': f'AI is busy, please retry shortly: {str(e)}'}), 429
     except Exception as e:
         return jsonify({'error': f'AI error: {str(e)}'}), 500
 
 
+def sse_event(data: dict, event: str = None) -> str:
+    """Format a Server-Sent Events message."""
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Send a message to the AI and stream the answer as Server-Sent Events."""
+    session = get_session()
+    if session is None or session['chat_service'] is None:
+        return jsonify({'error': 'Please upload a dataset first'}), 400
+    
+    data = request.get_json()
+    if not data or 'message' not in data:
+        return jsonify({'error': 'No message provided'}), 400
+    
+    chat_service = session['chat_service']
+    message = data['message']
+
+    def generate():
+        try:
+            for piece in chat_service.ask_stream(message):
+                yield sse_event({'token': piece})
+            yield sse_event({}, event='done')
+        except RateLimitError as e:
+            yield sse_event({'error': f'AI is busy, please retry shortly: {str(e)}',
+                             'rate_limited': True}, event='error')
+        except Exception as e:
+            yield sse_event({'error': f'AI error: {str(e)}'}, event='error')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Stop proxies from buffering the stream
+        }
+    )
+
+
 @app.route('/api/clear', methods=['POST'])
 def clear():
     """Clear the current session."""
-    session_data['analyzer'] = None
-    session_data['chat_service'] = None
-    session_data['filename'] = None
+    token = get_session_token()
+    if token is not None:
+        sessions.pop(token)
     return jsonify({'success': True})
 
 
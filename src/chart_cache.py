@@ -0,0 +1,148 @@
+"""Disk cache for rendered chart images."""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from .config import CHART_CACHE_DIR, CHART_CACHE_MAX_BYTES
+
+# Configuration keys that change what a chart looks like. Descriptions are
+# shown next to the image, not drawn on it, so they are not part of the key.
+CHART_CONFIG_KEYS = ('type', 'title', 'x', 'y', 'column', 'values')
+
+# Bump when rendering changes so stale images are not served
+CHART_RENDER_VERSION = 3
+
+_CHART_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def normalize_chart_config(config: dict) -> dict:
+    """
+    Reduce a chart configuration to the keys that affect rendering.
+
+    Args:
+        config: A chart configuration, e.g. from the AI suggestions.
+
+    Returns:
+        A dictionary suitable for hashing.
+    """
+    normalized = {}
+    for key in CHART_CONFIG_KEYS:
+        value = config.get(key)
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        normalized[key] = value
+    normalized['type'] = str(normalized.get('type', 'histogram')).lower()
+    return normalized
+
+
+def chart_key(dataset_key: str, config: dict, theme: dict) -> str:
+    """
+    Compute the cache key for a chart.
+
+    Args:
+        dataset_key: Content hash of the dataset being plotted.
+        config: The chart configuration.
+        theme: The theme colors used for rendering.
+
+    Returns:
+        A hex digest identifying the rendered image.
+    """
+    payload = json.dumps(
+        {
+            'version': CHART_RENDER_VERSION,
+            'dataset': dataset_key,
+            'config': normalize_chart_config(config),
+            'theme': theme,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChartCache:
+    """Stores rendered PNG charts on disk, evicting least recently used ones."""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for cached images. Defaults to CHART_CACHE_DIR.
+            max_bytes: Disk budget in bytes. Defaults to CHART_CACHE_MAX_BYTES.
+        """
+        self.cache_dir = Path(cache_dir or CHART_CACHE_DIR)
+        self.max_bytes = CHART_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def is_valid_key(key: str) -> bool:
+        """Check that a client-supplied key has the expected shape."""
+        return bool(key) and bool(_CHART_KEY_PATTERN.match(key))
+
+    def path(self, key: str) -> Path:
+        """Get the file path of a cached chart."""
+        return self.cache_dir / f"{key}.png"
+
+    def get(self, key: str):
+        """
+        Look up a rendered chart.
+
+        Args:
+            key: The chart key from chart_key.
+
+        Returns:
+            The PNG bytes, or None on a miss.
+        """
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key: str, png: bytes):
+        """
+        Store a rendered chart, then evict to stay within budget.
+
+        Args:
+            key: The chart key from chart_key.
+            png: The PNG bytes.
+        """
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(png)
+            os.replace(tmp_path, self.path(key))
+        except OSError as e:
+            print(f"Chart cache write error: {e}")
+            return
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used images until the cache fits its budget."""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.png"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+            total += stat.st_size
+
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
@@ -2,15 +2,32 @@
 
 import base64
 import io
+import itertools
 import json
+import multiprocessing
+import os
 import re
+import threading
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
 import pandas as pd
 import numpy as np
 
-from .gemini_client import GeminiClient
+from .chart_cache import chart_key
+from .dataset_cache import read_mapped
+from .config import (
+    CHART_RENDER_MODE, CHART_RENDER_WORKERS, CHART_RENDER_TIMEOUT,
+    CHART_LINE_MAX_POINTS, CHART_SCATTER_MAX_POINTS, CHART_DENSITY_THRESHOLD,
+    CHART_DENSITY_BINS,
+)
+from .downsampling import reduce_line, reduce_scatter, density_grid
+from .llm_router import create_llm_client
 
 
 # Dark theme colors matching the UI
@@ -26,7 +43,7 @@ DARK_THEME = {
 
 def apply_dark_theme():
     """Apply dark theme to matplotlib."""
-    plt.rcParams.update({
+    matplotlib.rcParams.update({
         'figure.facecolor': DARK_THEME['background'],
         'axes.facecolor': DARK_THEME['card_bg'],
         'axes.edgecolor': DARK_THEME['grid'],
@@ -42,18 +59,349 @@ def apply_dark_theme():
     })
 
 
-def fig_to_base64(fig) -> str:
-    """Convert matplotlib figure to base64 string."""
+def fig_to_png(fig) -> bytes:
+    """Render a matplotlib figure to PNG bytes."""
     buf = io.BytesIO()
     fig.savefig(buf, format='png', dpi=120, bbox_inches='tight', 
                 facecolor=DARK_THEME['background'], edgecolor='none')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close(fig)
+    return buf.getvalue()
+
+
+def png_to_data_uri(png: bytes) -> str:
+    """Encode PNG bytes as a base64 data URI."""
+    img_base64 = base64.b64encode(png).decode('utf-8')
     return f"data:image/png;base64,{img_base64}"
 
 
-class ChartGenerator:
+def fig_to_base64(fig) -> str:
+    """Convert matplotlib figure to base64 string."""
+    return png_to_data_uri(fig_to_png(fig))
+
+
+class ChartRenderer:
+    """
+    Renders chart configurations against a DataFrame.
+
+    Chart data is computed by the _group_mean, _group_sum, _value_counts,
+    _histogram, _line_points, _scatter_grid and _scatter_points methods, so
+    a subclass can compute the same aggregates without holding the frame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """Initialize with the DataFrame to plot."""
+        self.df = df
+
+    @property
+    def columns(self) -> list:
+        """Names of the columns that can be plotted."""
+        return list(self.df.columns)
+
+    def _numeric_columns(self) -> list:
+        return self.df.select_dtypes(include=[np.number]).columns.tolist()
+
+    def _categorical_columns(self) -> list:
+        return self.df.select_dtypes(include=['object', 'category']).columns.tolist()
+
+    def generate_chart(self, config: dict) -> dict:
+        """Generate a single chart based on configuration."""
+        png = self.render_png(config)
+        if png is None:
+            return None
+        return chart_entry(config, image=png_to_data_uri(png))
+
+    def render_png(self, config: dict):
+        """Render a chart configuration to PNG bytes, or None on failure."""
+        chart_type = config.get('type', 'histogram')
+        title = config.get('title', 'Chart')
+        
+        try:
+            # Figures are built with the object-oriented API so no global
+            # pyplot state is shared between concurrent renders
+            fig = Figure(figsize=(8, 5))
+            ax = fig.subplots()
+            colors = DARK_THEME['accent_colors']
+            
+            if chart_type == 'bar':
+                self._create_bar_chart(ax, config, colors[0])
+            elif chart_type == 'line':
+                self._create_line_chart(ax, config, colors[1])
+            elif chart_type == 'histogram':
+                self._create_histogram(ax, config, colors[2])
+            elif chart_type == 'scatter':
+                self._create_scatter_chart(ax, config, colors[3])
+            elif chart_type == 'pie':
+                self._create_pie_chart(ax, config, colors)
+            else:
+                # Default to histogram of first numeric column
+                numeric_cols = self._numeric_columns()
+                if len(numeric_cols) > 0:
+                    self._draw_histogram(ax, numeric_cols[0], 20, colors[0])
+            
+            ax.set_title(title, fontsize=12, fontweight='bold', color=DARK_THEME['text'], pad=10)
+            
+            # Style adjustments
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+            
+            fig.tight_layout()
+            
+            return fig_to_png(fig)
+            
+        except Exception as e:
+            print(f"Chart generation error: {e}")
+            return None
+
+    def _group_mean(self, x_col, y_col, limit: int) -> pd.Series:
+        """Mean of y_col for the first `limit` groups of x_col, in key order."""
+        return self.df.groupby(x_col, observed=True)[y_col].mean().head(limit)
+
+    def _group_sum(self, x_col, y_col, limit: int) -> pd.Series:
+        """Sum of y_col for the first `limit` groups of x_col, in key order."""
+        return self.df.groupby(x_col, observed=True)[y_col].sum().head(limit)
+
+    def _value_counts(self, column, limit: int) -> pd.Series:
+        """The `limit` most frequent values of a column with their counts."""
+        return self.df[column].value_counts().head(limit)
+
+    def _histogram(self, column, bins: int):
+        """Bin counts and edges of a numeric column, or None for other columns."""
+        data = self.df[column].dropna()
+        if not pd.api.types.is_numeric_dtype(data):
+            return None
+        return np.histogram(data.to_numpy(dtype=float), bins=bins)
+
+    def _line_points(self, x_col, y_col) -> pd.DataFrame:
+        """The rows to draw for a line chart, reduced to the point budget."""
+        return reduce_line(self.df[[x_col, y_col]].dropna(), x_col, y_col, CHART_LINE_MAX_POINTS)
+
+    def _scatter_grid(self, x_col, y_col):
+        """Density grid for a scatter plot with too many points, or None."""
+        data = self.df[[x_col, y_col]].dropna()
+        if len(data) > CHART_DENSITY_THRESHOLD and self._is_plain_numeric(data[x_col]) \
+                and self._is_plain_numeric(data[y_col]):
+            return density_grid(
+                data[x_col].to_numpy(dtype=float), data[y_col].to_numpy(dtype=float), CHART_DENSITY_BINS
+            )
+        return None
+
+    def _scatter_points(self, x_col, y_col) -> pd.DataFrame:
+        """The rows to draw for a scatter plot, reduced to the point budget."""
+        data = self.df[[x_col, y_col]].dropna()
+        return reduce_scatter(data, x_col, y_col, CHART_SCATTER_MAX_POINTS)
+
+    def _create_bar_chart(self, ax, config, color):
+        """Create a bar chart."""
+        x_col = config.get('x')
+        y_col = config.get('y')
+        
+        if x_col and y_col and x_col in self.columns and y_col in self.columns:
+            # Group and aggregate
+            grouped = self._group_mean(x_col, y_col, 15)  # Limit to 15 bars
+            bars = ax.bar(range(len(grouped)), grouped.values, color=color, edgecolor=DARK_THEME['grid'])
+            ax.set_xticks(range(len(grouped)))
+            ax.set_xticklabels(grouped.index, rotation=45, ha='right')
+            ax.set_xlabel(x_col)
+            ax.set_ylabel(y_col)
+    
+    def _create_line_chart(self, ax, config, color):
+        """Create a line chart."""
+        x_col = config.get('x')
+        y_col = config.get('y')
+        
+        if x_col and y_col and x_col in self.columns and y_col in self.columns:
+            data = self._line_points(x_col, y_col)
+            # Markers only help while individual points can be told apart
+            marker = 'o' if len(data) <= 100 else None
+            ax.plot(data[x_col], data[y_col], color=color, linewidth=2, marker=marker, markersize=4)
+            ax.set_xlabel(x_col)
+            ax.set_ylabel(y_col)
+            ax.grid(True, alpha=0.3)
+    
+    def _create_histogram(self, ax, config, color):
+        """Create a histogram."""
+        column = config.get('column') or config.get('x')
+        
+        if column and column in self.columns:
+            self._draw_histogram(ax, column, 25, color, alpha=0.8)
+
+    def _draw_histogram(self, ax, column, bins: int, color, **style):
+        """Draw precomputed bin counts, exactly as ax.hist would bin the values."""
+        histogram = self._histogram(column, bins)
+        if histogram is None:
+            return
+        counts, edges = histogram
+        ax.hist(edges[:-1], bins=edges, weights=counts, color=color, edgecolor=DARK_THEME['grid'], **style)
+        ax.set_xlabel(column)
+        ax.set_ylabel('Frequency')
+    
+    def _create_scatter_chart(self, ax, config, color):
+        """Create a scatter plot."""
+        x_col = config.get('x')
+        y_col = config.get('y')
+        
+        if x_col and y_col and x_col in self.columns and y_col in self.columns:
+            grid = self._scatter_grid(x_col, y_col)
+            if grid is not None:
+                self._draw_density(ax, *grid)
+            else:
+                data = self._scatter_points(x_col, y_col)
+                ax.scatter(data[x_col], data[y_col], c=color, alpha=0.6, edgecolors='none', s=30)
+            ax.set_xlabel(x_col)
+            ax.set_ylabel(y_col)
+            ax.grid(True, alpha=0.3)
+    
+    @staticmethod
+    def _is_plain_numeric(values: pd.Series) -> bool:
+        """Check for numbers that can go straight on an axis, excluding booleans."""
+        return pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+    def _draw_density(self, ax, counts, x_edges, y_edges):
+        """Draw a scatter as a 2D histogram image, for too many points to plot."""
+        # Empty cells are masked so they show the axes background
+        image = ax.imshow(
+            np.ma.masked_equal(counts.T, 0),
+            origin='lower',
+            aspect='auto',
+            extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+            cmap='magma',
+            norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)),
+            interpolation='nearest',
+        )
+        colorbar = ax.figure.colorbar(image, ax=ax)
+        colorbar.set_label('Points per cell')
+        colorbar.outline.set_edgecolor(DARK_THEME['grid'])
+
+    def _create_pie_chart(self, ax, config, colors):
+        """Create a pie chart."""
+        column = config.get('column') or config.get('x')
+        values_col = config.get('values') or config.get('y')
+        
+        if column and column in self.columns:
+            if values_col and values_col in self.columns:
+                data = self._group_sum(column, values_col, 8)
+            else:
+                data = self._value_counts(column, 8)
+            
+            wedges, texts, autotexts = ax.pie(
+                data.values, 
+                labels=data.index, 
+                colors=colors[:len(data)],
+                autopct='%1.1f%%',
+                pctdistance=0.8,
+                textprops={'color': DARK_THEME['text'], 'fontsize': 9}
+            )
+            for autotext in autotexts:
+                autotext.set_color('white')
+                autotext.set_fontsize(8)
+
+
+def chart_entry(config: dict, **fields) -> dict:
+    """Build the chart description returned to the client."""
+    return {
+        'title': config.get('title', 'Chart'),
+        'description': config.get('description', ''),
+        'type': config.get('type', 'histogram'),
+        **fields
+    }
+
+
+# Columns each chart type reads from its configuration
+CHART_COLUMN_KEYS = ('x', 'y', 'column', 'values')
+KNOWN_CHART_TYPES = ('bar', 'line', 'histogram', 'scatter', 'pie')
+
+
+def chart_columns(df: pd.DataFrame, config: dict) -> list:
+    """
+    Get the columns a chart configuration needs.
+
+    Unknown chart types fall back to plotting the first numeric column, so
+    they need the whole frame.
+    """
+    if config.get('type', 'histogram') not in KNOWN_CHART_TYPES:
+        return list(df.columns)
+    columns = []
+    for key in CHART_COLUMN_KEYS:
+        col = config.get(key)
+        if col in df.columns and col not in columns:
+            columns.append(col)
+    return columns
+
+
+# Set in each pool worker: where it reports the charts it starts
+_worker_started = None
+
+
+def _init_render_worker(started):
+    """Process pool initializer: theme matplotlib and keep the start queue."""
+    global _worker_started
+    _worker_started = started
+    apply_dark_theme()
+
+
+def _render_chart_in_worker(task_id: int, df: pd.DataFrame, config: dict):
+    """Process pool entry point: render one chart from its column subset."""
+    _worker_started.put((task_id, time.time()))
+    return ChartRenderer(df).render_png(config)
+
+
+def _render_mapped_chart_in_worker(task_id: int, path: str, columns: list, config: dict):
+    """Process pool entry point: render one chart from a memory-mapped dataset file."""
+    _worker_started.put((task_id, time.time()))
+    return ChartRenderer(read_mapped(path, columns)).render_png(config)
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+# One chart job uses the pool at a time, so killing the workers after a
+# timeout never touches another job's charts, and a chart never waits for
+# a worker behind another job's charts
+_render_lock = threading.Lock()
+_task_ids = itertools.count()
+# Attempts per chart when its worker process dies, e.g. out of memory
+_RENDER_ATTEMPTS = 2
+# How often workers' chart start reports are checked while some are due
+_START_POLL_SECONDS = 0.05
+
+
+def _get_process_pool() -> tuple:
+    """
+    Get the shared chart rendering pool, starting it on first use.
+
+    Returns:
+        A tuple of (pool, queue of (task ID, start time) reported by workers).
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned rather than forked: the server runs request and job
+            # threads, which are unsafe to fork
+            context = multiprocessing.get_context('spawn')
+            started = context.Queue()
+            pool = ProcessPoolExecutor(
+                max_workers=CHART_RENDER_WORKERS,
+                mp_context=context,
+                initializer=_init_render_worker,
+                initargs=(started,),
+            )
+            _process_pool = (pool, started)
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor):
+    """Replace a broken pool or one whose worker is stuck, killing its processes."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None and _process_pool[0] is pool:
+            _process_pool = None
+    # The executor has no public way to stop a busy worker
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+class ChartGenerator(ChartRenderer):
     """Generates charts based on AI suggestions."""
     
     SUGGESTION_PROMPT = """You are a data visualization expert. Analyze this dataset and suggest exactly 3 charts that would provide the most valuable insights.
@@ -87,23 +435,20 @@ Rules:
 
     def __init__(self, df: pd.DataFrame, analyzer):
         """Initialize with a DataFrame and its analyzer."""
-        self.df = df
+        super().__init__(df)
         self.analyzer = analyzer
-        self.client = GeminiClient()
+        self.client = create_llm_client()
         apply_dark_theme()
     
     def get_ai_suggestions(self) -> list:
         """Ask AI for chart suggestions."""
         summary = self.analyzer.get_summary()
         
-        # Prepare sample data
-        sample = self.df.head(5).to_dict('records')
-        
         prompt = self.SUGGESTION_PROMPT.format(
-            columns=list(self.df.columns),
+            columns=self.columns,
             column_types=summary['column_types'],
             row_count=summary['row_count'],
-            sample_data=sample,
+            sample_data=summary['sample_data'],
             statistics=summary.get('basic_stats', {})
         )
         
@@ -125,8 +470,8 @@ Rules:
     def _fallback_suggestions(self) -> list:
         """Generate fallback chart suggestions if AI fails."""
         charts = []
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
-        categorical_cols = self.df.select_dtypes(include=['object', 'category']).columns.tolist()
+        numeric_cols = self._numeric_columns()
+        categorical_cols = self._categorical_columns()
         
         # Histogram for first numeric column
         if numeric_cols:
@@ -159,133 +504,137 @@ Rules:
         
         return charts[:3]
     
-    def generate_chart(self, config: dict) -> dict:
-        """Generate a single chart based on configuration."""
-        chart_type = config.get('type', 'histogram')
-        title = config.get('title', 'Chart')
-        description = config.get('description', '')
-        
-        try:
-            fig, ax = plt.subplots(figsize=(8, 5))
-            colors = DARK_THEME['accent_colors']
-            
-            if chart_type == 'bar':
-                self._create_bar_chart(ax, config, colors[0])
-            elif chart_type == 'line':
-                self._create_line_chart(ax, config, colors[1])
-            elif chart_type == 'histogram':
-                self._create_histogram(ax, config, colors[2])
-            elif chart_type == 'scatter':
-                self._create_scatter_chart(ax, config, colors[3])
-            elif chart_type == 'pie':
-                self._create_pie_chart(ax, config, colors)
-            else:
-                # Default to histogram of first numeric column
-                numeric_cols = self.df.select_dtypes(include=[np.number]).columns
-                if len(numeric_cols) > 0:
-                    ax.hist(self.df[numeric_cols[0]].dropna(), bins=20, color=colors[0], edgecolor=DARK_THEME['grid'])
-                    ax.set_xlabel(numeric_cols[0])
-                    ax.set_ylabel('Frequency')
-            
-            ax.set_title(title, fontsize=12, fontweight='bold', color=DARK_THEME['text'], pad=10)
-            
-            # Style adjustments
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            
-            plt.tight_layout()
-            
-            return {
-                'image': fig_to_base64(fig),
-                'title': title,
-                'description': description,
-                'type': chart_type
-            }
-            
-        except Exception as e:
-            print(f"Chart generation error: {e}")
-            return None
-    
-    def _create_bar_chart(self, ax, config, color):
-        """Create a bar chart."""
-        x_col = config.get('x')
-        y_col = config.get('y')
-        
-        if x_col and y_col and x_col in self.df.columns and y_col in self.df.columns:
-            # Group and aggregate
-            grouped = self.df.groupby(x_col)[y_col].mean().head(15)  # Limit to 15 bars
-            bars = ax.bar(range(len(grouped)), grouped.values, color=color, edgecolor=DARK_THEME['grid'])
-            ax.set_xticks(range(len(grouped)))
-            ax.set_xticklabels(grouped.index, rotation=45, ha='right')
-            ax.set_xlabel(x_col)
-            ax.set_ylabel(y_col)
-    
-    def _create_line_chart(self, ax, config, color):
-        """Create a line chart."""
-        x_col = config.get('x')
-        y_col = config.get('y')
-        
-        if x_col and y_col and x_col in self.df.columns and y_col in self.df.columns:
-            data = self.df[[x_col, y_col]].dropna().head(100)  # Limit points
-            ax.plot(data[x_col], data[y_col], color=color, linewidth=2, marker='o', markersize=4)
-            ax.set_xlabel(x_col)
-            ax.set_ylabel(y_col)
-            ax.grid(True, alpha=0.3)
-    
-    def _create_histogram(self, ax, config, color):
-        """Create a histogram."""
-        column = config.get('column') or config.get('x')
-        
-        if column and column in self.df.columns:
-            data = self.df[column].dropna()
-            if pd.api.types.is_numeric_dtype(data):
-                ax.hist(data, bins=25, color=color, edgecolor=DARK_THEME['grid'], alpha=0.8)
-                ax.set_xlabel(column)
-                ax.set_ylabel('Frequency')
-    
-    def _create_scatter_chart(self, ax, config, color):
-        """Create a scatter plot."""
-        x_col = config.get('x')
-        y_col = config.get('y')
-        
-        if x_col and y_col and x_col in self.df.columns and y_col in self.df.columns:
-            data = self.df[[x_col, y_col]].dropna().head(500)  # Limit points
-            ax.scatter(data[x_col], data[y_col], c=color, alpha=0.6, edgecolors='none', s=30)
-            ax.set_xlabel(x_col)
-            ax.set_ylabel(y_col)
-            ax.grid(True, alpha=0.3)
-    
-    def _create_pie_chart(self, ax, config, colors):
-        """Create a pie chart."""
-        column = config.get('column') or config.get('x')
-        values_col = config.get('values') or config.get('y')
-        
-        if column and column in self.df.columns:
-            if values_col and values_col in self.df.columns:
-                data = self.df.groupby(column)[values_col].sum().head(8)
-            else:
-                data = self.df[column].value_counts().head(8)
-            
-            wedges, texts, autotexts = ax.pie(
-                data.values, 
-                labels=data.index, 
-                colors=colors[:len(data)],
-                autopct='%1.1f%%',
-                pctdistance=0.8,
-                textprops={'color': DARK_THEME['text'], 'fontsize': 9}
-            )
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontsize(8)
-    
-    def generate_charts(self) -> list:
-        """Generate all suggested charts."""
-        suggestions = self.get_ai_suggestions()
+    def generate_charts(self, suggestions: list = None, mode: str = None,
+                        dataset_key: str = None, cache=None, source=None) -> list:
+        """
+        Generate all suggested charts.
+
+        Args:
+            suggestions: Optional chart configurations. Asks the AI when not given.
+            mode: 'serial' renders in this process; 'process' renders charts
+                concurrently in a process pool. Defaults to CHART_RENDER_MODE.
+            dataset_key: Content hash of the dataset, needed for caching.
+            cache: Optional ChartCache. Cached charts are not re-rendered, and
+                every chart is returned by 'key' instead of an inline 'image'.
+            source: Optional memory-mapped Feather file holding the dataset,
+                from DatasetCache.mapped_path(). Pool workers map it instead
+                of receiving pickled copies of the columns.
+
+        Returns:
+            The rendered charts, in the same order as the suggestions.
+        """
+        if suggestions is None:
+            suggestions = self.get_ai_suggestions()
+
+        use_cache = cache is not None and dataset_key is not None
+        if use_cache:
+            keys = [chart_key(dataset_key, config, DARK_THEME) for config in suggestions]
+            pngs = [cache.get(key) for key in keys]
+        else:
+            keys = [None] * len(suggestions)
+            pngs = [None] * len(suggestions)
+
+        missing = [i for i, png in enumerate(pngs) if png is None]
+        rendered = self._render_many([suggestions[i] for i in missing], mode, source)
+        for i, png in zip(missing, rendered):
+            pngs[i] = png
+            if use_cache and png is not None:
+                cache.put(keys[i], png)
+
         charts = []
-        
-        for config in suggestions:
-            chart = self.generate_chart(config)
-            if chart:
-                charts.append(chart)
-        
+        for config, key, png in zip(suggestions, keys, pngs):
+            if png is None:
+                continue
+            if use_cache:
+                charts.append(chart_entry(config, key=key))
+            else:
+                charts.append(chart_entry(config, image=png_to_data_uri(png)))
         return charts
+
+    def _render_many(self, configs: list, mode: str = None, source=None) -> list:
+        """Render configurations to PNG bytes, keeping their order."""
+        if (mode or CHART_RENDER_MODE) == 'process' and len(configs) > 1:
+            return self._render_in_pool(configs, source=source)
+        return [self.render_png(config) for config in configs]
+
+    def _render_in_pool(self, configs: list, timeout: float = None, source=None) -> list:
+        """
+        Render charts to PNG bytes concurrently in the process pool.
+
+        Each worker gets only the columns its chart reads, either by mapping
+        them from the source file or as a pickled copy. Jobs take turns with
+        the pool, and each chart's timeout counts from when a worker reports
+        starting it. A chart still running after its timeout is dropped: the
+        pool's processes are killed, and the other charts that were in
+        flight start over in a fresh pool. Charts whose worker died for
+        another reason are also retried, up to _RENDER_ATTEMPTS times.
+        """
+        timeout = CHART_RENDER_TIMEOUT if timeout is None else timeout
+        # The file may have been evicted since the dataset was opened
+        if source is not None and not os.path.exists(source):
+            source = None
+
+        def submit(pool, task_id, config):
+            columns = chart_columns(self.df, config)
+            if source is not None:
+                return pool.submit(_render_mapped_chart_in_worker, task_id, str(source), columns, config)
+            return pool.submit(_render_chart_in_worker, task_id, self.df[columns], config)
+
+        pngs = [None] * len(configs)
+        attempts = [0] * len(configs)
+        queued = list(range(len(configs)))
+        with _render_lock:
+            pool, started = _get_process_pool()
+            # Future -> (config index, task ID); task ID -> start time
+            running = {}
+            start_times = {}
+            while queued or running:
+                while queued and len(running) < CHART_RENDER_WORKERS:
+                    index = queued.pop(0)
+                    task_id = next(_task_ids)
+                    running[submit(pool, task_id, configs[index])] = (index, task_id)
+
+                # Charts not started yet, e.g. while a fresh pool spawns its
+                # processes, are not timed; poll for their start reports
+                deadlines = [start_times[task_id] + timeout
+                             for _, task_id in running.values() if task_id in start_times]
+                wait_time = max(0, min(deadlines) - time.time()) if deadlines else timeout
+                if len(deadlines) < len(running):
+                    wait_time = min(wait_time, _START_POLL_SECONDS)
+                done, _ = wait(running, timeout=wait_time, return_when=FIRST_COMPLETED)
+                while True:
+                    try:
+                        task_id, started_at = started.get_nowait()
+                    except queue.Empty:
+                        break
+                    start_times[task_id] = started_at
+
+                broken = False
+                for future in done:
+                    index, _ = running.pop(future)
+                    try:
+                        pngs[index] = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        attempts[index] += 1
+                        if attempts[index] < _RENDER_ATTEMPTS:
+                            queued.append(index)
+                        else:
+                            print(f"Chart rendering failed: {configs[index].get('title', 'Chart')}")
+                    except Exception as e:
+                        print(f"Chart generation error: {e}")
+
+                now = time.time()
+                expired = [future for future, (_, task_id) in running.items()
+                           if now - start_times.get(task_id, now) >= timeout]
+                for future in expired:
+                    index, _ = running.pop(future)
+                    print(f"Chart rendering timed out: {configs[index].get('title', 'Chart')}")
+                if expired or broken:
+                    # A killed or dead worker breaks the pool, so charts still
+                    # in flight are queued again with a fresh clock
+                    queued[:0] = [index for index, _ in running.values()]
+                    running = {}
+                    _discard_process_pool(pool)
+                    pool, started = _get_process_pool()
+        return pngs
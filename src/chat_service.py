@@ -1,7 +1,16 @@
 """Chat service for Q&A about datasets using Gemini."""
 
-from .gemini_client import GeminiClient
+import json
+
+from .config import QUERY_MODE_ENABLED, INTENT_ROUTER_ENABLED
+from .llm_backend import RateLimitError
+from .llm_router import create_llm_client
 from .dataset_analyzer import DatasetAnalyzer
+from .conversation_memory import ConversationMemory
+from .intent_router import IntentRouter, router_stats
+from .query_engine import (
+    QueryPlanError, parse_plan, validate_plan, execute_plan, format_result, describe_schema,
+)
 
 
 class ChatService:
@@ -21,6 +30,23 @@ Here is the information about the current dataset:
 {dataset_summary}
 """
 
+    PLAN_PROMPT = """Decide whether answering the question below needs an exact computation over the dataset's rows.
+
+Columns:
+{schema}
+
+Question: {question}
+
+If it does, return a query plan as JSON:
+{{"plan": {{"filters": [{{"column": "...", "op": ">", "value": 2000}}], "group_by": ["..."], "aggregations": [{{"column": "...", "func": "mean", "as": "..."}}], "select": ["..."], "sort": [{{"column": "...", "descending": true}}], "limit": 10}}}}
+
+Filter ops: ==, !=, >, >=, <, <=, in, not_in, between, contains, is_null, not_null.
+On date columns, a bare number such as 2000 compares the year; otherwise give ISO dates such as "2000-06-01".
+Aggregation funcs: count, sum, mean, median, min, max, std, nunique.
+Leave out sections you do not need. Sort only by columns of the result. Use "select" only without aggregations.
+If the question is not about the data or needs no computation, return {{"plan": null}}.
+Return only JSON."""
+
     def __init__(self, analyzer: DatasetAnalyzer, model: str = None):
         """
         Initialize the chat service.
@@ -30,13 +56,78 @@ Here is the information about the current dataset:
             model: Optional model override for Gemini.
         """
         self.analyzer = analyzer
-        self.client = GeminiClient(model=model)
-        self.conversation_history = []
+        self.client = create_llm_client(model=model)
+        self.memory = ConversationMemory(self.client)
+        self.query_mode = QUERY_MODE_ENABLED
+        self.router = IntentRouter(analyzer) if INTENT_ROUTER_ENABLED else None
+        # Decides which questions are worth a query planning call
+        self._query_gate = self.router or IntentRouter(analyzer)
+
+    @property
+    def conversation_history(self) -> list:
+        """The history sent with each request: a running summary plus recent turns."""
+        return self.memory.messages()
 
     def _get_system_prompt(self) -> str:
         """Generate the system prompt with dataset context."""
         return self.SYSTEM_PROMPT_TEMPLATE.format(
-            dataset_summary=self.analyzer.get_summary_text()
+            dataset_summary=self.analyzer.get_context_text()
+        )
+
+    def _answer_locally(self, question: str):
+        """Answer from the dataset summary if the intent router can, counting the outcome."""
+        answer = self.router.answer(question) if self.router is not None else None
+        router_stats.record(answer is not None)
+        return answer
+
+    def _run_query(self, question: str, history: list = None):
+        """
+        Have the model plan an exact query for the question and run it locally.
+
+        Returns:
+            A tuple of (plan, result text), or None when no query is needed
+            or the plan could not be used.
+        """
+        df = self.analyzer.df
+        try:
+            response = self.client.chat(
+                user_message=self.PLAN_PROMPT.format(schema=describe_schema(df, question), question=question),
+                conversation_history=history,
+                temperature=0,
+                max_tokens=512,
+            )
+            plan = parse_plan(response)
+            if plan is None:
+                return None
+            plan = validate_plan(plan, df)
+            return plan, format_result(execute_plan(df, plan))
+        except RateLimitError:
+            raise
+        except QueryPlanError as e:
+            print(f"Query plan rejected: {e}")
+        except Exception as e:
+            print(f"Query planning error: {e}")
+        return None
+
+    def _build_question(self, question: str, history: list = None) -> str:
+        """Attach the exact query result to the question when query mode finds one."""
+        if not self.query_mode or self.analyzer.df is None:
+            # Out-of-core datasets have no frame to run queries against
+            return question
+        if not self._query_gate.needs_query(question):
+            # Planning is a blocking model call before the answer starts
+            return question
+        query = self._run_query(question, history)
+        if query is None:
+            return question
+        plan, result = query
+        # Empty sections add nothing for the model
+        plan = {key: value for key, value in plan.items() if value not in ([], None)}
+        return (
+            f"{question}\n\n"
+            f"Exact result computed over the full dataset with the query {json.dumps(plan, default=str)}:\n"
+            f"{result}\n\n"
+            "Base your answer on this result."
         )
 
     def ask(self, question: str, include_history: bool = True) -> str:
@@ -50,24 +141,62 @@ Here is the information about the current dataset:
         Returns:
             The AI's response.
         """
+        local = self._answer_locally(question)
+        if local is not None:
+            self._record_turn(question, local)
+            return local
+
         history = self.conversation_history if include_history else None
         
         response = self.client.chat(
-            user_message=question,
+            user_message=self._build_question(question, history),
             system_prompt=self._get_system_prompt(),
             conversation_history=history,
         )
 
-        # Update conversation history
-        self.conversation_history.append({"role": "user", "content": question})
-        self.conversation_history.append({"role": "assistant", "content": response})
-
+        self._record_turn(question, response)
         return response
 
+    def ask_stream(self, question: str, include_history: bool = True):
+        """
+        Ask a question about the dataset and yield the answer as it is generated.
+
+        The turn is added to the conversation history once the stream completes.
+
+        Args:
+            question: The user's question.
+            include_history: Whether to include conversation history for context.
+
+        Yields:
+            Pieces of the AI's response, in order.
+        """
+        local = self._answer_locally(question)
+        if local is not None:
+            yield local
+            self._record_turn(question, local)
+            return
+
+        history = self.conversation_history if include_history else None
+
+        pieces = []
+        for piece in self.client.chat_stream(
+            user_message=self._build_question(question, history),
+            system_prompt=self._get_system_prompt(),
+            conversation_history=history,
+        ):
+            pieces.append(piece)
+            yield piece
+
+        self._record_turn(question, "".join(pieces))
+
+    def _record_turn(self, question: str, response: str):
+        """Update the conversation history with a completed turn."""
+        self.memory.add_turn(question, response)
+
     def clear_history(self):
         """Clear the conversation history."""
-        self.conversation_history = []
+        self.memory.clear()
 
     def get_history(self) -> list:
         """Get the current conversation history."""
-        return self.conversation_history.copy()
+        return self.conversation_history
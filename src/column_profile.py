@@ -0,0 +1,192 @@
+"""Detailed profiles of single columns, computed on demand."""
+
+import numpy as np
+import pandas as pd
+
+from .config import PROFILE_TOP_K, PROFILE_HISTOGRAM_BINS
+
+# Quantiles reported for numeric columns
+PROFILE_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def _float(value):
+    """A JSON-safe float, with NaN and infinities as None."""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _json_value(value):
+    """Convert a column value to a JSON-safe Python value."""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return _float(value)
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    return str(value)
+
+
+def _top_values(values: pd.Series, top_k: int) -> tuple:
+    """
+    Count the distinct values of a column without missing values.
+
+    Returns:
+        A tuple of (number of distinct values, list of the top_k most
+        frequent as {"value", "count"} entries).
+    """
+    try:
+        codes, uniques = pd.factorize(values)
+    except TypeError:
+        # Unhashable cells such as lists from nested JSON
+        codes, uniques = pd.factorize(values.astype(str))
+    counts = np.bincount(codes, minlength=len(uniques))
+
+    top = np.arange(len(counts))
+    if len(counts) > top_k:
+        top = np.argpartition(-counts, top_k)[:top_k]
+    # Most frequent first, ties in order of first appearance
+    top = top[np.lexsort((top, -counts[top]))]
+    return len(uniques), [
+        {"value": _json_value(uniques[i]), "count": int(counts[i])} for i in top
+    ]
+
+
+def _histogram(data: np.ndarray, bins: int) -> dict:
+    low, high = data.min(), data.max()
+    if low == high:
+        # A constant column, e.g. a snapshot date: np.histogram cannot
+        # split an empty range, so one bin holds every value
+        return {"counts": [len(data)], "edges": [low.item(), high.item()]}
+    counts, edges = np.histogram(data, bins=bins)
+    return {"counts": counts.tolist(), "edges": edges.tolist()}
+
+
+def _numeric_profile(values: pd.Series, bins: int) -> tuple:
+    """Statistics and histogram of a numeric column's finite values."""
+    data = values.to_numpy(dtype=float)
+    finite = data[np.isfinite(data)]
+    if len(finite) == 0:
+        return {"infinite_count": len(data)}, None
+
+    quantiles = np.quantile(finite, PROFILE_QUANTILES)
+    stats = {
+        "min": _float(finite.min()),
+        "max": _float(finite.max()),
+        "mean": _float(finite.mean()),
+        "std": _float(finite.std(ddof=1)) if len(finite) > 1 else None,
+        "quantiles": {str(q): _float(v) for q, v in zip(PROFILE_QUANTILES, quantiles)},
+        "zero_count": int(np.count_nonzero(finite == 0)),
+        "negative_count": int(np.count_nonzero(finite < 0)),
+        "infinite_count": len(data) - len(finite),
+    }
+    return stats, _histogram(finite, bins)
+
+
+def _datetime_profile(values: pd.Series, bins: int) -> tuple:
+    """Range and histogram of a datetime column, with ISO 8601 bin edges."""
+    # Integer ticks in the column's unit, UTC for time zone aware columns
+    ticks = values.array.asi8
+    unit = values.dt.unit
+    low, high = values.min(), values.max()
+    stats = {
+        "min": low.isoformat(),
+        "max": high.isoformat(),
+        "range_days": (high - low).total_seconds() / 86400,
+    }
+
+    histogram = _histogram(ticks, bins)
+    edges = np.array(histogram["edges"]).astype(np.int64).astype(f"datetime64[{unit}]")
+    edges = pd.DatetimeIndex(edges)
+    if values.dt.tz is not None:
+        edges = edges.tz_localize("UTC").tz_convert(values.dt.tz)
+    histogram["edges"] = [edge.isoformat() for edge in edges]
+    return stats, histogram
+
+
+def _string_lengths(values: pd.Series) -> np.ndarray:
+    """Character lengths of a text column's values."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Measure each category once and look the lengths up by code
+        lengths = values.cat.categories.astype(str).str.len().to_numpy()
+        return lengths[values.cat.codes.to_numpy()]
+    if not pd.api.types.is_string_dtype(values) or values.dtype == object:
+        values = values.astype(str)
+    return values.str.len().to_numpy(dtype=np.int64)
+
+
+def _text_profile(values: pd.Series, bins: int) -> tuple:
+    """String length statistics and length histogram of a text column."""
+    lengths = _string_lengths(values)
+    low, high = int(lengths.min()), int(lengths.max())
+    stats = {
+        "min_length": low,
+        "max_length": high,
+        "mean_length": float(lengths.mean()),
+        "empty_count": int(np.count_nonzero(lengths == 0)),
+    }
+    # One bin per length when there are few enough, so edges stay integers
+    bins = min(bins, high - low + 1)
+    counts, edges = np.histogram(lengths, bins=bins, range=(low, high + 1))
+    return stats, {"counts": counts.tolist(), "edges": edges.tolist()}
+
+
+def _kind(values: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(values):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(values):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return "datetime"
+    if isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(values):
+        return "text"
+    return "other"
+
+
+def profile_column(values: pd.Series, top_k: int = None, bins: int = None) -> dict:
+    """
+    Build a detailed profile of one column.
+
+    Every profile has the row, missing and exact distinct counts and the
+    most frequent values. Numeric columns add quantiles and a histogram,
+    datetime columns their range and a histogram, and text columns string
+    length statistics and a histogram of lengths. Each part is one
+    vectorized pass over the column.
+
+    Args:
+        values: The column.
+        top_k: Most frequent values listed. Defaults to PROFILE_TOP_K.
+        bins: Histogram bins. Defaults to PROFILE_HISTOGRAM_BINS.
+
+    Returns:
+        A JSON-safe dictionary.
+    """
+    top_k = top_k or PROFILE_TOP_K
+    bins = bins or PROFILE_HISTOGRAM_BINS
+    present = values.dropna()
+    # Object columns are text only if every present value is a string
+    kind = _kind(present)
+
+    profile = {
+        "column": _json_value(values.name),
+        "dtype": str(values.dtype),
+        "kind": kind,
+        "row_count": len(values),
+        "null_count": len(values) - len(present),
+        "distinct_count": 0,
+        "top_values": [],
+        "stats": None,
+        "histogram": None,
+    }
+    if len(present) == 0:
+        return profile
+
+    profile["distinct_count"], profile["top_values"] = _top_values(present, top_k)
+    if kind == "numeric":
+        profile["stats"], profile["histogram"] = _numeric_profile(present, bins)
+    elif kind == "datetime":
+        profile["stats"], profile["histogram"] = _datetime_profile(present, bins)
+    elif kind == "text":
+        profile["stats"], profile["histogram"] = _text_profile(present, bins)
+    return profile
@@ -1,6 +1,7 @@
 """Configuration module for Data Analytics Assistant."""
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -12,6 +13,10 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 # Default model to use (free tier compatible)
 DEFAULT_MODEL = "gemini-2.5-flash"
 
+# Groq API Configuration (optional secondary provider)
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
 # Supported file extensions for dataset loading
 SUPPORTED_EXTENSIONS = {
     ".csv": "csv",
@@ -20,6 +25,178 @@ SUPPORTED_EXTENSIONS = {
     ".json": "json",
 }
 
+# CSV loading: rows parsed per chunk and bytes inspected to detect the encoding
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "100000"))
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Load-time dtype optimization: downcast numbers, parse date columns and
+# store text columns as categories when at most this share of their values
+# is distinct
+DTYPE_OPTIMIZATION_ENABLED = os.getenv("DTYPE_OPTIMIZATION_ENABLED", "true").lower() in ("1", "true", "yes")
+CATEGORY_MAX_UNIQUE_RATIO = float(os.getenv("CATEGORY_MAX_UNIQUE_RATIO", "0.5"))
+
+# Parsed dataset cache: location and disk budget (0 disables the cache)
+DATASET_CACHE_DIR = os.getenv(
+    "DATASET_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "data_analytics_assistant", "datasets"),
+)
+DATASET_CACHE_MAX_BYTES = int(float(os.getenv("DATASET_CACHE_MAX_MB", "500")) * 1024 * 1024)
+
+# Largest accepted upload
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "10240")) * 1024 * 1024)
+
+# Uploads are hashed as the request body arrives. CSV files are parsed as
+# they arrive too; Excel and JSON files, and CSV files that may be analyzed
+# out of core, are buffered in memory up to this size, then on disk.
+UPLOAD_SPOOL_MAX_BYTES = int(float(os.getenv("UPLOAD_SPOOL_MAX_MB", "16")) * 1024 * 1024)
+
+# Out-of-core mode: CSV files at least this large are never loaded into
+# memory, and other formats this large are rejected. Their summary, charts and chat context come from passes over the
+# file, CSV_CHUNK_SIZE rows at a time. Uploaded files are kept in
+# OUT_OF_CORE_DIR within its disk budget, and group-bys and value counts
+# keep at most OUT_OF_CORE_MAX_GROUPS exact counters per chart.
+OUT_OF_CORE_MIN_BYTES = int(float(os.getenv("OUT_OF_CORE_MIN_MB", "50")) * 1024 * 1024)
+OUT_OF_CORE_DIR = os.getenv(
+    "OUT_OF_CORE_DIR",
+    os.path.join(tempfile.gettempdir(), "data_analytics_assistant", "out_of_core"),
+)
+OUT_OF_CORE_MAX_BYTES = int(float(os.getenv("OUT_OF_CORE_MAX_MB", "20480")) * 1024 * 1024)
+OUT_OF_CORE_MAX_GROUPS = int(os.getenv("OUT_OF_CORE_MAX_GROUPS", "100000"))
+
+# Dataset storage: 'memory' gives every worker process its own copy of a
+# dataset; 'mmap' serves datasets from uncompressed Arrow files in the
+# dataset cache, mapped read-only so all workers share the same pages
+DATASET_STORAGE_MODE = os.getenv("DATASET_STORAGE_MODE", "memory")
+
+# Per-session datasets: RAM budget before least recently used sessions are
+# evicted, where session-to-dataset references are kept for restoring them,
+# and how long an unused reference is kept
+SESSION_MEMORY_BUDGET_BYTES = int(
+    float(os.getenv("SESSION_MEMORY_BUDGET_MB", "1024")) * 1024 * 1024
+)
+SESSION_INDEX_DIR = os.getenv(
+    "SESSION_INDEX_DIR",
+    os.path.join(tempfile.gettempdir(), "data_analytics_assistant", "sessions"),
+)
+SESSION_INDEX_TTL_SECONDS = int(os.getenv("SESSION_INDEX_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Chart rendering: 'serial' renders in-process, 'process' renders charts
+# concurrently in a process pool with a per-chart timeout in seconds
+CHART_RENDER_MODE = os.getenv("CHART_RENDER_MODE", "serial")
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "20"))
+
+# Point budgets for line charts (reduced with LTTB) and scatter plots
+# (sampled), so rendering cost stays bounded on very large datasets
+CHART_LINE_MAX_POINTS = int(os.getenv("CHART_LINE_MAX_POINTS", "1000"))
+CHART_SCATTER_MAX_POINTS = int(os.getenv("CHART_SCATTER_MAX_POINTS", "5000"))
+
+# Numeric scatter plots with more rows than this are drawn as a density
+# image of a CHART_DENSITY_BINS x CHART_DENSITY_BINS grid instead of points
+CHART_DENSITY_THRESHOLD = int(os.getenv("CHART_DENSITY_THRESHOLD", "200000"))
+CHART_DENSITY_BINS = int(os.getenv("CHART_DENSITY_BINS", "200"))
+
+# Preview table: most rows returned per page, and sorted or filtered views
+# whose row positions are cached per dataset for paging
+PREVIEW_MAX_ROWS = int(os.getenv("PREVIEW_MAX_ROWS", "500"))
+PREVIEW_CACHE_ENTRIES = int(os.getenv("PREVIEW_CACHE_ENTRIES", "8"))
+
+# Column profiles (/api/columns/<name>/profile): most frequent values
+# listed, histogram bins, and whether the columns used by the generated
+# charts are profiled in the background ahead of the first request
+PROFILE_TOP_K = int(os.getenv("PROFILE_TOP_K", "10"))
+PROFILE_HISTOGRAM_BINS = int(os.getenv("PROFILE_HISTOGRAM_BINS", "20"))
+PROFILE_PREFETCH_ENABLED = os.getenv("PROFILE_PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Rendered chart images: location and disk budget
+CHART_CACHE_DIR = os.getenv(
+    "CHART_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "data_analytics_assistant", "charts"),
+)
+CHART_CACHE_MAX_BYTES = int(float(os.getenv("CHART_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+# LLM response cache: on/off switch, SQLite file, entry lifetime and size budget
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "data_analytics_assistant", "llm_cache.sqlite3"),
+)
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+LLM_CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+# Approximate token budget for the dataset description in the chat system prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+
+# Chat history: recent turns kept verbatim, their token budget, and the token
+# budget for the running summary that older turns are folded into
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "6"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "300"))
+
+# Answer simple questions (row counts, missing values, one column's
+# statistics) from the dataset summary without calling the model
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Summary statistics: 'exact' uses describe(), 'approximate' uses mergeable
+# sketches built chunk by chunk, and 'auto' switches to sketches for
+# datasets with at least APPROX_STATS_MIN_ROWS rows. Sketch sizes trade
+# memory for accuracy; see src/sketches.py for the error bounds.
+STATS_MODE = os.getenv("STATS_MODE", "auto")
+APPROX_STATS_MIN_ROWS = int(os.getenv("APPROX_STATS_MIN_ROWS", "1000000"))
+SKETCH_KLL_K = int(os.getenv("SKETCH_KLL_K", "200"))
+SKETCH_HLL_PRECISION = int(os.getenv("SKETCH_HLL_PRECISION", "14"))
+SKETCH_TOP_K = int(os.getenv("SKETCH_TOP_K", "64"))
+
+# Query mode: the model plans a restricted pandas query (filter, group-by,
+# aggregate, sort, limit) that runs locally, and answers from its exact
+# result. Only questions that ask for a count or name a column along with
+# an aggregate or filter are planned, since planning is an extra blocking
+# model call. Results longer than this many rows are truncated in the prompt.
+QUERY_MODE_ENABLED = os.getenv("QUERY_MODE_ENABLED", "true").lower() in ("1", "true", "yes")
+QUERY_MAX_RESULT_ROWS = int(os.getenv("QUERY_MAX_RESULT_ROWS", "30"))
+
+# LLM request scheduling: per-provider requests and tokens per minute (free
+# tier defaults), requests in flight per provider, retries with exponential
+# backoff, and how long a request may wait for rate budget
+PROVIDER_RATE_LIMITS = {
+    "gemini": {
+        "rpm": float(os.getenv("GEMINI_RPM", "10")),
+        "tpm": float(os.getenv("GEMINI_TPM", "250000")),
+    },
+    "groq": {
+        "rpm": float(os.getenv("GROQ_RPM", "30")),
+        "tpm": float(os.getenv("GROQ_TPM", "12000")),
+    },
+    "default": {"rpm": 60.0, "tpm": 1000000.0},
+}
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+
+# Hedged requests: when the primary provider has not answered within this
+# percentile of its recent latency, the same request also goes to the
+# secondary and the first answer wins. Until enough latencies are recorded a
+# fixed delay is used. Needs GROQ_API_KEY.
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_PROVIDERS = tuple(
+    name.strip() for name in os.getenv("HEDGE_PROVIDERS", "gemini,groq").split(",")
+)
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "4"))
+# Latency samples kept per provider before older ones are decayed
+LATENCY_HISTORY_SIZE = int(os.getenv("LATENCY_HISTORY_SIZE", "500"))
+
+# Background jobs for slow upload stages (AI chart suggestions and rendering)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_STATE_DIR = os.getenv(
+    "JOB_STATE_DIR",
+    os.path.join(tempfile.gettempdir(), "data_analytics_assistant", "jobs"),
+)
+
 
 def validate_config():
     """Validate that required configuration is present."""
@@ -29,3 +206,13 @@ def validate_config():
             "Get your API key at: https://aistudio.google.com/apikey"
         )
     return True
+
+
+def validate_groq_config():
+    """Validate that the Groq API key is present."""
+    if not GROQ_API_KEY or GROQ_API_KEY == "your_api_key_here":
+        raise ValueError(
+            "GROQ_API_KEY is not set. Please add your API key to the .env file.\n"
+            "Get your API key at: https://console.groq.com/keys"
+        )
+    return True
@@ -0,0 +1,168 @@
+"""Token-budgeted dataset context for LLM prompts."""
+
+# Rough size of a token for English text and numbers
+CHARS_PER_TOKEN = 4
+
+# Share of the budget columns may use before sample rows are added
+COLUMN_BUDGET_SHARE = 0.75
+
+# describe() statistics and their compact labels, in display order
+STAT_LABELS = [
+    ("min", "min"),
+    ("25%", "q1"),
+    ("50%", "med"),
+    ("75%", "q3"),
+    ("max", "max"),
+    ("mean", "mean"),
+    ("std", "sd"),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens a text uses.
+
+    Args:
+        text: The text to measure.
+
+    Returns:
+        An approximate token count.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def shorten(value, max_chars: int) -> str:
+    """Render a value as text, truncating it to max_chars."""
+    text = str(value).replace("\n", " ")
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars - 1] + "…"
+
+
+def format_number(value: float) -> str:
+    """Render a number with four significant digits."""
+    return f"{value:.4g}"
+
+
+def rank_columns(summary: dict) -> list:
+    """
+    Order columns by how useful they are for answering questions.
+
+    Mostly complete columns rank above sparse ones and numeric columns with
+    statistics get a boost. Unnamed index columns written by pandas sink to
+    the bottom. Ties keep the dataset's column order.
+
+    Args:
+        summary: The result of DatasetAnalyzer.get_summary().
+
+    Returns:
+        Column names, most useful first.
+    """
+    def score(col):
+        empty = summary["empty_data"].get(col, {}).get("percentage", 0)
+        value = 1 - empty / 100
+        if col in summary["basic_stats"]:
+            value += 0.5
+        if str(col).startswith("Unnamed:"):
+            value -= 2
+        return value
+
+    return sorted(summary["columns"], key=score, reverse=True)
+
+
+def describe_column(col, summary: dict, max_cell_chars: int) -> str:
+    """Render one column's type, emptiness and statistics on a single line."""
+    dtype = summary["column_types"].get(col, "unknown")
+    empty = summary["empty_data"].get(col, {}).get("percentage", 0)
+    details = [dtype, f"{empty}% empty"]
+    distinct = summary.get("distinct_counts", {}).get(col)
+    if distinct is not None:
+        approx = "~" if summary.get("stats_approximate") else ""
+        details.append(f"{approx}{distinct} distinct")
+    line = f"- {shorten(col, max_cell_chars)} ({', '.join(details)})"
+
+    stats = summary["basic_stats"].get(col)
+    if stats:
+        parts = [
+            f"{label}={format_number(stats[stat])}"
+            for stat, label in STAT_LABELS
+            if stats.get(stat) is not None
+        ]
+        line += ": " + " ".join(parts)
+    return line
+
+
+def build_dataset_context(summary: dict, max_tokens: int, max_cell_chars: int = 40) -> str:
+    """
+    Build a compact dataset description that fits a token budget.
+
+    Columns are added in rank order until most of the budget is used, then
+    sample rows restricted to the included columns fill what remains. Any
+    columns that did not fit are named at the end if there is room.
+
+    Args:
+        summary: The result of DatasetAnalyzer.get_summary().
+        max_tokens: The token budget for the whole context.
+        max_cell_chars: Longest text kept for a single name or cell value.
+
+    Returns:
+        The context text.
+    """
+    lines = [
+        "=== DATASET SUMMARY ===",
+        f"Rows: {summary['row_count']} | Columns: {summary['column_count']}",
+        "",
+        "=== COLUMNS (type, % empty, distinct, stats) ===",
+    ]
+    if summary.get("stats_approximate"):
+        lines.insert(2, "Quartiles and distinct counts are approximate.")
+    used = estimate_tokens("\n".join(lines))
+
+    column_budget = max_tokens * COLUMN_BUDGET_SHARE
+    included = []
+    ranked = rank_columns(summary)
+    for col in ranked:
+        line = describe_column(col, summary, max_cell_chars)
+        cost = estimate_tokens(line) + 1
+        if used + cost > column_budget:
+            break
+        lines.append(line)
+        included.append(col)
+        used += cost
+
+    # Sample rows show the included columns in dataset order
+    included_set = set(included)
+    sample_cols = [col for col in summary["columns"] if col in included_set]
+    if summary["sample_data"] and sample_cols:
+        header = ["", "=== SAMPLE ROWS ===", " | ".join(shorten(c, max_cell_chars) for c in sample_cols)]
+        cost = estimate_tokens("\n".join(header)) + 1
+        rows = []
+        for row in summary["sample_data"]:
+            line = " | ".join(shorten(row.get(c, ""), max_cell_chars) for c in sample_cols)
+            line_cost = estimate_tokens(line) + 1
+            if used + cost + line_cost > max_tokens:
+                break
+            rows.append(line)
+            cost += line_cost
+        if rows:
+            lines.extend(header + rows)
+            used += cost
+
+    omitted = ranked[len(included):]
+    if omitted:
+        note = f"({len(omitted)} more columns omitted: "
+        names = 0
+        for col in omitted:
+            candidate = note + (", " if names else "") + shorten(col, max_cell_chars)
+            if used + estimate_tokens(candidate + ")") + 2 > max_tokens:
+                break
+            note = candidate
+            names += 1
+        if names:
+            remainder = len(omitted) - names
+            suffix = f", +{remainder} more)" if remainder else ")"
+            lines.extend(["", note + suffix])
+        else:
+            lines.extend(["", f"({len(omitted)} more columns omitted)"])
+
+    return "\n".join(lines)
@@ -0,0 +1,186 @@
+"""Bounded conversation history with a rolling summary of older turns."""
+
+import threading
+
+from .config import HISTORY_KEEP_TURNS, HISTORY_TOKEN_BUDGET, HISTORY_SUMMARY_TOKENS
+from .context_builder import CHARS_PER_TOKEN, estimate_tokens, shorten
+
+
+class ConversationMemory:
+    """
+    Keeps the most recent turns verbatim and folds older turns into a
+    running summary.
+
+    Once there are more than keep_turns recent turns, or they exceed the
+    token budget, turns are evicted until half of each limit is left, so a
+    fold covers several turns and the summary is rewritten only every few
+    turns. Folding updates the existing summary with only the evicted
+    turns, in a background thread, so answers never wait for it. Until it
+    finishes, the evicted turns are sent as a shortened transcript.
+    """
+
+    SUMMARY_PROMPT = """Update the running summary of a conversation between a user and a data analytics assistant.
+
+Current summary:
+{summary}
+
+New exchanges to fold in:
+{exchanges}
+
+Write the updated summary in at most {max_words} words. Keep questions asked, numbers and findings reported, and any preferences the user stated. Return only the summary text."""
+
+    def __init__(self, client=None, keep_turns: int = None, max_tokens: int = None,
+                 summary_tokens: int = None):
+        """
+        Initialize the memory.
+
+        Args:
+            client: Optional LLM client used to write summaries. Without one,
+                older turns are folded into a shortened transcript instead.
+            keep_turns: Recent turns kept verbatim. Defaults to HISTORY_KEEP_TURNS.
+            max_tokens: Token budget for the verbatim turns. Defaults to HISTORY_TOKEN_BUDGET.
+            summary_tokens: Token budget for the summary. Defaults to HISTORY_SUMMARY_TOKENS.
+        """
+        self.client = client
+        self.keep_turns = keep_turns or HISTORY_KEEP_TURNS
+        self.max_tokens = max_tokens or HISTORY_TOKEN_BUDGET
+        self.summary_tokens = summary_tokens or HISTORY_SUMMARY_TOKENS
+        self.summary = ""
+        self.turns = []
+        # Evicted turns not yet in the summary
+        self._pending = []
+        self._folding = False
+        # Bumped by clear() so a fold finishing afterwards is discarded
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def add_turn(self, question: str, answer: str):
+        """
+        Record a completed turn, folding older turns into the summary if the
+        verbatim window is over its limits.
+
+        Args:
+            question: The user's question.
+            answer: The assistant's answer.
+        """
+        with self._lock:
+            self.turns.append((question, answer))
+            if len(self.turns) <= self.keep_turns and self._turn_tokens() <= self.max_tokens:
+                return
+
+            keep_turns = max(1, self.keep_turns // 2)
+            while len(self.turns) > 1 and (
+                len(self.turns) > keep_turns or self._turn_tokens() > self.max_tokens // 2
+            ):
+                self._pending.append(self.turns.pop(0))
+
+            if self.client is None:
+                # Condensing without a model is cheap, so it happens now
+                self.summary = self._condense(self.summary, self._pending)
+                self._pending = []
+            elif not self._folding:
+                self._folding = True
+                threading.Thread(
+                    target=self._fold_pending, args=(self._generation,), daemon=True
+                ).start()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait for a background fold to finish.
+
+        Args:
+            timeout: Seconds to wait at most. Waits indefinitely by default.
+
+        Returns:
+            True if no fold is running.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._folding, timeout)
+
+    def messages(self) -> list:
+        """
+        Get the history to send with the next request.
+
+        Returns:
+            A list of role/content messages: the summary, if any, followed by
+            the recent turns.
+        """
+        with self._lock:
+            summary = self._condense(self.summary, self._pending) if self._pending else self.summary
+            turns = list(self.turns)
+
+        messages = []
+        if summary:
+            messages.append({
+                "role": "user",
+                "content": f"Summary of our conversation so far:\n{summary}",
+            })
+            messages.append({"role": "assistant", "content": "Understood."})
+        for question, answer in turns:
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+        return messages
+
+    def clear(self):
+        """Forget the summary and all turns."""
+        with self._lock:
+            self.summary = ""
+            self.turns = []
+            self._pending = []
+            self._folding = False
+            self._generation += 1
+            self._idle.notify_all()
+
+    def _turn_tokens(self) -> int:
+        return sum(estimate_tokens(q) + estimate_tokens(a) for q, a in self.turns)
+
+    def _fold_pending(self, generation: int):
+        """Background thread: merge evicted turns into the summary until none are left."""
+        while True:
+            with self._lock:
+                if generation != self._generation:
+                    return
+                if not self._pending:
+                    self._folding = False
+                    self._idle.notify_all()
+                    return
+                summary, turns = self.summary, list(self._pending)
+
+            summary = self._summarize(summary, turns)
+
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self.summary = summary
+                del self._pending[:len(turns)]
+
+    def _summarize(self, summary: str, turns: list) -> str:
+        """Ask the model to merge turns into a summary, condensing them if it fails."""
+        exchanges = "\n".join(f"User: {q}\nAssistant: {a}" for q, a in turns)
+        prompt = self.SUMMARY_PROMPT.format(
+            summary=summary or "(none yet)",
+            exchanges=exchanges,
+            max_words=int(self.summary_tokens * 0.75),
+        )
+        try:
+            return self.client.chat(
+                prompt, temperature=0.2, max_tokens=self.summary_tokens
+            ).strip()
+        except Exception as e:
+            print(f"History summary error: {e}")
+            return self._condense(summary, turns)
+
+    def _condense(self, summary: str, turns: list) -> str:
+        """
+        Append a shortened transcript of turns to a summary, dropping its
+        oldest part once it outgrows the summary budget.
+        """
+        condensed = "\n".join(
+            f"- Q: {shorten(q, 120)} A: {shorten(a, 200)}" for q, a in turns
+        )
+        summary = f"{summary}\n{condensed}".strip()
+        max_chars = self.summary_tokens * CHARS_PER_TOKEN
+        if len(summary) > max_chars:
+            summary = "…" + summary[-(max_chars - 1):]
+        return summary
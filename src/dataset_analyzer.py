@@ -1,20 +1,88 @@
 """Dataset analyzer for generating summaries and statistics."""
 
+import threading
+
 import pandas as pd
 
+from .column_profile import profile_column
+from .config import CONTEXT_TOKEN_BUDGET, CSV_CHUNK_SIZE, STATS_MODE, APPROX_STATS_MIN_ROWS
+from .context_builder import build_dataset_context
+from .dataset_handler import DatasetError
+from .dtype_optimizer import align_chunk, memory_bytes
+from .preview import ViewCache
+from .sketches import DatasetSketch, ExactDatasetStats
+
+
+def _count_empty(df: pd.DataFrame) -> tuple:
+    """Count nulls and empty strings per column of a frame."""
+    null_counts = df.isnull().sum()
+
+    # Compare all string columns against "" in one frame-level operation
+    text_df = df.select_dtypes(include=["object", "string", "category"])
+    empty_counts = (text_df == "").sum().reindex(df.columns, fill_value=0)
+    return null_counts, empty_counts
+
+
+def _format_empty_stats(null_counts: pd.Series, empty_counts: pd.Series, row_count: int) -> dict:
+    """Turn per-column null and empty string counts into summary entries."""
+    total_empty = null_counts + empty_counts
+    if row_count > 0:
+        percentages = (total_empty / row_count * 100).round(2)
+    else:
+        percentages = pd.Series(0, index=null_counts.index)
+
+    return {
+        col: {
+            "null_count": int(null_count),
+            "empty_string_count": int(empty_count),
+            "total_empty": int(total),
+            "percentage": float(percentage) if row_count > 0 else 0,
+        }
+        for col, null_count, empty_count, total, percentage in zip(
+            null_counts.index,
+            null_counts.to_numpy(),
+            empty_counts.to_numpy(),
+            total_empty.to_numpy(),
+            percentages.to_numpy(),
+        )
+    }
+
+
+def _is_numeric(values: pd.Series) -> bool:
+    """Whether a column gets numeric statistics, as in describe()."""
+    return pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
 
 class DatasetAnalyzer:
     """Analyzes a pandas DataFrame and generates summaries."""
 
-    def __init__(self, dataframe: pd.DataFrame):
+    def __init__(self, dataframe: pd.DataFrame, summary: dict = None, stats_mode: str = None):
         """
         Initialize the analyzer with a DataFrame.
 
         Args:
             dataframe: The pandas DataFrame to analyze.
+            summary: Optional precomputed summary, e.g. from the dataset cache.
+            stats_mode: 'exact', 'approximate' or 'auto'. Defaults to STATS_MODE.
         """
         self.df = dataframe
-        self._summary_cache = None
+        self.stats_mode = stats_mode or STATS_MODE
+        # Set by load_dataset() when it optimized the column types, and kept
+        # in the summary for frames restored from the dataset cache
+        self.memory_report = dataframe.attrs.get("memory_report")
+        if self.memory_report is None and summary is not None:
+            self.memory_report = summary.get("memory", {}).get("optimization")
+        self._summary_cache = summary
+        self._context_cache = {}
+        self._sketch = None
+        self._exact_stats = None
+        # Guards the frame and the caches derived from it, so background
+        # jobs never store results for a frame that append() has replaced
+        self._lock = threading.RLock()
+        # Sorted and filtered row positions for the preview table
+        self.view_cache = ViewCache()
+        # Column profiles, computed on first request
+        self._profile_cache = {}
 
     @property
     def row_count(self) -> int:
@@ -38,23 +106,8 @@ class DatasetAnalyzer:
         Returns:
             Dictionary with column names as keys and empty count info as values.
         """
-        empty_stats = {}
-        for col in self.df.columns:
-            null_count = self.df[col].isnull().sum()
-            empty_count = 0
-            
-            # Check for empty strings in string columns
-            if self.df[col].dtype == "object":
-                empty_count = (self.df[col] == "").sum()
-            
-            total_empty = null_count + empty_count
-            empty_stats[col] = {
-                "null_count": int(null_count),
-                "empty_string_count": int(empty_count),
-                "total_empty": int(total_empty),
-                "percentage": round(total_empty / self.row_count * 100, 2) if self.row_count > 0 else 0,
-            }
-        return empty_stats
+        null_counts, empty_counts = _count_empty(self.df)
+        return _format_empty_stats(null_counts, empty_counts, self.row_count)
 
     def get_column_types(self) -> dict:
         """
@@ -65,13 +118,67 @@ class DatasetAnalyzer:
         """
         return {col: str(dtype) for col, dtype in self.df.dtypes.items()}
 
+    @property
+    def uses_approximate_stats(self) -> bool:
+        """Whether statistics come from sketches rather than exact computation."""
+        if self.stats_mode == "auto":
+            return self.row_count >= APPROX_STATS_MIN_ROWS
+        return self.stats_mode == "approximate"
+
+    def get_sketch(self) -> DatasetSketch:
+        """
+        Get mergeable sketches of the dataset, built chunk by chunk on first use.
+
+        Returns:
+            A DatasetSketch covering every row.
+        """
+        if self._sketch is None:
+            self._sketch = DatasetSketch.from_dataframe(self.df, CSV_CHUNK_SIZE)
+        return self._sketch
+
+    @property
+    def stats_bytes(self) -> int:
+        """Memory held by the exact statistics kept for appends."""
+        stats = self._exact_stats
+        return stats.nbytes if stats is not None else 0
+
+    def get_distinct_counts(self) -> dict:
+        """
+        Get the number of distinct non-missing values in each column.
+
+        Returns:
+            Dictionary mapping column names to counts, estimated with
+            HyperLogLog in approximate mode.
+        """
+        if self.uses_approximate_stats:
+            return self.get_sketch().distinct_counts()
+        if self._exact_stats is not None:
+            return self._exact_stats.distinct_counts()
+
+        counts = {}
+        for col in self.df.columns:
+            try:
+                counts[col] = int(self.df[col].nunique())
+            except TypeError:
+                # Unhashable cells such as lists from nested JSON
+                counts[col] = int(self.df[col].astype(str).nunique())
+        return counts
+
     def get_basic_stats(self) -> dict:
         """
         Get basic statistics for numerical columns.
 
+        In approximate mode the quartiles come from KLL sketches and the
+        other statistics are exact; see src/sketches.py for error bounds.
+
         Returns:
             Dictionary with statistics for each numerical column.
         """
+        if self.uses_approximate_stats:
+            return self.get_sketch().basic_stats()
+        if self._exact_stats is not None:
+            return self._exact_stats.basic_stats()
+
         numeric_df = self.df.select_dtypes(include=["number"])
         if numeric_df.empty:
             return {}
@@ -82,6 +189,16 @@ class DatasetAnalyzer:
             stats[col] = {k: float(v) if pd.notna(v) else None for k, v in stats[col].items()}
         return stats
 
+    def get_memory_usage(self) -> dict:
+        """
+        Get the memory held by the dataset.
+
+        Returns:
+            Dictionary with the current deep memory usage in bytes and the
+            load-time dtype optimization report, or None if there was none.
+        """
+        return {"bytes": memory_bytes(self.df), "optimization": self.memory_report}
+
     def get_summary(self) -> dict:
         """
         Get a complete summary of the dataset.
@@ -89,17 +206,142 @@ class DatasetAnalyzer:
         Returns:
             Dictionary containing all summary information.
         """
-        if self._summary_cache is None:
+        with self._lock:
+            if self._summary_cache is None:
+                self._summary_cache = {
+                    "row_count": self.row_count,
+                    "column_count": self.column_count,
+                    "columns": self.columns,
+                    "column_types": self.get_column_types(),
+                    "empty_data": self.get_empty_data_stats(),
+                    "basic_stats": self.get_basic_stats(),
+                    "distinct_counts": self.get_distinct_counts(),
+                    "stats_approximate": self.uses_approximate_stats,
+                    "memory": self.get_memory_usage(),
+                    "sample_data": self.df.head(5).to_dict(orient="records"),
+                }
+            return self._summary_cache
+
+    def append(self, chunk: pd.DataFrame) -> dict:
+        """
+        Append rows and update the summary from the new rows alone.
+
+        Row, null and empty string counts are added to the cached ones. The
+        chunk is also folded into the sketch in approximate mode, or into
+        ExactDatasetStats in exact mode, which auto mode uses below
+        APPROX_STATS_MIN_ROWS. Both merge count, mean and variance exactly
+        (Chan's parallel form of Welford's algorithm), so the cost grows
+        with the new rows rather than the dataset, apart from copying the
+        frame. Exact statistics and a sketch that was never built, e.g.
+        after a restore from the dataset cache, are built over all rows on
+        the first append.
+
+        The chunk's column types are aligned with the dataset's first, so
+        categories and dates survive the concatenation. Columns whose type
+        still changes, e.g. text arriving in a numeric column, have their
+        statistics rebuilt from scratch.
+
+        Args:
+            chunk: New rows with the same columns as the dataset.
+
+        Returns:
+            The updated summary.
+
+        Raises:
+            DatasetError: If the chunk's columns differ from the dataset's.
+        """
+        if set(chunk.columns) != set(self.df.columns) or chunk.columns.duplicated().any():
+            missing = [str(col) for col in self.df.columns if col not in chunk.columns]
+            extra = [str(col) for col in chunk.columns if col not in self.df.columns]
+            raise DatasetError(
+                "Appended rows must have the same columns as the dataset "
+                f"(missing: {missing or 'none'}, unexpected: {extra or 'none'})"
+            )
+
+        with self._lock:
+            summary = self.get_summary()
+            before, chunk = align_chunk(self.df, chunk[self.columns])
+            df = pd.concat([before, chunk], ignore_index=True)
+            retyped = any(_is_numeric(self.df[col]) != _is_numeric(df[col]) for col in df.columns)
+
+            null_counts, empty_counts = _count_empty(chunk)
+            for i, col in enumerate(df.columns):
+                previous = summary["empty_data"][col]
+                null_counts.iloc[i] += previous["null_count"]
+                empty_counts.iloc[i] += previous["empty_string_count"]
+
+            if retyped:
+                self._sketch = self._exact_stats = None
+            for stats in (self._sketch, self._exact_stats):
+                if stats is not None:
+                    stats.update(chunk)
+
+            self.df = df
+            approximate = self.uses_approximate_stats
+            if approximate:
+                # Auto mode crossed APPROX_STATS_MIN_ROWS
+                self._exact_stats = None
+            elif self._exact_stats is None:
+                self._exact_stats = ExactDatasetStats.from_dataframe(df)
             self._summary_cache = {
                 "row_count": self.row_count,
                 "column_count": self.column_count,
                 "columns": self.columns,
                 "column_types": self.get_column_types(),
-                "empty_data": self.get_empty_data_stats(),
+                "empty_data": _format_empty_stats(null_counts, empty_counts, self.row_count),
                 "basic_stats": self.get_basic_stats(),
-                "sample_data": self.df.head(5).to_dict(orient="records"),
+                "distinct_counts": self.get_distinct_counts(),
+                "stats_approximate": approximate,
+                "memory": self.get_memory_usage(),
+                "sample_data": df.head(5).to_dict(orient="records"),
             }
-        return self._summary_cache
+            self._context_cache = {}
+            self.view_cache.clear()
+            self._profile_cache = {}
+            return self._summary_cache
+
+    def get_column_profile(self, column) -> dict:
+        """
+        Get a detailed profile of one column, computed on first request.
+
+        Profiles are too costly to build for every column at upload time;
+        see profile_column() for their contents.
+
+        Args:
+            column: The column name.
+
+        Returns:
+            The column's profile.
+
+        Raises:
+            DatasetError: If the dataset has no such column.
+        """
+        with self._lock:
+            profile = self._profile_cache.get(column)
+            if profile is not None:
+                return profile
+            df = self.df
+
+        if column not in df.columns:
+            raise DatasetError(f"Unknown column: {column}")
+        # Built outside the lock so appends are not held up
+        profile = profile_column(df[column])
+        with self._lock:
+            # Rows appended meanwhile made this profile stale
+            if df is self.df:
+                self._profile_cache[column] = profile
+        return profile
+
+    def prefetch_profiles(self, columns: list):
+        """
+        Build the profiles of several columns ahead of their first request.
+
+        Args:
+            columns: Column names. Unknown names are skipped.
+        """
+        for column in columns:
+            if column in self.columns:
+                self.get_column_profile(column)
 
     def get_summary_text(self) -> str:
         """
@@ -152,3 +394,24 @@ class DatasetAnalyzer:
                         lines.append(f"  {stat}: {value:.2f}")
         
         return "\n".join(lines)
+
+    def get_context_text(self, max_tokens: int = None) -> str:
+        """
+        Get a compact dataset description that fits a token budget.
+
+        Unlike get_summary_text, wide datasets are pruned to their most useful
+        columns and long values are shortened. Results are memoized per budget.
+
+        Args:
+            max_tokens: The token budget. Defaults to CONTEXT_TOKEN_BUDGET.
+
+        Returns:
+            A formatted string describing the dataset.
+        """
+        max_tokens = max_tokens or CONTEXT_TOKEN_BUDGET
+        with self._lock:
+            if max_tokens not in self._context_cache:
+                self._context_cache[max_tokens] = build_dataset_context(
+                    self.get_summary(), max_tokens
+                )
+            return self._context_cache[max_tokens]
@@ -0,0 +1,326 @@
+"""Content-addressed cache for parsed datasets and their summaries."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from .config import DATASET_CACHE_DIR, DATASET_CACHE_MAX_BYTES, DATASET_STORAGE_MODE
+from .dataset_analyzer import DatasetAnalyzer
+from .dataset_handler import load_dataset
+
+# Bump when the summary layout changes so stale entries are not reused
+SUMMARY_VERSION = 3
+
+
+def content_hasher(extension: str):
+    """
+    Start the cache key for a dataset file with the given extension.
+
+    The key covers the file extension as well as the bytes, since the same
+    bytes parse differently as CSV and JSON. Feed the file's bytes to the
+    returned hasher's update() and take its hexdigest().
+
+    Args:
+        extension: The file extension, e.g. '.csv'.
+
+    Returns:
+        A hashlib object.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"v{SUMMARY_VERSION}{extension.lower()}".encode())
+    return hasher
+
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Compute the cache key for a dataset file.
+
+    Args:
+        file_path: Path to the file.
+        block_size: Number of bytes hashed per read.
+
+    Returns:
+        A hex digest identifying the file contents.
+    """
+    hasher = content_hasher(Path(file_path).suffix)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def append_key(dataset_key: str, chunk_key: str) -> str:
+    """
+    Compute the cache key for a dataset after rows were appended to it.
+
+    Args:
+        dataset_key: Key of the dataset before the append.
+        chunk_key: Content hash of the appended file, from hash_file.
+
+    Returns:
+        A hex digest identifying the combined dataset.
+    """
+    return hashlib.sha256(f"{dataset_key}+{chunk_key}".encode()).hexdigest()
+
+
+def read_mapped(path, columns: list = None) -> pd.DataFrame:
+    """
+    Open an uncompressed Feather file as a DataFrame over a read-only memory map.
+
+    Columns without missing values (numbers, text, category codes) are
+    zero-copy views of the mapped pages, which the operating system shares
+    between every process that maps the file. Other columns are converted
+    into private memory. The mapping stays valid if the file is later
+    replaced or evicted.
+
+    Args:
+        path: Path to the Feather file.
+        columns: Optional subset of columns to open.
+
+    Returns:
+        The DataFrame.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    # One block per column, since consolidating blocks would copy them
+    return table.to_pandas(split_blocks=True)
+
+
+class DatasetCache:
+    """Stores parsed DataFrames as Feather files alongside their summaries."""
+
+    # Extension of the data file kept for each entry
+    FRAME_SUFFIX = ".feather"
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, storage_mode: str = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for cache entries. Defaults to DATASET_CACHE_DIR.
+            max_bytes: Disk budget in bytes. Defaults to DATASET_CACHE_MAX_BYTES.
+                A budget of 0 disables the cache.
+            storage_mode: 'memory' or 'mmap'. Defaults to DATASET_STORAGE_MODE.
+        """
+        self.cache_dir = Path(cache_dir or DATASET_CACHE_DIR)
+        self.max_bytes = DATASET_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.storage_mode = storage_mode or DATASET_STORAGE_MODE
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self.max_bytes > 0
+
+    @property
+    def mapped(self) -> bool:
+        """Whether cached frames are memory-mapped and shared between processes."""
+        return self.enabled and self.storage_mode == "mmap"
+
+    def mapped_path(self, key: str):
+        """
+        Get the file a dataset is memory-mapped from.
+
+        Args:
+            key: The dataset's cache key.
+
+        Returns:
+            The path, or None if the cache is not mapped or has no such entry.
+        """
+        path = self._frame_path(key)
+        return path if self.mapped and path.exists() else None
+
+    def _frame_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.FRAME_SUFFIX}"
+
+    def _summary_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str):
+        """
+        Look up a cached dataset.
+
+        Args:
+            key: The content hash from hash_file.
+
+        Returns:
+            A tuple of (DataFrame, summary), or None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        frame_path = self._frame_path(key)
+        summary_path = self._summary_path(key)
+        try:
+            df = read_mapped(frame_path) if self.mapped else pd.read_feather(frame_path)
+            with open(summary_path, encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Touch both files so eviction sees them as recently used
+        for path in (frame_path, summary_path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return df, summary
+
+    def put(self, key: str, df: pd.DataFrame, summary: dict):
+        """
+        Store a dataset and its summary, then evict to stay within budget.
+
+        Frames that Feather cannot represent (non-string column names,
+        mixed-type object columns) are skipped rather than failing the upload.
+        In mapped mode the file is written uncompressed so it can be mapped.
+
+        Args:
+            key: The content hash from hash_file.
+            df: The parsed DataFrame.
+            summary: The result of DatasetAnalyzer.get_summary().
+        """
+        if not self.enabled:
+            return
+
+        try:
+            self._write_atomic(self._frame_path(key), lambda path: self._write_frame(path, df))
+            self._write_atomic(
+                self._summary_path(key),
+                lambda path: self._write_summary(path, summary),
+            )
+        except Exception as e:
+            print(f"Dataset cache write error: {e}")
+            self._remove(key)
+            return
+
+        self._evict()
+
+    def _write_atomic(self, path: Path, write):
+        """Write to a temp file and rename it so readers never see partial files."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _write_frame(self, path: str, df: pd.DataFrame):
+        df = df.reset_index(drop=True)
+        if not self.mapped:
+            df.to_feather(path)
+            return
+        # A column split across record batches is copied when it is opened,
+        # so mapped files hold a single batch
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        try:
+            table = table.combine_chunks()
+        except pa.ArrowInvalid:
+            # Text columns over 2 GB cannot be one chunk; they stay private
+            pass
+        feather.write_feather(table, path, compression="uncompressed", chunksize=max(table.num_rows, 1))
+
+    @staticmethod
+    def _write_summary(path: str, summary: dict):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, default=str)
+
+    def _remove(self, key: str):
+        for path in (self._frame_path(key), self._summary_path(key)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _evict(self, keep: str = None):
+        """
+        Delete least recently used entries until the cache fits its budget.
+
+        Args:
+            keep: Optional key of an entry that is never deleted, e.g. one
+                still being opened.
+        """
+        entries = []
+        total = 0
+        for frame_path in self.cache_dir.glob(f"*{self.FRAME_SUFFIX}"):
+            key = frame_path.stem
+            try:
+                size = frame_path.stat().st_size
+                summary_stat = self._summary_path(key).stat()
+            except OSError:
+                continue
+            size += summary_stat.st_size
+            entries.append((summary_stat.st_mtime, key, size))
+            total += size
+
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._remove(key)
+            total -= size
+
+
+def open_dataset(file_path: str, cache: DatasetCache = None) -> tuple:
+    """
+    Load and analyze a dataset, reusing a cached parse and summary if present.
+
+    Args:
+        file_path: Path to the dataset file.
+        cache: Optional DatasetCache to consult and fill.
+
+    Returns:
+        A tuple of (content hash, DatasetAnalyzer).
+
+    Raises:
+        DatasetError: If the file cannot be loaded.
+    """
+    key = hash_file(file_path)
+    return key, analyze_dataset(key, lambda: load_dataset(file_path), cache)
+
+
+def analyze_dataset(key: str, load, cache: DatasetCache = None) -> DatasetAnalyzer:
+    """
+    Analyze a dataset by its content hash, loading it only on a cache miss.
+
+    When the cache is memory-mapped, the returned analyzer reads the mapped
+    file even on a miss, so every process shares one copy of the data.
+
+    Args:
+        key: The dataset's content hash.
+        load: Function returning the parsed DataFrame.
+        cache: Optional DatasetCache to consult and fill.
+
+    Returns:
+        A DatasetAnalyzer.
+
+    Raises:
+        DatasetError: If the dataset cannot be loaded.
+    """
+    if cache is None or not cache.enabled:
+        return DatasetAnalyzer(load())
+
+    cached = cache.get(key)
+    if cached is not None:
+        df, summary = cached
+        return DatasetAnalyzer(df, summary=summary)
+
+    analyzer = DatasetAnalyzer(load())
+    cache.put(key, analyzer.df, analyzer.get_summary())
+    if cache.mapped:
+        # Swap the freshly parsed private copy for the shared mapping
+        cached = cache.get(key)
+        if cached is not None:
+            df, summary = cached
+            analyzer = DatasetAnalyzer(df, summary=summary)
+    return analyzer
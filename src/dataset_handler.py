@@ -1,11 +1,38 @@
 """Dataset handler for loading and validating datasets."""
 
+import codecs
 import os
 from pathlib import Path
 
 import pandas as pd
 
-from .config import SUPPORTED_EXTENSIONS
+from .config import (
+    SUPPORTED_EXTENSIONS, CSV_CHUNK_SIZE, ENCODING_SNIFF_BYTES, DTYPE_OPTIMIZATION_ENABLED,
+)
+from .dtype_optimizer import optimize_dtypes
+from .sketches import DatasetSketch
+
+
+# Byte-order marks, checked longest first so UTF-32 LE is not taken for UTF-16 LE
+_BOM_ENCODINGS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Encodings tried against the leading bytes when there is no BOM
+_CANDIDATE_ENCODINGS = ["utf-8", "cp1252"]
+
+# Decoding error handler for streams, which cannot be re-read as latin-1
+# when a byte past the sniffed sample fails to decode: each such byte is
+# decoded as latin-1 on its own
+STREAM_DECODE_ERRORS = "latin1_fallback"
+codecs.register_error(
+    STREAM_DECODE_ERRORS,
+    lambda error: (error.object[error.start:error.end].decode("latin-1"), error.end),
+)
 
 
 class DatasetError(Exception):
@@ -13,7 +40,161 @@ class DatasetError(Exception):
     pass
 
 
-def load_dataset(file_path: str) -> pd.DataFrame:
+def detect_encoding(sample: bytes) -> str:
+    """
+    Detect the text encoding of a file from its leading bytes.
+
+    Args:
+        sample: The first bytes of the file.
+
+    Returns:
+        The name of an encoding that decodes the sample cleanly.
+    """
+    for bom, encoding in _BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+
+    for encoding in _CANDIDATE_ENCODINGS:
+        try:
+            # Incremental decoding tolerates a multi-byte character cut off
+            # at the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    # latin-1 maps every byte, so it always decodes
+    return "latin-1"
+
+
+def sniff_encoding(file_path: str, sample_size: int = ENCODING_SNIFF_BYTES) -> str:
+    """
+    Detect the text encoding of a file without reading all of it.
+
+    Args:
+        file_path: Path to the file.
+        sample_size: Number of leading bytes to inspect.
+
+    Returns:
+        The detected encoding name.
+    """
+    with open(file_path, "rb") as f:
+        return detect_encoding(f.read(sample_size))
+
+
+def _read_csv_chunks(source, encoding: str, chunksize: int, encoding_errors: str = "strict") -> tuple:
+    """Parse a CSV in chunks, collecting counters as each chunk arrives."""
+    chunks = []
+    null_counts = None
+    row_count = 0
+
+    with pd.read_csv(source, encoding=encoding, encoding_errors=encoding_errors,
+                     chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunks.append(chunk)
+            row_count += len(chunk)
+            counts = chunk.isnull().sum()
+            null_counts = counts if null_counts is None else null_counts + counts
+
+    df = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+    stats = {
+        "encoding": encoding,
+        "row_count": row_count,
+        "chunk_count": len(chunks),
+        "null_counts": {col: int(n) for col, n in null_counts.items()},
+    }
+    return df, stats
+
+
+def read_csv_chunked(
+    file_path: str,
+    encoding: str = None,
+    chunksize: int = CSV_CHUNK_SIZE,
+) -> tuple:
+    """
+    Read a CSV file in a single chunked pass.
+
+    The encoding is detected from the leading bytes instead of re-reading
+    the whole file once per candidate encoding.
+
+    Args:
+        file_path: Path to the CSV file.
+        encoding: Optional encoding override. Detected when not given.
+        chunksize: Number of rows parsed per chunk.
+
+    Returns:
+        A tuple of (DataFrame, stats) where stats holds the encoding used,
+        row and chunk counts, and per-column null counts.
+    """
+    if encoding is None:
+        encoding = sniff_encoding(file_path)
+
+    try:
+        return _read_csv_chunks(file_path, encoding, chunksize)
+    except UnicodeDecodeError:
+        # The sample decoded cleanly but a later byte did not; latin-1
+        # accepts every byte so this second pass cannot fail on decoding
+        return _read_csv_chunks(file_path, "latin-1", chunksize)
+
+
+def read_csv_stream(
+    stream,
+    encoding: str = None,
+    chunksize: int = CSV_CHUNK_SIZE,
+) -> tuple:
+    """
+    Read a CSV file from a binary stream in a single chunked pass.
+
+    Rows are parsed as the bytes arrive, e.g. from a request body, without
+    writing them to disk first. The stream cannot be re-read, so bytes that
+    fail to decode past the sniffed sample are decoded as latin-1 one by
+    one instead of retrying the whole file as latin-1.
+
+    Args:
+        stream: A buffered binary stream, such as io.BufferedReader. When no
+            encoding is given, it is detected from the bytes of peek().
+        encoding: Optional encoding override.
+        chunksize: Number of rows parsed per chunk.
+
+    Returns:
+        A tuple of (DataFrame, stats), as from read_csv_chunked.
+    """
+    if encoding is None:
+        encoding = detect_encoding(stream.peek(ENCODING_SNIFF_BYTES)[:ENCODING_SNIFF_BYTES])
+    return _read_csv_chunks(stream, encoding, chunksize, encoding_errors=STREAM_DECODE_ERRORS)
+
+
+def sketch_csv(
+    file_path: str,
+    encoding: str = None,
+    chunksize: int = CSV_CHUNK_SIZE,
+) -> DatasetSketch:
+    """
+    Build approximate statistics for a CSV file without loading it.
+
+    Only one chunk is in memory at a time, so this works for files far
+    larger than RAM.
+
+    Args:
+        file_path: Path to the CSV file.
+        encoding: Optional encoding override. Detected when not given.
+        chunksize: Number of rows parsed per chunk.
+
+    Returns:
+        A DatasetSketch of the whole file.
+    """
+    if encoding is None:
+        encoding = sniff_encoding(file_path)
+
+    try:
+        with pd.read_csv(file_path, encoding=encoding, chunksize=chunksize) as reader:
+            return DatasetSketch.from_chunks(reader)
+    except UnicodeDecodeError:
+        with pd.read_csv(file_path, encoding="latin-1", chunksize=chunksize) as reader:
+            return DatasetSketch.from_chunks(reader)
+
+
+def load_dataset(file_path: str, optimize: bool = None) -> pd.DataFrame:
     """
     Load a dataset from a file path.
 
@@ -21,6 +202,9 @@ def load_dataset(file_path: str) -> pd.DataFrame:
 
     Args:
         file_path: Path to the dataset file.
+        optimize: Whether to convert columns to compact types with
+            optimize_dtypes(). Defaults to DTYPE_OPTIMIZATION_ENABLED. The
+            memory report is kept in the frame's attrs["memory_report"].
 
     Returns:
         A pandas DataFrame containing the dataset.
@@ -35,8 +219,29 @@ def load_dataset(file_path: str) -> pd.DataFrame:
     if not path.exists():
         raise DatasetError(f"File not found: {file_path}")
 
+    return read_dataset(file_path, path.suffix, optimize)
+
+
+def read_dataset(source, extension: str, optimize: bool = None) -> pd.DataFrame:
+    """
+    Parse a dataset from a file path or an open binary file.
+
+    Args:
+        source: Path to the dataset file, or a binary file object. CSV file
+            objects are parsed as a stream with read_csv_stream(); Excel and
+            JSON need a seekable file.
+        extension: The file extension, which selects the parser.
+        optimize: Whether to convert columns to compact types, as in
+            load_dataset().
+
+    Returns:
+        A pandas DataFrame containing the dataset.
+
+    Raises:
+        DatasetError: If the extension is unsupported or parsing fails.
+    """
     # Check file extension
-    extension = path.suffix.lower()
+    extension = extension.lower()
     if extension not in SUPPORTED_EXTENSIONS:
         supported = ", ".join(SUPPORTED_EXTENSIONS.keys())
         raise DatasetError(
@@ -48,24 +253,29 @@ def load_dataset(file_path: str) -> pd.DataFrame:
 
     try:
         if file_type == "csv":
-            # Try different encodings for CSV files
-            for encoding in ["utf-8", "latin-1", "cp1252"]:
-                try:
-                    return pd.read_csv(file_path, encoding=encoding)
-                except UnicodeDecodeError:
-                    continue
-            # If all encodings fail, try with error handling
-            return pd.read_csv(file_path, encoding="utf-8", errors="replace")
+            if isinstance(source, (str, os.PathLike)):
+                df, _ = read_csv_chunked(source)
+            else:
+                df, _ = read_csv_stream(source)
 
         elif file_type == "excel":
-            return pd.read_excel(file_path)
+            df = pd.read_excel(source)
 
         elif file_type == "json":
-            return pd.read_json(file_path)
+            df = pd.read_json(source)
 
+    except DatasetError:
+        raise
     except Exception as e:
         raise DatasetError(f"Failed to parse file: {str(e)}") from e
 
+    if optimize is None:
+        optimize = DTYPE_OPTIMIZATION_ENABLED
+    if optimize:
+        df, report = optimize_dtypes(df)
+        df.attrs["memory_report"] = report
+    return df
+
 
 def get_file_info(file_path: str) -> dict:
     """
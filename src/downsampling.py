@@ -0,0 +1,238 @@
+"""Point reduction and binning for line and scatter charts on large datasets."""
+
+import numpy as np
+import pandas as pd
+
+# Seed for sampling, so the same data always renders the same image
+SAMPLE_SEED = 0
+
+# Above this multiple of the point budget, uniform samples start to lose
+# sparse regions and outliers, so scatter sampling is stratified instead
+STRATIFY_RATIO = 10
+
+
+def to_numeric_axis(values: pd.Series) -> np.ndarray:
+    """
+    Map a column onto a numeric axis.
+
+    Numbers map to themselves and datetimes to integer timestamps. Anything
+    else maps to row positions.
+
+    Args:
+        values: The column.
+
+    Returns:
+        A float array of the same length.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype(np.int64).to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return np.arange(len(values), dtype=float)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept. The points between them are split
+    into threshold - 2 buckets. From each bucket, the point forming the
+    largest triangle with the previously selected point and the average of
+    the next bucket is kept. This preserves peaks and troughs, which a plain
+    stride or head() would miss.
+
+    Args:
+        x: X values, sorted ascending.
+        y: Y values.
+        threshold: Number of points to keep.
+
+    Returns:
+        Indices of the selected points, ascending.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        ax, ay = x[selected], y[selected]
+        area = np.abs(
+            (ax - avg_x) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y - ay)
+        )
+        selected = start + int(np.argmax(area))
+        indices[i + 1] = selected
+    return indices
+
+
+def _bin_codes(values: np.ndarray, bins: int, value_range: tuple = None) -> np.ndarray:
+    """Assign each value to one of `bins` equal-width bins over its range."""
+    low, high = value_range if value_range is not None else (values.min(), values.max())
+    if not np.isfinite(high - low) or high == low:
+        return np.zeros(len(values), dtype=np.int64)
+    codes = ((values - low) / (high - low) * bins).astype(np.int64)
+    return np.minimum(codes, bins - 1)
+
+
+def stratified_sample(x: np.ndarray, y: np.ndarray, size: int, seed: int = SAMPLE_SEED) -> np.ndarray:
+    """
+    Sample points evenly across a grid over the plot area.
+
+    Each occupied grid cell keeps a share of its points proportional to its
+    population, and at least one. Dense clusters are thinned while sparse
+    regions and outliers stay visible. The result may exceed size by up to
+    the number of grid cells, which is kept to half of size.
+
+    Args:
+        x: X values on a numeric axis.
+        y: Y values on a numeric axis.
+        size: Target number of points.
+        seed: Random seed.
+
+    Returns:
+        Indices of the sampled points, ascending.
+    """
+    n = len(x)
+    if size >= n:
+        return np.arange(n)
+
+    bins = max(1, int(np.sqrt(size / 2)))
+    cells = _bin_codes(x, bins) * bins + _bin_codes(y, bins)
+    if bins * bins <= np.iinfo(np.int16).max:
+        # numpy sorts 16-bit keys with a radix sort
+        cells = cells.astype(np.int16)
+
+    # Random order within each cell, then the first `quota` points per cell
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(n)
+    order = shuffled[np.argsort(cells[shuffled], kind="stable")]
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    quotas = np.maximum(1, (counts * size) // n)
+    ranks = np.arange(n) - np.repeat(starts, counts)
+    keep = ranks < np.repeat(quotas, counts)
+    return np.sort(order[keep])
+
+
+def uniform_sample(n: int, size: int, seed: int = SAMPLE_SEED) -> np.ndarray:
+    """
+    Pick size of n rows uniformly at random without replacement.
+
+    This is the sample a reservoir would hold after streaming all n rows,
+    drawn in one step because the rows are already in memory.
+
+    Returns:
+        Indices of the sampled rows, ascending.
+    """
+    if size >= n:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n, size=size, replace=False))
+
+
+def reduce_line(data: pd.DataFrame, x_col, y_col, max_points: int) -> pd.DataFrame:
+    """
+    Reduce line chart data to at most max_points with LTTB.
+
+    Numeric and datetime x columns are sorted first so the line runs left
+    to right. Other x columns keep row order.
+
+    Args:
+        data: Rows with x_col and y_col, without missing values.
+        x_col: The x column.
+        y_col: The y column, which must be numeric.
+        max_points: Point budget.
+
+    Returns:
+        The rows to plot.
+    """
+    x = data[x_col]
+    if pd.api.types.is_numeric_dtype(x) or pd.api.types.is_datetime64_any_dtype(x):
+        data = data.sort_values(x_col, kind="stable")
+    if len(data) <= max_points or not pd.api.types.is_numeric_dtype(data[y_col]):
+        return data.head(max_points)
+    indices = lttb(
+        to_numeric_axis(data[x_col]), data[y_col].to_numpy(dtype=float), max_points
+    )
+    return data.iloc[indices]
+
+
+def reduce_scatter(data: pd.DataFrame, x_col, y_col, max_points: int) -> pd.DataFrame:
+    """
+    Reduce scatter chart data to about max_points.
+
+    Up to STRATIFY_RATIO times the budget, a uniform random sample
+    represents the data well. Beyond that, sampling is stratified over a
+    grid so sparse regions survive.
+
+    Args:
+        data: Rows with x_col and y_col, without missing values.
+        x_col: The x column.
+        y_col: The y column.
+        max_points: Point budget.
+
+    Returns:
+        The rows to plot, in their original order.
+    """
+    n = len(data)
+    if n <= max_points:
+        return data
+    if n <= max_points * STRATIFY_RATIO:
+        return data.iloc[uniform_sample(n, max_points)]
+    indices = stratified_sample(
+        to_numeric_axis(data[x_col]), to_numeric_axis(data[y_col]), max_points
+    )
+    return data.iloc[indices]
+
+
+def density_grid(x: np.ndarray, y: np.ndarray, bins: int,
+                 x_range: tuple = None, y_range: tuple = None) -> tuple:
+    """
+    Count points in a bins x bins grid over their range.
+
+    Non-finite values are ignored. Counting is one vectorized pass with
+    bincount, and everything drawn afterwards depends only on the grid size.
+    Grids over the same fixed ranges can be summed, so chunks of a dataset
+    can be counted separately.
+
+    Args:
+        x: X values.
+        y: Y values.
+        bins: Cells along each axis.
+        x_range: Optional (min, max) of the grid along x, covering every
+            value. Defaults to the range of x.
+        y_range: Optional (min, max) of the grid along y.
+
+    Returns:
+        A tuple of (counts, x_edges, y_edges) laid out like
+        numpy.histogram2d, with counts indexed [x_bin, y_bin].
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if len(x) == 0 and (x_range is None or y_range is None):
+        return np.zeros((bins, bins)), np.linspace(0, 1, bins + 1), np.linspace(0, 1, bins + 1)
+
+    cells = _bin_codes(x, bins, x_range) * bins + _bin_codes(y, bins, y_range)
+    counts = np.bincount(cells, minlength=bins * bins).reshape(bins, bins)
+    return counts, _bin_edges(x, bins, x_range), _bin_edges(y, bins, y_range)
+
+
+def _bin_edges(values: np.ndarray, bins: int, value_range: tuple = None) -> np.ndarray:
+    """Edges matching _bin_codes, widened around a single repeated value."""
+    low, high = value_range if value_range is not None else (values.min(), values.max())
+    if high == low:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
@@ -0,0 +1,180 @@
+"""Load-time dtype optimization to cut the memory held by each dataset."""
+
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .config import CATEGORY_MAX_UNIQUE_RATIO
+
+# Text that looks like a date, optionally with a time and UTC offset:
+# 2020-03-15, 2020/03/15, 15.03.2020, 2020-03-15T08:30:00Z
+_DATE_PATTERN = re.compile(
+    r"^\s*(?:\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})"
+    r"(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?\s*(?:Z|[+-]\d{2}:?\d{2})?\s*$"
+)
+
+# Values checked against the date pattern before parsing a whole column
+DATE_SAMPLE_SIZE = 200
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """Get the deep memory usage of a frame in bytes."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _is_text(values: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+
+
+def _downcast_integers(values: pd.Series):
+    """Get the smallest integer type that holds every value, or None."""
+    if not (pd.api.types.is_integer_dtype(values) and isinstance(values.dtype, np.dtype)):
+        return None
+    downcast = pd.to_numeric(values, downcast="integer")
+    return downcast if downcast.dtype != values.dtype else None
+
+
+def _parse_dates(values: pd.Series):
+    """Parse a text column whose every value is a date, or return None."""
+    present = values.dropna()
+    if present.empty:
+        return None
+    sample = present.iloc[:DATE_SAMPLE_SIZE].astype(str)
+    if not sample.map(lambda text: bool(_DATE_PATTERN.match(text))).all():
+        return None
+
+    try:
+        with warnings.catch_warnings():
+            # Inconsistent formats become NaT below and the column is skipped
+            warnings.simplefilter("ignore", UserWarning)
+            parsed = pd.to_datetime(values, errors="coerce")
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if parsed.isna().sum() != values.isna().sum():
+        return None
+    return parsed
+
+
+def _categorize(values: pd.Series, max_ratio: float):
+    """Store repeated text as a category when that is smaller, or return None."""
+    present = values.notna().sum()
+    if not present:
+        return None
+    try:
+        unique = values.nunique()
+    except TypeError:
+        # Unhashable cells such as lists from nested JSON
+        return None
+    if unique > present * max_ratio:
+        return None
+    categorical = values.astype("category")
+    if categorical.memory_usage(deep=True) >= values.memory_usage(deep=True):
+        return None
+    return categorical
+
+
+def optimize_dtypes(df: pd.DataFrame, max_category_ratio: float = None) -> tuple:
+    """
+    Convert columns to more compact types without changing their values.
+
+    - Integers are downcast to the smallest integer type that fits. Floats
+      are left alone: pandas aggregates float32 in float32, so means and
+      standard deviations would lose digits.
+    - Text columns whose values all look like dates are parsed as datetimes.
+    - Other text columns with few distinct values become categories.
+
+    Args:
+        df: The DataFrame to optimize.
+        max_category_ratio: Largest share of distinct values for a text
+            column to become a category. Defaults to CATEGORY_MAX_UNIQUE_RATIO.
+
+    Returns:
+        A tuple of (optimized DataFrame, report). The report holds the deep
+        memory usage before and after in bytes and each converted column's
+        old and new type.
+    """
+    max_category_ratio = CATEGORY_MAX_UNIQUE_RATIO if max_category_ratio is None else max_category_ratio
+    before = memory_bytes(df)
+    converted = {}
+    if df.columns.duplicated().any():
+        # Columns cannot be replaced by name when names repeat
+        return df, {"bytes_before": before, "bytes_after": before, "columns": converted}
+
+    df = df.copy(deep=False)
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values):
+            continue
+        if pd.api.types.is_numeric_dtype(values):
+            optimized = _downcast_integers(values)
+        elif _is_text(values):
+            optimized = _parse_dates(values)
+            if optimized is None:
+                optimized = _categorize(values, max_category_ratio)
+        else:
+            optimized = None
+
+        if optimized is not None:
+            df[col] = optimized
+            converted[col] = {"from": str(values.dtype), "to": str(optimized.dtype)}
+
+    return df, {
+        "bytes_before": before,
+        "bytes_after": memory_bytes(df) if converted else before,
+        "columns": converted,
+    }
+
+
+def align_chunk(df: pd.DataFrame, chunk: pd.DataFrame) -> tuple:
+    """
+    Match the types of rows being appended to the dataset's types.
+
+    Both frames were optimized separately, so the same column may have a
+    different compact type in each. Without aligning, concatenating
+    mismatched categories or an all-empty column falls back to object.
+
+    Args:
+        df: The dataset.
+        chunk: New rows with the same columns.
+
+    Returns:
+        A tuple of (dataset, chunk) ready for pandas.concat. Categorical
+        columns of the dataset gain the chunk's new categories, kept in
+        sorted order because pandas sorts and groups unordered categories
+        by their position rather than their value.
+    """
+    df = df.copy(deep=False)
+    chunk = chunk.copy(deep=False)
+    for col in df.columns:
+        old, new = df[col], chunk[col]
+        if isinstance(old.dtype, pd.CategoricalDtype):
+            added = pd.Index(new.dropna().unique()).difference(old.cat.categories)
+            try:
+                if len(added):
+                    categories = old.cat.categories.append(added)
+                    if not old.cat.ordered:
+                        try:
+                            categories = categories.sort_values()
+                        except TypeError:
+                            # Values of mixed types keep their order of arrival
+                            pass
+                    old = old.cat.set_categories(categories)
+                    df[col] = old
+                chunk[col] = new.astype(old.dtype)
+            except (TypeError, ValueError):
+                pass
+        elif isinstance(new.dtype, pd.CategoricalDtype):
+            chunk[col] = new.astype(new.cat.categories.dtype)
+        elif pd.api.types.is_datetime64_any_dtype(old) and _is_text(new):
+            parsed = _parse_dates(new)
+            if parsed is not None:
+                chunk[col] = parsed
+        elif new.dtype != old.dtype and new.isna().all():
+            # An all-empty column parses as float; keep the dataset's type
+            try:
+                chunk[col] = new.astype(old.dtype)
+            except (TypeError, ValueError):
+                pass
+    return df, chunk
@@ -2,46 +2,37 @@
 
 import google.generativeai as genai
 
+from .llm_backend import LLMBackend
 from .config import GEMINI_API_KEY, DEFAULT_MODEL, validate_config
 
 
-class GeminiClient:
+class GeminiClient(LLMBackend):
     """Wrapper for the Google Gemini API client."""
 
-    def __init__(self, model: str = None):
+    provider = "gemini"
+    error_label = "Gemini API"
+
+    def __init__(self, model: str = None, use_cache: bool = True, **kwargs):
         """
         Initialize the Gemini client.
 
         Args:
             model: The model to use for completions. Defaults to DEFAULT_MODEL.
+            use_cache: Whether to use the persistent response cache.
+            **kwargs: Passed to LLMBackend, e.g. rate_limiter or max_retries.
         """
         validate_config()
         genai.configure(api_key=GEMINI_API_KEY)
-        self.model_name = model or DEFAULT_MODEL
+        super().__init__(model or DEFAULT_MODEL, use_cache=use_cache, **kwargs)
         self.model = genai.GenerativeModel(self.model_name)
 
-    def chat(
+    def _build_messages(
         self,
         user_message: str,
         system_prompt: str = None,
         conversation_history: list = None,
-        temperature: float = 0.7,
-        max_tokens: int = 2048,
-    ) -> str:
-        """
-        Send a chat completion request to Gemini.
-
-        Args:
-            user_message: The user's message/question.
-            system_prompt: Optional system prompt for context.
-            conversation_history: Optional list of previous messages.
-            temperature: Sampling temperature (0-2). Default 0.7.
-            max_tokens: Maximum tokens in response. Default 2048.
-
-        Returns:
-            The assistant's response text.
-        """
-        # Build the conversation for Gemini
+    ) -> list:
+        """Build the Gemini conversation contents for a request."""
         contents = []
 
         # Add system prompt as first user message if provided
@@ -57,18 +48,30 @@ class GeminiClient:
 
         # Add the current user message
         contents.append({"role": "user", "parts": [user_message]})
+        return contents
+
+    def _generation_config(self, temperature: float, max_tokens: int):
+        return genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
 
-        try:
-            # Create generation config
-            generation_config = genai.types.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens,
-            )
+    def _complete(self, contents: list, temperature: float, max_tokens: int) -> str:
+        """Send one completion request to Gemini."""
+        response = self.model.generate_content(
+            contents,
+            generation_config=self._generation_config(temperature, max_tokens),
+        )
+        return response.text
 
-            response = self.model.generate_content(
-                contents,
-                generation_config=generation_config,
-            )
-            return response.text
-        except Exception as e:
-            raise RuntimeError(f"Gemini API error: {str(e)}") from e
+    def _stream(self, contents: list, temperature: float, max_tokens: int):
+        """Send one streaming request to Gemini, yielding text pieces."""
+        response = self.model.generate_content(
+            contents,
+            generation_config=self._generation_config(temperature, max_tokens),
+            stream=True,
+        )
+        for chunk in response:
+            # Chunks without text parts (e.g. the final finish reason) are skipped
+            if chunk.parts:
+                yield chunk.text
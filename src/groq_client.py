@@ -2,44 +2,38 @@
 
 from groq import Groq
 
-from .config import GROQ_API_KEY, DEFAULT_MODEL, validate_config
+from .llm_backend import LLMBackend
+from .config import GROQ_API_KEY, GROQ_MODEL, validate_groq_config
 
 
-class GroqClient:
+class GroqClient(LLMBackend):
     """Wrapper for the Groq API client."""
 
-    def __init__(self, model: str = None):
+    provider = "groq"
+    error_label = "Groq API"
+
+    def __init__(self, model: str = None, use_cache: bool = True, **kwargs):
         """
         Initialize the Groq client.
 
         Args:
-            model: The model to use for completions. Defaults to DEFAULT_MODEL.
+            model: The model to use for completions. Defaults to GROQ_MODEL.
+            use_cache: Whether to use the persistent response cache.
+            **kwargs: Passed to LLMBackend, e.g. rate_limiter or max_retries.
         """
-        validate_config()
-        self.client = Groq(api_key=GROQ_API_KEY)
-        self.model = model or DEFAULT_MODEL
+        validate_groq_config()
+        super().__init__(model or GROQ_MODEL, use_cache=use_cache, **kwargs)
+        # The SDK's own retries would compete with the shared backoff
+        self.client = Groq(api_key=GROQ_API_KEY, max_retries=0)
+        self.model = self.model_name
 
-    def chat(
+    def _build_messages(
         self,
         user_message: str,
         system_prompt: str = None,
         conversation_history: list = None,
-        temperature: float = 0.7,
-        max_tokens: int = 2048,
-    ) -> str:
-        """
-        Send a chat completion request to Groq.
-
-        Args:
-            user_message: The user's message/question.
-            system_prompt: Optional system prompt for context.
-            conversation_history: Optional list of previous messages.
-            temperature: Sampling temperature (0-2). Default 0.7.
-            max_tokens: Maximum tokens in response. Default 2048.
-
-        Returns:
-            The assistant's response text.
-        """
+    ) -> list:
+        """Build the chat messages for a request."""
         messages = []
 
         # Add system prompt if provided
@@ -52,14 +46,28 @@ class GroqClient:
 
         # Add the current user message
         messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def _complete(self, messages: list, temperature: float, max_tokens: int) -> str:
+        """Send one completion request to Groq."""
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            raise RuntimeError(f"Groq API error: {str(e)}") from e
+    def _stream(self, messages: list, temperature: float, max_tokens: int):
+        """Send one streaming request to Groq, yielding text pieces."""
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        for chunk in stream:
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                yield content
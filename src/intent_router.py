@@ -0,0 +1,320 @@
+"""Answers simple questions about a dataset from its summary, without an LLM call."""
+
+import re
+import threading
+
+# Words naming a describe() statistic, mapped to the statistic and its label.
+# Bare superlatives are left out: "the highest popularity movie" asks for a row.
+STAT_WORDS = [
+    ("standard deviation", "std", "standard deviation"),
+    ("std dev", "std", "standard deviation"),
+    ("stdev", "std", "standard deviation"),
+    ("std", "std", "standard deviation"),
+    ("maximum", "max", "maximum"),
+    ("highest value", "max", "maximum"),
+    ("largest value", "max", "maximum"),
+    ("max", "max", "maximum"),
+    ("minimum", "min", "minimum"),
+    ("lowest value", "min", "minimum"),
+    ("smallest value", "min", "minimum"),
+    ("min", "min", "minimum"),
+    ("average", "mean", "mean"),
+    ("mean", "mean", "mean"),
+    ("avg", "mean", "mean"),
+    ("median", "50%", "median"),
+]
+
+# Words that narrow a question to some rows or ask about individual rows.
+# The summary cannot answer those, so they go to the model.
+CONDITION_WORDS = {
+    "where", "when", "after", "before", "between", "per", "each", "by", "for",
+    "among", "with", "without", "if", "excluding", "only", "group", "grouped",
+    "which", "who", "whose", "top", "bottom", "compare", "than", "trend", "why",
+    "correlation", "over", "under", "above", "below", "since", "until",
+}
+
+# Words asking for a value computed over rows: aggregates, rankings and
+# comparisons. With a column named, query mode can compute the answer.
+COMPUTE_WORDS = {
+    "count", "average", "mean", "median", "sum", "total", "max", "maximum",
+    "min", "minimum", "highest", "lowest", "largest", "smallest", "most",
+    "least", "fewest", "top", "bottom", "rank", "ranked", "percent",
+    "percentage", "proportion", "ratio", "std", "variance", "more", "less",
+    "fewer", "greater", "list",
+}
+
+# Phrases asking for a count or share of rows, with or without a column
+_COMPUTE_PHRASE = re.compile(
+    r"\b(?:how many|how much|number of|count of|percent(?:age)? of|share of|proportion of)\b"
+)
+
+MISSING_WORDS = r"(?:missing|null|nulls|empty|blank|nan|na)"
+
+# Words a question answered from the summary may contain besides the column
+# name and the words of what it asks for. Anything else, e.g. a value such
+# as "action" or "2020", may narrow the question to some rows.
+FILLER_WORDS = {
+    "what", "whats", "s", "is", "are", "was", "the", "a", "an", "of", "in",
+    "this", "my", "our", "dataset", "data", "file", "table", "column",
+    "field", "variable", "value", "values", "number", "tell", "me", "show",
+    "give", "find", "get", "calculate", "compute", "please", "can", "could",
+    "you", "i", "want", "to", "know", "how", "many", "does", "do", "have",
+    "has", "there", "contain", "contains", "overall", "entire", "whole",
+    "all", "rows",
+}
+
+# Count questions must be nothing more than the count, e.g. "how many rows
+# does the dataset have" but not "how many rows have a rating"
+_IN_DATASET = r"(?: (?:are )?(?:there|in (?:the|this|my) (?:dataset|data|file|table))| does (?:the|this|my) (?:dataset|data|file|table) (?:have|contain))*"
+_ROW_COUNT = re.compile(
+    rf"^(?:how many (?:rows|records|entries|observations)|(?:what is |what s )?the (?:number|count) of (?:rows|records|entries|observations)){_IN_DATASET}$"
+)
+_COLUMN_COUNT = re.compile(
+    rf"^(?:how many (?:columns|fields|features|variables)|(?:what is |what s )?the (?:number|count) of (?:columns|fields|features|variables)){_IN_DATASET}$"
+)
+_COLUMN_LIST = re.compile(
+    r"^(?:what|which) (?:are|is) the (?:columns|column names|fields)(?: in the (?:dataset|data|file))?$"
+    r"|^(?:list|show|name)(?: me)?(?: the| all)?(?: the)? (?:columns|column names|fields)$"
+)
+_MOST_MISSING = re.compile(rf"\bwhich (?:column|field|variable)s? (?:has|have|contains?) the (most|fewest|least) {MISSING_WORDS}\b")
+_MISSING_COUNT = re.compile(rf"\bhow many {MISSING_WORDS}\b")
+_DISTINCT_COUNT = re.compile(r"\bhow many (?:distinct|unique|different)\b|\b(?:number|count) of (?:distinct|unique|different)\b")
+_COLUMN_TYPE = re.compile(r"\b(?:data ?type|dtype|type)\b")
+_STAT_WORD = re.compile(r"\b(?:" + "|".join(re.escape(word) for word, _, _ in STAT_WORDS) + r")\b")
+_MISSING_WORD = re.compile(rf"\b{MISSING_WORDS}\b")
+_DISTINCT_WORD = re.compile(r"\b(?:distinct|unique|different)\b")
+
+
+def normalize(text: str) -> str:
+    """Lowercase a question or column name and turn separators into spaces."""
+    text = re.sub(r"[_\-.]+", " ", str(text).lower())
+    text = re.sub(r"[^\w%\s]", " ", text)
+    return " ".join(text.split())
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return f"{int(value):,}"
+    return f"{value:,.6g}"
+
+
+class IntentRouter:
+    """
+    Matches questions against the dataset's column names and statistic names
+    and answers the ones the summary already covers: row and column counts,
+    column lists and types, distinct counts, missing values, and describe()
+    statistics of a single column.
+
+    Column questions are answered only if every other word is one of the
+    words asked for or FILLER_WORDS, so "the average popularity of action
+    movies" or "max age in marketing" fall through to the model rather than
+    getting the statistic of the whole column.
+    """
+
+    def __init__(self, analyzer):
+        """
+        Initialize the router.
+
+        Args:
+            analyzer: The DatasetAnalyzer whose cached summary answers questions.
+        """
+        self.analyzer = analyzer
+        self._column_names = None
+
+    def _columns_in(self, question: str) -> list:
+        """Find the columns named in a question, preferring longer names."""
+        if self._column_names is None:
+            names = [(normalize(col), col) for col in self.analyzer.columns]
+            # Longer names first, so "vote average" wins over "vote"
+            self._column_names = sorted(
+                [(name, col) for name, col in names if name],
+                key=lambda item: len(item[0]),
+                reverse=True,
+            )
+
+        found = []
+        remaining = f" {question} "
+        for name, col in self._column_names:
+            if f" {name} " in remaining:
+                found.append(col)
+                remaining = remaining.replace(f" {name} ", " | ")
+        return found
+
+    def _strip_columns(self, text: str, columns: list) -> str:
+        """Remove the names of the given columns from a normalized question."""
+        remaining = f" {text} "
+        for name, col in self._column_names:
+            if col in columns:
+                remaining = remaining.replace(f" {name} ", " ")
+        return remaining
+
+    def _only_asks(self, text: str, columns: list, pattern: re.Pattern) -> bool:
+        """Whether a question is nothing but the columns, the words pattern matches and filler."""
+        remaining = pattern.sub(" ", self._strip_columns(text, columns))
+        return set(remaining.split()) <= FILLER_WORDS
+
+    def answer(self, question: str):
+        """
+        Answer a question from the summary if it is simple enough.
+
+        Args:
+            question: The user's question.
+
+        Returns:
+            The answer text, or None if the question needs the model.
+        """
+        text = normalize(question)
+        if not text:
+            return None
+        summary = self.analyzer.get_summary()
+        words = set(text.split())
+        columns = self._columns_in(text)
+
+        if _ROW_COUNT.search(text):
+            return f"The dataset has {summary['row_count']:,} rows."
+
+        if _COLUMN_COUNT.search(text):
+            return f"The dataset has {summary['column_count']:,} columns."
+
+        match = _MOST_MISSING.search(text)
+        if match and words & CONDITION_WORDS <= {"which"}:
+            return self._most_missing(summary, fewest=match.group(1) != "most")
+
+        if words & CONDITION_WORDS:
+            return None
+
+        if _MISSING_COUNT.search(text):
+            if not self._only_asks(text, columns, _MISSING_WORD):
+                return None
+            return self._missing_count(summary, columns)
+
+        if _DISTINCT_COUNT.search(text) and len(columns) == 1:
+            if not self._only_asks(text, columns, _DISTINCT_WORD):
+                return None
+            return self._distinct_count(summary, columns[0])
+
+        if _COLUMN_TYPE.search(text) and len(columns) == 1:
+            if not self._only_asks(text, columns, _COLUMN_TYPE):
+                return None
+            col = columns[0]
+            return f"{col} has the data type {summary['column_types'][col]}."
+
+        if _COLUMN_LIST.search(text) and not columns:
+            names = ", ".join(str(col) for col in summary["columns"])
+            return f"The dataset has {summary['column_count']} columns: {names}."
+
+        return self._stat(summary, text, columns)
+
+    def needs_query(self, question: str) -> bool:
+        """
+        Guess whether a question needs a value computed over the rows, so
+        query mode only spends a planning call where it can help.
+
+        Args:
+            question: The user's question.
+
+        Returns:
+            True if the question asks for a count or share of rows, or names
+            a column along with an aggregate, ranking, comparison or filter.
+        """
+        text = normalize(question)
+        if _COMPUTE_PHRASE.search(text):
+            return True
+        columns = self._columns_in(text)
+        if not columns:
+            return False
+        # Words of the column names do not count, e.g. "average" in "vote average"
+        words = set(self._strip_columns(text, columns).split())
+        return bool(words & (COMPUTE_WORDS | CONDITION_WORDS) - {"why", "trend", "correlation"})
+
+    def _most_missing(self, summary: dict, fewest: bool) -> str:
+        empty = summary["empty_data"]
+        if not empty:
+            return "The dataset has no columns."
+        pick = min if fewest else max
+        count = pick(info["total_empty"] for info in empty.values())
+        if not fewest and count == 0:
+            return "No column has missing or empty values."
+        tied = [str(col) for col, info in empty.items() if info["total_empty"] == count]
+        word = "fewest" if fewest else "most"
+        percentage = empty[tied[0]]["percentage"]
+        if len(tied) == 1:
+            return (
+                f"{tied[0]} has the {word} missing or empty values: "
+                f"{count:,} ({percentage}% of rows)."
+            )
+        return (
+            f"{', '.join(tied)} have the {word} missing or empty values: "
+            f"{count:,} each ({percentage}% of rows)."
+        )
+
+    def _missing_count(self, summary: dict, columns: list):
+        empty = summary["empty_data"]
+        if len(columns) == 1:
+            info = empty[columns[0]]
+            return (
+                f"{columns[0]} has {info['total_empty']:,} missing or empty values "
+                f"({info['percentage']}% of rows)."
+            )
+        if columns:
+            return None
+        total = sum(info["total_empty"] for info in empty.values())
+        affected = sum(1 for info in empty.values() if info["total_empty"])
+        return f"The dataset has {total:,} missing or empty values across {affected} columns."
+
+    def _distinct_count(self, summary: dict, col):
+        count = summary.get("distinct_counts", {}).get(col)
+        if count is None:
+            return None
+        about = "about " if summary.get("stats_approximate") else ""
+        return f"{col} has {about}{count:,} distinct values."
+
+    def _stat(self, summary: dict, text: str, columns: list):
+        """Answer a request for one describe() statistic of one column."""
+        if len(columns) != 1:
+            return None
+        # Words of the column name do not count, e.g. "average" in "vote average"
+        padded = self._strip_columns(text, columns)
+        stats = {
+            (stat, label) for word, stat, label in STAT_WORDS if f" {word} " in padded
+        }
+        if len(stats) != 1 or not self._only_asks(text, columns, _STAT_WORD):
+            return None
+        (stat, label), = stats
+        col = columns[0]
+        value = summary["basic_stats"].get(col, {}).get(stat)
+        if value is None:
+            return None
+        # Only the quartiles come from sketches in approximate mode
+        about = "about " if stat == "50%" and summary.get("stats_approximate") else ""
+        return f"The {label} of {col} is {about}{_format_value(value)}."
+
+
+class RouterStats:
+    """Thread-safe counts of questions and how many were answered locally."""
+
+    def __init__(self):
+        self.questions = 0
+        self.local = 0
+        self._lock = threading.Lock()
+
+    def record(self, local: bool):
+        """Count one question."""
+        with self._lock:
+            self.questions += 1
+            if local:
+                self.local += 1
+
+    def to_dict(self) -> dict:
+        """Get the counts and the share answered locally."""
+        with self._lock:
+            share = self.local / self.questions if self.questions else 0.0
+            return {
+                "questions": self.questions,
+                "answered_locally": self.local,
+                "local_share": round(share, 4),
+            }
+
+
+# Counts for this process, reported by /api/status
+router_stats = RouterStats()
@@ -0,0 +1,201 @@
+"""Background job execution for slow upload stages."""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from .config import JOB_WORKERS, JOB_STATE_DIR, JOB_TTL_SECONDS
+
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobManager:
+    """
+    Runs slow work (AI chart suggestions, rendering) in background threads.
+
+    Each job has a status ('pending', 'running', 'done' or 'failed'), the name
+    of its current stage, and a result dictionary filled in as stages finish.
+    Job state is mirrored to small JSON files so any worker process can
+    answer status requests for jobs started by another.
+    """
+
+    def __init__(self, max_workers: int = None, state_dir: str = None,
+                 ttl_seconds: int = None):
+        """
+        Initialize the job manager.
+
+        Args:
+            max_workers: Number of background threads. Defaults to JOB_WORKERS.
+            state_dir: Directory for job state files. Defaults to JOB_STATE_DIR.
+            ttl_seconds: How long finished jobs are kept. Defaults to JOB_TTL_SECONDS.
+        """
+        self.state_dir = Path(state_dir or JOB_STATE_DIR)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = JOB_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or JOB_WORKERS, thread_name_prefix="job"
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_valid_id(job_id: str) -> bool:
+        """Check that a client-supplied job ID has the expected shape."""
+        return bool(job_id) and bool(_JOB_ID_PATTERN.match(job_id))
+
+    def submit(self, func, *args, **kwargs) -> str:
+        """
+        Run a function in the background.
+
+        The function is called as func(report, *args, **kwargs), where
+        report(stage, **results) records the current stage and merges any
+        results into the job.
+
+        Args:
+            func: The function to run.
+            *args: Positional arguments for the function.
+            **kwargs: Keyword arguments for the function.
+
+        Returns:
+            The new job's ID.
+        """
+        job_id = uuid.uuid4().hex
+        self._create(job_id, "pending")
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    @contextmanager
+    def track(self, job_id: str, stage: str = None):
+        """
+        Follow work that runs in the caller's thread, such as a request body
+        being received, so other requests can poll its progress.
+
+        The job ID is chosen by the caller, e.g. sent by the client before
+        its upload finishes, and must be valid and unused. The job is done
+        when the block exits, or failed if it raises.
+
+        Args:
+            job_id: The job ID.
+            stage: Optional initial stage.
+
+        Yields:
+            report(stage, **results), as passed to submitted functions.
+        """
+        self._create(job_id, "running", stage)
+
+        def report(stage: str, **results):
+            self._update(job_id, stage=stage, results=results)
+
+        try:
+            yield report
+        except BaseException as e:
+            self._update(job_id, status="failed", error=str(e))
+            raise
+        self._update(job_id, status="done", stage=None)
+
+    def _create(self, job_id: str, status: str, stage: str = None):
+        self._purge_expired()
+
+        now = time.time()
+        job = {
+            "id": job_id,
+            "status": status,
+            "stage": stage,
+            "result": {},
+            "error": None,
+            "created": now,
+            "updated": now,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        self._save(job)
+
+    def get(self, job_id: str):
+        """
+        Get a snapshot of a job's state.
+
+        Args:
+            job_id: The job ID.
+
+        Returns:
+            A dictionary describing the job, or None if it is unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return json.loads(json.dumps(job, default=str))
+        return self._load(job_id)
+
+    def _run(self, job_id: str, func, args, kwargs):
+        def report(stage: str, **results):
+            self._update(job_id, stage=stage, results=results)
+
+        self._update(job_id, status="running")
+        try:
+            func(report, *args, **kwargs)
+            self._update(job_id, status="done", stage=None)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e))
+
+    def _update(self, job_id: str, status: str = None, stage=False,
+                results: dict = None, error: str = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if status is not None:
+                job["status"] = status
+            if stage is not False:
+                job["stage"] = stage
+            if results:
+                job["result"].update(results)
+            if error is not None:
+                job["error"] = error
+            job["updated"] = time.time()
+            snapshot = json.loads(json.dumps(job, default=str))
+        self._save(snapshot)
+
+    def _state_path(self, job_id: str) -> Path:
+        return self.state_dir / f"{job_id}.json"
+
+    def _save(self, job: dict):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(job, f, default=str)
+            os.replace(tmp_path, self._state_path(job["id"]))
+        except OSError as e:
+            print(f"Job state write error: {e}")
+
+    def _load(self, job_id: str):
+        try:
+            with open(self._state_path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _purge_expired(self):
+        """Forget finished jobs older than the TTL, in memory and on disk."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in ("done", "failed") and job["updated"] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+        for path in self.state_dir.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,598 @@
+"""Shared LLM backend interface with rate limiting, retries and caching."""
+
+import bisect
+import hashlib
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from .config import (
+    LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES, LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS, LLM_QUEUE_TIMEOUT_SECONDS, PROVIDER_RATE_LIMITS,
+    LATENCY_HISTORY_SIZE,
+)
+from .context_builder import estimate_tokens
+from .llm_cache import ResponseCache, get_response_cache
+
+# HTTP statuses worth retrying: rate limiting and transient server failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimitError(RuntimeError):
+    """Raised when a provider keeps rate limiting requests after all retries."""
+    pass
+
+
+class RequestCancelled(RuntimeError):
+    """Raised when a request is abandoned because its cancel event was set."""
+    pass
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    The bucket holds up to `capacity` units and refills continuously at
+    `capacity / period` units per second. Debits after the fact may take the
+    level below zero, which delays later callers until the debt is repaid.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        """
+        Initialize a full bucket.
+
+        Args:
+            capacity: Maximum units per period, e.g. requests per minute.
+            period: Refill period in seconds.
+        """
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float, timeout: float = None) -> bool:
+        """
+        Take units from the bucket, waiting until enough are available.
+
+        Requests larger than the capacity wait for a full bucket rather than
+        forever.
+
+        Args:
+            amount: Units to take.
+            timeout: Longest time to wait in seconds. Waits indefinitely if None.
+
+        Returns:
+            True if the units were taken, False on timeout.
+        """
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.level >= amount:
+                    self.level -= amount
+                    return True
+                wait = (amount - self.level) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def debit(self, amount: float):
+        """Take units without waiting, e.g. for output tokens counted afterwards."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= amount
+
+
+class RateLimiter:
+    """
+    Schedules requests to one provider within its requests-per-minute and
+    tokens-per-minute limits, with a bound on concurrent requests.
+
+    Every client for the same provider in a process shares one limiter, so
+    concurrent callers are coordinated instead of bursting.
+    """
+
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int = None,
+                 period: float = 60.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            rpm: Requests allowed per minute.
+            tpm: Tokens allowed per minute, counting prompt and output.
+            max_concurrency: Requests allowed in flight at once.
+                Defaults to LLM_MAX_CONCURRENCY.
+            period: Length of the limit window in seconds. Only benchmarks
+                change this, to compress a minute into less time.
+        """
+        self.requests = TokenBucket(rpm, period)
+        self.tokens = TokenBucket(tpm, period)
+        self._slots = threading.BoundedSemaphore(max_concurrency or LLM_MAX_CONCURRENCY)
+
+    def acquire(self, prompt_tokens: int, timeout: float = None) -> bool:
+        """
+        Wait for a concurrency slot and rate budget for one request.
+
+        Args:
+            prompt_tokens: Estimated prompt size in tokens.
+            timeout: Longest time to wait in seconds. Waits indefinitely if None.
+
+        Returns:
+            True once the request may be sent; False on timeout. On success
+            the caller must call release() when the request finishes.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        if not self._slots.acquire(timeout=remaining()):
+            return False
+        if self.requests.acquire(1, remaining()) and self.tokens.acquire(prompt_tokens, remaining()):
+            return True
+        self._slots.release()
+        return False
+
+    def release(self, output_tokens: int = 0):
+        """
+        Finish a request, charging its output tokens to the token budget.
+
+        Args:
+            output_tokens: Estimated size of the response in tokens.
+        """
+        if output_tokens:
+            self.tokens.debit(output_tokens)
+        self._slots.release()
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """
+    Get the process-wide rate limiter for a provider.
+
+    Args:
+        provider: The provider name, a key of PROVIDER_RATE_LIMITS.
+
+    Returns:
+        The shared RateLimiter, created on first use.
+    """
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            limits = PROVIDER_RATE_LIMITS.get(provider, PROVIDER_RATE_LIMITS["default"])
+            _rate_limiters[provider] = RateLimiter(limits["rpm"], limits["tpm"])
+        return _rate_limiters[provider]
+
+
+class LatencyHistogram:
+    """
+    A thread-safe histogram of request latencies.
+
+    Buckets are spaced logarithmically, a quarter of a doubling apart, so
+    percentiles are accurate to about 19% at any scale with fixed memory.
+    Counts are halved whenever they reach max_count, so old samples fade and
+    percentiles follow the provider's recent behavior.
+    """
+
+    def __init__(self, min_seconds: float = 0.01, max_seconds: float = 300.0,
+                 buckets_per_doubling: int = 4, max_count: int = None):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            min_seconds: Upper bound of the lowest bucket.
+            max_seconds: Latencies above this share the highest bucket.
+            buckets_per_doubling: Resolution of the buckets.
+            max_count: Samples before counts are halved. Defaults to
+                LATENCY_HISTORY_SIZE.
+        """
+        self.bounds = []
+        bound = min_seconds
+        step = 2 ** (1 / buckets_per_doubling)
+        while bound < max_seconds:
+            self.bounds.append(bound)
+            bound *= step
+        self.bounds.append(max_seconds)
+        self.counts = [0.0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.max_count = max_count or LATENCY_HISTORY_SIZE
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Add one latency sample."""
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += 1
+            if self.total >= self.max_count:
+                self.counts = [count / 2 for count in self.counts]
+                self.total /= 2
+
+    def percentile(self, pct: float):
+        """
+        Estimate a latency percentile.
+
+        Args:
+            pct: The percentile, from 0 to 100.
+
+        Returns:
+            The upper bound of the bucket holding the percentile, in seconds,
+            or None if nothing has been recorded.
+        """
+        with self._lock:
+            if not self.total:
+                return None
+            target = self.total * pct / 100
+            cumulative = 0.0
+            for index, count in enumerate(self.counts):
+                cumulative += count
+                if count and cumulative >= target:
+                    return self.bounds[min(index, len(self.bounds) - 1)]
+            return self.bounds[-1]
+
+    @property
+    def count(self) -> float:
+        """Samples currently weighted in the histogram."""
+        return self.total
+
+
+_latency_histograms = {}
+_latency_histograms_lock = threading.Lock()
+
+
+def get_latency_histogram(provider: str, kind: str = "complete") -> LatencyHistogram:
+    """
+    Get the process-wide latency histogram for a provider.
+
+    Args:
+        provider: The provider name.
+        kind: 'complete' for whole responses, 'first_piece' for the time until
+            a stream yields its first text.
+
+    Returns:
+        The shared LatencyHistogram, created on first use.
+    """
+    with _latency_histograms_lock:
+        key = (provider, kind)
+        if key not in _latency_histograms:
+            _latency_histograms[key] = LatencyHistogram()
+        return _latency_histograms[key]
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Check whether a provider error is worth retrying.
+
+    Providers' SDKs raise different exception types, so this looks at HTTP
+    status attributes and falls back to the exception's name and message.
+    """
+    for attr in ("status_code", "code"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+            return True
+
+    name = type(error).__name__
+    if any(marker in name for marker in (
+        "RateLimit", "ResourceExhausted", "ServiceUnavailable", "Timeout",
+        "APIConnectionError", "InternalServerError", "DeadlineExceeded",
+    )):
+        return True
+    return "429" in str(error)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether a provider error means the request was rate limited."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status == 429:
+        return True
+    name = type(error).__name__
+    return "RateLimit" in name or "ResourceExhausted" in name or "429" in str(error)
+
+
+class LLMBackend(ABC):
+    """
+    Base class for LLM providers.
+
+    Subclasses build the provider's request format and perform single calls
+    in _complete and _stream; a subclass missing any of these cannot be
+    instantiated. This class adds the shared behavior: response caching,
+    rate-limit-aware scheduling, exponential backoff with jitter, and
+    latency histograms of the provider calls that succeed.
+    """
+
+    # Provider name used for cache keys and rate limits
+    provider = "base"
+    # Prefix for error messages, e.g. "Gemini API"
+    error_label = "LLM API"
+
+    def __init__(self, model_name: str, use_cache: bool = True,
+                 rate_limiter: RateLimiter = None, max_retries: int = None):
+        """
+        Initialize the backend.
+
+        Args:
+            model_name: The model to use for completions.
+            use_cache: Whether to use the persistent response cache.
+            rate_limiter: Optional limiter override. Defaults to the shared
+                limiter for this provider.
+            max_retries: Retries for retryable errors. Defaults to LLM_MAX_RETRIES.
+        """
+        self.model_name = model_name
+        self.cache = get_response_cache() if use_cache else None
+        self.rate_limiter = rate_limiter or get_rate_limiter(self.provider)
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.latency_histogram = get_latency_histogram(self.provider)
+        self.first_piece_histogram = get_latency_histogram(self.provider, "first_piece")
+
+    @abstractmethod
+    def _build_messages(self, user_message: str, system_prompt: str = None,
+                        conversation_history: list = None) -> list:
+        """Build the provider's message list for a request."""
+
+    @abstractmethod
+    def _complete(self, messages: list, temperature: float, max_tokens: int) -> str:
+        """Perform one completion request and return the response text."""
+
+    @abstractmethod
+    def _stream(self, messages: list, temperature: float, max_tokens: int):
+        """Perform one streaming request, yielding response text pieces."""
+
+    def _cache_key(self, messages: list, temperature: float, max_tokens: int, use_cache: bool):
+        """Get the response cache key for a request, or None when not caching."""
+        if not use_cache or self.cache is None or not self.cache.enabled:
+            return None
+        return ResponseCache.make_key(
+            self.provider,
+            self.model_name,
+            messages,
+            {"temperature": temperature, "max_tokens": max_tokens},
+        )
+
+    def _acquire(self, messages: list, cancel: threading.Event = None) -> int:
+        """Wait for rate budget for a request and return its prompt token estimate."""
+        self._check_cancelled(cancel)
+        prompt_tokens = estimate_tokens(json.dumps(messages, default=str))
+        if not self.rate_limiter.acquire(prompt_tokens, timeout=LLM_QUEUE_TIMEOUT_SECONDS):
+            raise RateLimitError(f"{self.error_label} error: too many queued requests, try again shortly")
+        if cancel is not None and cancel.is_set():
+            # Cancelled while queued: give the slot back without sending
+            self.rate_limiter.release()
+            self._check_cancelled(cancel)
+        return prompt_tokens
+
+    def _check_cancelled(self, cancel: threading.Event = None):
+        if cancel is not None and cancel.is_set():
+            raise RequestCancelled(f"{self.error_label} request cancelled")
+
+    def _backoff(self, attempt: int, cancel: threading.Event = None):
+        """Sleep before a retry, with exponential backoff and full jitter."""
+        ceiling = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        if cancel is None:
+            time.sleep(delay)
+        elif cancel.wait(delay):
+            self._check_cancelled(cancel)
+
+    def _raise_error(self, error: Exception):
+        if is_rate_limit_error(error):
+            raise RateLimitError(f"{self.error_label} rate limit: {str(error)}") from error
+        raise RuntimeError(f"{self.error_label} error: {str(error)}") from error
+
+    def chat(
+        self,
+        user_message: str,
+        system_prompt: str = None,
+        conversation_history: list = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        use_cache: bool = True,
+        cancel: threading.Event = None,
+    ) -> str:
+        """
+        Send a chat completion request.
+
+        Args:
+            user_message: The user's message/question.
+            system_prompt: Optional system prompt for context.
+            conversation_history: Optional list of previous messages.
+            temperature: Sampling temperature (0-2). Default 0.7.
+            max_tokens: Maximum tokens in response. Default 2048.
+            use_cache: Set to False to bypass the response cache.
+            cancel: Optional event that abandons the request when set. A call
+                already sent to the provider cannot be interrupted, but no
+                retry or queued request follows it.
+
+        Returns:
+            The assistant's response text.
+
+        Raises:
+            RateLimitError: If the provider still rate limits after all retries.
+            RequestCancelled: If the cancel event was set.
+            RuntimeError: For any other provider error.
+        """
+        messages = self._build_messages(user_message, system_prompt, conversation_history)
+        cache_key = self._cache_key(messages, temperature, max_tokens, use_cache)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        attempt = 0
+        while True:
+            self._acquire(messages, cancel)
+            text = None
+            started = time.monotonic()
+            try:
+                text = self._complete(messages, temperature, max_tokens)
+                self.latency_histogram.record(time.monotonic() - started)
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    self._raise_error(e)
+            finally:
+                self.rate_limiter.release(estimate_tokens(text) if text else 0)
+            self._backoff(attempt, cancel)
+            attempt += 1
+
+        if cache_key is not None:
+            self.cache.put(cache_key, text)
+        return text
+
+    def chat_stream(
+        self,
+        user_message: str,
+        system_prompt: str = None,
+        conversation_history: list = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        use_cache: bool = True,
+        cancel: threading.Event = None,
+    ):
+        """
+        Send a chat completion request and yield the response as it is generated.
+
+        Failures before the first piece arrives are retried like chat();
+        once text has been yielded, errors are raised immediately.
+
+        Args:
+            user_message: The user's message/question.
+            system_prompt: Optional system prompt for context.
+            conversation_history: Optional list of previous messages.
+            temperature: Sampling temperature (0-2). Default 0.7.
+            max_tokens: Maximum tokens in response. Default 2048.
+            use_cache: Set to False to bypass the response cache.
+            cancel: Optional event that abandons the request before it is
+                sent or retried. Closing the generator stops a running stream.
+
+        Yields:
+            Pieces of the assistant's response text, in order.
+        """
+        messages = self._build_messages(user_message, system_prompt, conversation_history)
+        cache_key = self._cache_key(messages, temperature, max_tokens, use_cache)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        pieces = []
+        attempt = 0
+        while True:
+            self._acquire(messages, cancel)
+            started = time.monotonic()
+            try:
+                for piece in self._stream(messages, temperature, max_tokens):
+                    if not pieces:
+                        self.first_piece_histogram.record(time.monotonic() - started)
+                    pieces.append(piece)
+                    yield piece
+                self.latency_histogram.record(time.monotonic() - started)
+                break
+            except Exception as e:
+                if pieces or attempt >= self.max_retries or not is_retryable_error(e):
+                    self._raise_error(e)
+            finally:
+                self.rate_limiter.release(estimate_tokens("".join(pieces)))
+            self._backoff(attempt, cancel)
+            attempt += 1
+
+        # Only complete responses are cached
+        if cache_key is not None:
+            self.cache.put(cache_key, "".join(pieces))
+
+
+class FakeRateLimitError(Exception):
+    """Raised by FakeBackend when its simulated provider limit is exceeded."""
+    status_code = 429
+
+
+class FakeBackend(LLMBackend):
+    """
+    A deterministic local backend for tests and offline benchmarks.
+
+    Responses are derived from a hash of the request, so the same request
+    always gets the same answer. Latency and a provider-side requests per
+    minute limit are simulated; requests over that limit fail with a 429
+    like a real provider would.
+    """
+
+    provider = "fake"
+    error_label = "Fake API"
+
+    def __init__(self, model: str = "fake-model", latency: float = 0.05,
+                 server_rpm: float = None, window: float = 60.0, words: int = 20,
+                 **kwargs):
+        """
+        Initialize the fake backend.
+
+        Args:
+            model: Model name reported in cache keys.
+            latency: Seconds each request takes.
+            server_rpm: Simulated provider limit per window. Unlimited if None.
+            window: Length of the provider's sliding limit window in seconds.
+            words: Number of words in each response.
+            **kwargs: Passed to LLMBackend, e.g. rate_limiter or use_cache.
+        """
+        kwargs.setdefault("use_cache", False)
+        super().__init__(model, **kwargs)
+        self.latency = latency
+        self.server_rpm = server_rpm
+        self.window = window
+        self.words = words
+        self.calls = 0
+        self.rejected = 0
+        self._recent = []
+        self._lock = threading.Lock()
+
+    def _build_messages(self, user_message: str, system_prompt: str = None,
+                        conversation_history: list = None) -> list:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        if conversation_history:
+            messages.extend(conversation_history)
+        messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def _admit(self):
+        """Apply the simulated provider limit over a sliding window."""
+        with self._lock:
+            self.calls += 1
+            if self.server_rpm is None:
+                return
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < self.window]
+            if len(self._recent) >= self.server_rpm:
+                self.rejected += 1
+                raise FakeRateLimitError("429 Too Many Requests (simulated)")
+            self._recent.append(now)
+
+    def _response_words(self, messages: list) -> list:
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+        return [digest[i % len(digest):][:6] for i in range(self.words)]
+
+    def _complete(self, messages: list, temperature: float, max_tokens: int) -> str:
+        self._admit()
+        time.sleep(self.latency)
+        return " ".join(self._response_words(messages))
+
+    def _stream(self, messages: list, temperature: float, max_tokens: int):
+        self._admit()
+        words = self._response_words(messages)
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            yield word if i == 0 else " " + word
@@ -0,0 +1,177 @@
+"""Persistent cache for LLM responses."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from .config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_BYTES
+
+
+class ResponseCache:
+    """
+    Caches LLM responses in a SQLite file, keyed by provider, model, the full
+    message list and the generation parameters.
+
+    Entries expire after a TTL, and the least recently used entries are
+    evicted once the stored responses exceed a size budget. SQLite handles
+    concurrent access from several threads and worker processes.
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_bytes: int = None,
+                 enabled: bool = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file. Defaults to LLM_CACHE_PATH.
+            ttl_seconds: Entry lifetime. Defaults to LLM_CACHE_TTL_SECONDS.
+            max_bytes: Size budget for stored responses. Defaults to LLM_CACHE_MAX_BYTES.
+            enabled: Whether lookups and stores happen at all. Defaults to LLM_CACHE_ENABLED.
+        """
+        self.path = path or LLM_CACHE_PATH
+        self.ttl_seconds = LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_bytes = LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.enabled = LLM_CACHE_ENABLED if enabled is None else enabled
+
+        if self.enabled:
+            try:
+                self._create_schema()
+            except (OSError, sqlite3.Error) as e:
+                # A cache that cannot be opened must not stop the client working
+                print(f"LLM cache disabled: {e}")
+                self.enabled = False
+
+    def _create_schema(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection and commit on success."""
+        # A connection per operation keeps the cache safe to share between
+        # threads without extra locking
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(provider: str, model: str, messages: list, params: dict) -> str:
+        """
+        Compute the cache key for a request.
+
+        Args:
+            provider: The provider name, e.g. 'gemini'.
+            model: The model name.
+            messages: The full message list sent to the provider.
+            params: Generation parameters such as temperature and max tokens.
+
+        Returns:
+            A hex digest identifying the request.
+        """
+        payload = json.dumps(
+            {"provider": provider, "model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        Look up a cached response.
+
+        Args:
+            key: The request key from make_key.
+
+        Returns:
+            The response text, or None on a miss or an expired entry.
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response FROM responses WHERE key = ? AND created >= ?",
+                    (key, now - self.ttl_seconds),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            print(f"LLM cache read error: {e}")
+            return None
+        return row[0] if row else None
+
+    def put(self, key: str, response: str):
+        """
+        Store a response, then evict expired and least recently used entries.
+
+        Args:
+            key: The request key from make_key.
+            response: The response text.
+        """
+        if not self.enabled or not response:
+            return
+
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created, accessed)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"LLM cache write error: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def clear(self):
+        """Remove every cached response."""
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+_shared_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache, creating it on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ResponseCache()
+    return _shared_cache
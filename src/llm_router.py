@@ -0,0 +1,233 @@
+"""Hedged LLM requests across two providers."""
+
+import queue
+import threading
+import time
+
+from .config import (
+    HEDGE_ENABLED, HEDGE_PROVIDERS, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES,
+    HEDGE_DEFAULT_DELAY_SECONDS,
+)
+
+
+class HedgedClient:
+    """
+    Sends each request to a primary provider and, when it is slow, a
+    duplicate to a secondary provider.
+
+    The hedge delay is a percentile of the primary's recent latency, taken
+    from the histograms every LLMBackend keeps: whole responses for chat()
+    and time to the first piece for chat_stream(). The first provider to
+    answer wins and the other request is cancelled. A primary that fails
+    before answering fails over to the secondary straight away.
+    """
+
+    def __init__(self, primary, secondary, percentile: float = None,
+                 min_samples: int = None, default_delay: float = None):
+        """
+        Initialize the hedged client.
+
+        Args:
+            primary: The LLMBackend tried first.
+            secondary: The LLMBackend used for hedges and failover.
+            percentile: Primary latency percentile that triggers a hedge.
+                Defaults to HEDGE_PERCENTILE.
+            min_samples: Latency samples needed before the percentile is
+                trusted. Defaults to HEDGE_MIN_SAMPLES.
+            default_delay: Hedge delay in seconds until then. Defaults to
+                HEDGE_DEFAULT_DELAY_SECONDS.
+        """
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile or HEDGE_PERCENTILE
+        self.min_samples = HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.default_delay = HEDGE_DEFAULT_DELAY_SECONDS if default_delay is None else default_delay
+        self.stats = {"requests": 0, "hedged": 0, "secondary_wins": 0, "failovers": 0}
+        self._stats_lock = threading.Lock()
+
+    def hedge_delay(self, stream: bool = False) -> float:
+        """
+        Get how long to wait for the primary before sending a hedge.
+
+        Args:
+            stream: Whether the request is streamed, in which case the delay
+                is measured to the first piece of text.
+
+        Returns:
+            The delay in seconds.
+        """
+        histogram = self.primary.first_piece_histogram if stream else self.primary.latency_histogram
+        if histogram.count < self.min_samples:
+            return self.default_delay
+        return histogram.percentile(self.percentile)
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _run_leg(self, index: int, backend, call, cancel: threading.Event, events: queue.Queue):
+        """Run one provider's request in a thread, reporting to the events queue."""
+        try:
+            result = call(backend, cancel)
+            if isinstance(result, str):
+                events.put((index, "piece", result))
+            else:
+                try:
+                    for piece in result:
+                        if cancel.is_set():
+                            break
+                        events.put((index, "piece", piece))
+                finally:
+                    # Closing the generator stops the provider's stream
+                    result.close()
+            events.put((index, "done", None))
+        except Exception as e:
+            events.put((index, "error", e))
+
+    def _race(self, call, stream: bool):
+        """
+        Race the providers and yield the winner's response pieces.
+
+        Args:
+            call: Function of (backend, cancel) returning the response text,
+                or a generator of pieces for streams.
+            stream: Whether call streams, which selects the latency histogram.
+
+        Yields:
+            Pieces of the winning provider's response, in order.
+        """
+        backends = (self.primary, self.secondary)
+        cancels = (threading.Event(), threading.Event())
+        started = [False, False]
+        errors = [None, None]
+        events = queue.Queue()
+        winner = None
+
+        def start(index):
+            started[index] = True
+            threading.Thread(
+                target=self._run_leg,
+                args=(index, backends[index], call, cancels[index], events),
+                daemon=True,
+            ).start()
+
+        self._count("requests")
+        start(0)
+        deadline = time.monotonic() + self.hedge_delay(stream)
+        try:
+            while True:
+                timeout = None if started[1] else max(0.0, deadline - time.monotonic())
+                try:
+                    index, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    self._count("hedged")
+                    start(1)
+                    continue
+
+                if winner is None:
+                    if kind == "error":
+                        errors[index] = value
+                        other = 1 - index
+                        if not started[other]:
+                            self._count("failovers")
+                            start(other)
+                        elif errors[other] is not None:
+                            raise errors[0]
+                        continue
+                    # The first piece (or an empty answer) decides the race
+                    winner = index
+                    cancels[1 - index].set()
+                    if index == 1:
+                        self._count("secondary_wins")
+
+                if index != winner:
+                    continue
+                if kind == "piece":
+                    yield value
+                elif kind == "done":
+                    return
+                else:
+                    raise value
+        finally:
+            for cancel in cancels:
+                cancel.set()
+
+    def chat(self, user_message: str, system_prompt: str = None,
+             conversation_history: list = None, temperature: float = 0.7,
+             max_tokens: int = 2048, use_cache: bool = True) -> str:
+        """
+        Send a chat completion request, hedged across the providers.
+
+        Takes the same arguments as LLMBackend.chat().
+
+        Returns:
+            The winning provider's response text.
+        """
+        def call(backend, cancel):
+            return backend.chat(
+                user_message, system_prompt, conversation_history,
+                temperature=temperature, max_tokens=max_tokens,
+                use_cache=use_cache, cancel=cancel,
+            )
+
+        return "".join(self._race(call, stream=False))
+
+    def chat_stream(self, user_message: str, system_prompt: str = None,
+                    conversation_history: list = None, temperature: float = 0.7,
+                    max_tokens: int = 2048, use_cache: bool = True):
+        """
+        Stream a chat completion, hedged across the providers.
+
+        The hedge is decided on the first piece of text; after that the
+        winner's stream is passed through. Takes the same arguments as
+        LLMBackend.chat_stream().
+
+        Yields:
+            Pieces of the winning provider's response, in order.
+        """
+        def call(backend, cancel):
+            return backend.chat_stream(
+                user_message, system_prompt, conversation_history,
+                temperature=temperature, max_tokens=max_tokens,
+                use_cache=use_cache, cancel=cancel,
+            )
+
+        yield from self._race(call, stream=True)
+
+
+def _create_backend(provider: str, model: str = None):
+    """Create the client for a provider by name."""
+    if provider == "gemini":
+        from .gemini_client import GeminiClient
+        return GeminiClient(model=model)
+    if provider == "groq":
+        from .groq_client import GroqClient
+        return GroqClient(model=model)
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def create_llm_client(model: str = None):
+    """
+    Create the LLM client used by the app.
+
+    With HEDGE_ENABLED, returns a HedgedClient over the first two
+    HEDGE_PROVIDERS; the model override applies to the primary. If the
+    secondary cannot be created, e.g. its API key is missing, the primary is
+    used alone.
+
+    Args:
+        model: Optional model override for the primary provider.
+
+    Returns:
+        An object with chat() and chat_stream().
+    """
+    if not HEDGE_ENABLED or len(HEDGE_PROVIDERS) < 2:
+        return _create_backend("gemini", model)
+
+    primary = _create_backend(HEDGE_PROVIDERS[0], model)
+    try:
+        secondary = _create_backend(HEDGE_PROVIDERS[1])
+    except Exception as e:
+        print(f"Hedging disabled, secondary provider unavailable: {e}")
+        return primary
+    return HedgedClient(primary, secondary)
@@ -0,0 +1,526 @@
+"""Out-of-core analysis of CSV files too large to load into memory."""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .chart_generator import ChartRenderer, ChartGenerator
+from .config import (
+    CSV_CHUNK_SIZE, OUT_OF_CORE_DIR, OUT_OF_CORE_MAX_BYTES, OUT_OF_CORE_MAX_GROUPS,
+    CHART_LINE_MAX_POINTS, CHART_SCATTER_MAX_POINTS, CHART_DENSITY_THRESHOLD,
+    CHART_DENSITY_BINS,
+)
+from .dataset_analyzer import DatasetAnalyzer, _count_empty, _format_empty_stats
+from .dataset_cache import DatasetCache, hash_file
+from .dataset_handler import DatasetError, sniff_encoding
+from .downsampling import reduce_line, reduce_scatter, density_grid
+from .dtype_optimizer import _is_text, _parse_dates
+from .sketches import DatasetSketch, MisraGries
+
+
+def _common_dtype(current, dtype):
+    """Get a type that holds the values of two chunks of the same column."""
+    if current is None or current == dtype:
+        return dtype
+    numeric = (
+        isinstance(current, np.dtype) and isinstance(dtype, np.dtype)
+        and np.issubdtype(current, np.number) and np.issubdtype(dtype, np.number)
+    )
+    return np.result_type(current, dtype) if numeric else np.dtype(object)
+
+
+class ChunkedDataset:
+    """A CSV file read one chunk of rows at a time, never as a whole."""
+
+    def __init__(self, file_path, encoding: str = None, chunksize: int = None,
+                 date_columns: list = None):
+        """
+        Open a CSV file and read its header.
+
+        Args:
+            file_path: Path to the CSV file.
+            encoding: Optional encoding override. Detected when not given.
+            chunksize: Rows per chunk. Defaults to CSV_CHUNK_SIZE.
+            date_columns: Text columns parsed as datetimes in every chunk.
+
+        Raises:
+            DatasetError: If the header cannot be parsed.
+        """
+        self.file_path = str(file_path)
+        self.encoding = encoding or sniff_encoding(self.file_path)
+        self.chunksize = chunksize or CSV_CHUNK_SIZE
+        self.date_columns = list(date_columns or [])
+        try:
+            self.columns = list(self.head(0).columns)
+        except Exception as e:
+            raise DatasetError(f"Failed to parse file: {str(e)}") from e
+
+    def head(self, rows: int) -> pd.DataFrame:
+        """Read the first rows of the file."""
+        return self._parse_dates(pd.read_csv(self.file_path, encoding=self.encoding, nrows=rows))
+
+    def page(self, offset: int, limit: int) -> pd.DataFrame:
+        """
+        Read a run of rows from the middle of the file.
+
+        Rows before the offset are still scanned, so the time grows with it,
+        but they are skipped as a count rather than a set of row numbers,
+        so memory does not.
+
+        Args:
+            offset: Number of rows to skip.
+            limit: Largest number of rows to read.
+        """
+        # Skip the header line too, and name the columns from it
+        return self._parse_dates(pd.read_csv(
+            self.file_path, encoding=self.encoding, skiprows=offset + 1, header=None,
+            names=self.columns, nrows=limit
+        ))
+
+    def chunks(self, columns: list = None):
+        """
+        Read the file chunk by chunk.
+
+        Args:
+            columns: Optional subset of columns to parse.
+
+        Yields:
+            DataFrames of at most chunksize rows, in file order.
+        """
+        if columns is not None:
+            # read_csv rejects repeated names in usecols
+            columns = list(dict.fromkeys(columns))
+        with pd.read_csv(self.file_path, encoding=self.encoding, usecols=columns,
+                         chunksize=self.chunksize) as reader:
+            for chunk in reader:
+                yield self._parse_dates(chunk)
+
+    def _parse_dates(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        for col in self.date_columns:
+            if col in chunk.columns:
+                chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+        return chunk
+
+
+class ChunkedAnalyzer(DatasetAnalyzer):
+    """
+    Summarizes a CSV file in one streaming pass without loading it.
+
+    The summary has the same layout as DatasetAnalyzer's. Row, null and
+    empty string counts, means, standard deviations and ranges are exact;
+    quartiles and distinct counts come from sketches. Memory is bounded by
+    the chunk size and the sketch sizes, not the file size.
+    """
+
+    def __init__(self, dataset: ChunkedDataset, summary: dict = None):
+        """
+        Initialize the analyzer.
+
+        Args:
+            dataset: The file to analyze.
+            summary: Optional summary from an earlier pass over the same file.
+        """
+        super().__init__(pd.DataFrame(columns=dataset.columns), summary=summary, stats_mode="approximate")
+        # Rows are read from the file on every pass and never kept
+        self.df = None
+        self.dataset = dataset
+
+    @property
+    def row_count(self) -> int:
+        """Get the number of rows in the dataset."""
+        return self.get_summary()["row_count"]
+
+    @property
+    def column_count(self) -> int:
+        """Get the number of columns in the dataset."""
+        return len(self.dataset.columns)
+
+    @property
+    def columns(self) -> list:
+        """Get the list of column names."""
+        return list(self.dataset.columns)
+
+    def get_empty_data_stats(self) -> dict:
+        """Get statistics about empty/null values in the dataset."""
+        return self.get_summary()["empty_data"]
+
+    def get_column_types(self) -> dict:
+        """Get the data type of each column, reconciled across chunks."""
+        return self.get_summary()["column_types"]
+
+    def get_basic_stats(self) -> dict:
+        """Get basic statistics for numerical columns."""
+        return self.get_summary()["basic_stats"]
+
+    def get_distinct_counts(self) -> dict:
+        """Get the estimated number of distinct non-missing values in each column."""
+        return self.get_summary()["distinct_counts"]
+
+    def get_memory_usage(self) -> dict:
+        """Get the memory held by the dataset, which stays on disk."""
+        return {"bytes": 0, "optimization": None}
+
+    def get_sketch(self) -> DatasetSketch:
+        """Get mergeable sketches of the dataset, re-reading the file if needed."""
+        if self._sketch is None:
+            self._sketch = DatasetSketch.from_chunks(self.dataset.chunks())
+        return self._sketch
+
+    def get_summary(self) -> dict:
+        """
+        Get a complete summary of the dataset, scanning the file on first use.
+
+        Raises:
+            DatasetError: If the file cannot be parsed.
+        """
+        if self._summary_cache is None:
+            try:
+                self._summary_cache = self._scan()
+            except UnicodeDecodeError:
+                # A byte past the sniffed sample did not decode; latin-1
+                # accepts every byte, so the second pass cannot fail on it
+                self.dataset.encoding = "latin-1"
+                self._summary_cache = self._scan()
+        return self._summary_cache
+
+    def _scan(self) -> dict:
+        """Build the summary in one pass, holding one chunk at a time."""
+        sketch = DatasetSketch()
+        null_counts = empty_counts = None
+        dtypes = {}
+        first_dtypes = {}
+        # Text columns stay date candidates, mapped to their parsed type,
+        # while every chunk parses as dates
+        dates = {}
+        sample = None
+
+        self.dataset.date_columns = []
+        try:
+            for chunk in self.dataset.chunks():
+                if sample is None:
+                    sample = chunk.head(5)
+                    first_dtypes = dict(chunk.dtypes.items())
+                sketch.update(chunk)
+                nulls, empties = _count_empty(chunk)
+                null_counts = nulls if null_counts is None else null_counts + nulls
+                empty_counts = empties if empty_counts is None else empty_counts + empties
+
+                for col in chunk.columns:
+                    values = chunk[col]
+                    if values.isna().all():
+                        # An all-empty chunk parses as float whatever the column holds
+                        continue
+                    dtypes[col] = _common_dtype(dtypes.get(col), values.dtype)
+                    if dates.get(col, True):
+                        parsed = _parse_dates(values) if _is_text(values) else None
+                        dates[col] = parsed.dtype if parsed is not None else False
+        except pd.errors.ParserError as e:
+            raise DatasetError(f"Failed to parse file: {str(e)}") from e
+
+        if sample is None:
+            raise DatasetError("The file has no rows")
+
+        date_columns = [col for col, dtype in dates.items() if dtype is not False]
+        self.dataset.date_columns = date_columns
+        column_types = {}
+        for col in self.columns:
+            dtype = dates[col] if col in date_columns else dtypes.get(col, first_dtypes[col])
+            column_types[col] = str(dtype)
+
+        # Keep describe()'s numeric columns: the sketch fixed each column's
+        # kind from its first chunk, before later chunks could turn it to text
+        numeric = {
+            col for col in self.columns
+            if pd.api.types.is_numeric_dtype(dtypes.get(col, first_dtypes[col]))
+            and not pd.api.types.is_bool_dtype(dtypes.get(col, first_dtypes[col]))
+        }
+        self._sketch = sketch
+        row_count = sketch.row_count
+        return {
+            "row_count": row_count,
+            "column_count": self.column_count,
+            "columns": self.columns,
+            "column_types": column_types,
+            "empty_data": _format_empty_stats(null_counts, empty_counts, row_count),
+            "basic_stats": {
+                col: stats for col, stats in sketch.basic_stats().items() if col in numeric
+            },
+            "distinct_counts": sketch.distinct_counts(),
+            "stats_approximate": True,
+            "memory": self.get_memory_usage(),
+            "sample_data": sample.to_dict(orient="records"),
+            "out_of_core": {
+                "file_bytes": os.path.getsize(self.dataset.file_path),
+                "encoding": self.dataset.encoding,
+                "date_columns": date_columns,
+            },
+        }
+
+    def get_column_profile(self, column) -> dict:
+        """
+        Column profiles are not supported for datasets analyzed from disk.
+
+        Raises:
+            DatasetError: Always.
+        """
+        raise DatasetError("Column profiles are not available for datasets analyzed out of core")
+
+    def append(self, chunk: pd.DataFrame) -> dict:
+        """
+        Appending is not supported for datasets analyzed from disk.
+
+        Raises:
+            DatasetError: Always.
+        """
+        raise DatasetError("Rows cannot be appended to a dataset analyzed out of core")
+
+
+class ChunkedChartRenderer(ChartRenderer):
+    """
+    Renders charts from a CSV file by partial aggregation over its chunks.
+
+    Each chart reads only its own columns, one chunk at a time, and merges
+    per-chunk aggregates: sums and counts for group means, bin counts over
+    the summary's exact min and max for histograms and density plots, and
+    point-reduced chunks for line and scatter charts.
+    """
+
+    def __init__(self, dataset: ChunkedDataset, summary: dict):
+        """
+        Initialize with a file and its summary from ChunkedAnalyzer.
+
+        Args:
+            dataset: The file to plot.
+            summary: The file's summary, for column types and value ranges.
+        """
+        super().__init__(None)
+        self.dataset = dataset
+        self.summary = summary
+
+    @property
+    def columns(self) -> list:
+        """Names of the columns that can be plotted."""
+        return list(self.dataset.columns)
+
+    def _numeric_columns(self) -> list:
+        return [col for col in self.columns if col in self.summary["basic_stats"]]
+
+    def _categorical_columns(self) -> list:
+        column_types = self.summary["column_types"]
+        return [col for col in self.columns if column_types[col] in ("object", "str", "category")]
+
+    def _range(self, column):
+        """Exact (min, max) of a numeric column, or None."""
+        stats = self.summary["basic_stats"].get(column)
+        if stats is None or stats["min"] is None:
+            return None
+        return stats["min"], stats["max"]
+
+    def _grouped(self, x_col, y_col, limit: int, aggregations: list) -> pd.DataFrame:
+        """
+        Sum per-chunk aggregates of y_col by x_col, keeping the first `limit` keys.
+
+        Groups come out sorted by key and the charts only show the first
+        `limit`, so a key with `limit` smaller keys already seen can never be
+        shown and is dropped. Memory stays bounded by the chunk size.
+        """
+        total = None
+        for chunk in self.dataset.chunks([x_col, y_col]):
+            partial = chunk.groupby(x_col)[y_col].agg(aggregations)
+            total = partial if total is None else total.add(partial, fill_value=0)
+            total = total.sort_index().head(limit)
+        if total is None:
+            return pd.DataFrame(columns=aggregations)
+        return total
+
+    def _group_mean(self, x_col, y_col, limit: int) -> pd.Series:
+        total = self._grouped(x_col, y_col, limit, ["sum", "count"])
+        return total["sum"] / total["count"]
+
+    def _group_sum(self, x_col, y_col, limit: int) -> pd.Series:
+        return self._grouped(x_col, y_col, limit, ["sum"])["sum"]
+
+    def _value_counts(self, column, limit: int) -> pd.Series:
+        # Misra-Gries is exact while a column has at most k distinct values
+        # and undercounts by at most rows / (k + 1) beyond that
+        counter = MisraGries(OUT_OF_CORE_MAX_GROUPS)
+        for chunk in self.dataset.chunks([column]):
+            counter.update(chunk[column])
+        top = counter.top(limit)
+        return pd.Series([count for _, count in top], index=[value for value, _ in top], name="count")
+
+    def _histogram(self, column, bins: int):
+        value_range = self._range(column)
+        if value_range is None:
+            return None
+        edges = np.histogram_bin_edges([], bins=bins, range=value_range)
+        counts = np.zeros(bins, dtype=np.int64)
+        for chunk in self.dataset.chunks([column]):
+            values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=float)
+            counts += np.histogram(values[~np.isnan(values)], bins=edges)[0]
+        return counts, edges
+
+    def _line_points(self, x_col, y_col) -> pd.DataFrame:
+        # LTTB within each chunk, then over the concatenated selections
+        pieces = [
+            reduce_line(chunk[[x_col, y_col]].dropna(), x_col, y_col, CHART_LINE_MAX_POINTS)
+            for chunk in self.dataset.chunks([x_col, y_col])
+        ]
+        return reduce_line(pd.concat(pieces, ignore_index=True), x_col, y_col, CHART_LINE_MAX_POINTS)
+
+    def _scatter_grid(self, x_col, y_col):
+        x_range, y_range = self._range(x_col), self._range(y_col)
+        if x_range is None or y_range is None:
+            return None
+        basic_stats = self.summary["basic_stats"]
+        # Rows with both values present number at most the smaller count
+        if min(basic_stats[x_col]["count"], basic_stats[y_col]["count"]) <= CHART_DENSITY_THRESHOLD:
+            return None
+
+        counts = None
+        for chunk in self.dataset.chunks([x_col, y_col]):
+            grid, x_edges, y_edges = density_grid(
+                pd.to_numeric(chunk[x_col], errors="coerce").to_numpy(dtype=float),
+                pd.to_numeric(chunk[y_col], errors="coerce").to_numpy(dtype=float),
+                CHART_DENSITY_BINS, x_range=x_range, y_range=y_range,
+            )
+            counts = grid if counts is None else counts + grid
+        return counts, x_edges, y_edges
+
+    def _scatter_points(self, x_col, y_col) -> pd.DataFrame:
+        # Each chunk keeps a share of the budget proportional to its rows
+        rows = max(self.summary["row_count"], 1)
+        pieces = []
+        for chunk in self.dataset.chunks([x_col, y_col]):
+            budget = max(1, int(np.ceil(CHART_SCATTER_MAX_POINTS * len(chunk) / rows)))
+            pieces.append(reduce_scatter(chunk[[x_col, y_col]].dropna(), x_col, y_col, budget))
+        return pd.concat(pieces, ignore_index=True)
+
+
+class ChunkedChartGenerator(ChunkedChartRenderer, ChartGenerator):
+    """Generates AI-suggested charts for a dataset analyzed out of core."""
+
+    def __init__(self, analyzer: ChunkedAnalyzer):
+        """Initialize with an out-of-core analyzer."""
+        ChartGenerator.__init__(self, None, analyzer)
+        self.dataset = analyzer.dataset
+        self.summary = analyzer.get_summary()
+
+    def _render_many(self, configs: list, mode: str = None, source=None) -> list:
+        # Every chart streams the file, so they render one after another
+        # rather than multiplying disk reads and chunk memory
+        return [self.render_png(config) for config in configs]
+
+
+class ChunkedStore(DatasetCache):
+    """
+    Keeps uploaded CSV files for out-of-core sessions alongside their
+    summaries, evicting the least recently used beyond a disk budget.
+    """
+
+    FRAME_SUFFIX = ".csv"
+
+    def __init__(self, store_dir: str = None, max_bytes: int = None):
+        """
+        Initialize the store.
+
+        Args:
+            store_dir: Directory for stored files. Defaults to OUT_OF_CORE_DIR.
+            max_bytes: Disk budget in bytes. Defaults to OUT_OF_CORE_MAX_BYTES.
+                A budget of 0 disables out-of-core mode.
+        """
+        super().__init__(
+            store_dir or OUT_OF_CORE_DIR,
+            OUT_OF_CORE_MAX_BYTES if max_bytes is None else max_bytes,
+            storage_mode="memory",
+        )
+
+    def get(self, key: str):
+        """
+        Open a stored file.
+
+        Args:
+            key: The content hash from hash_file.
+
+        Returns:
+            A ChunkedAnalyzer with the stored summary, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        frame_path = self._frame_path(key)
+        summary_path = self._summary_path(key)
+        try:
+            with open(summary_path, encoding="utf-8") as f:
+                summary = json.load(f)
+            info = summary["out_of_core"]
+            dataset = ChunkedDataset(frame_path, encoding=info["encoding"],
+                                     date_columns=info["date_columns"])
+        except (OSError, ValueError, KeyError, DatasetError):
+            return None
+
+        for path in (frame_path, summary_path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return ChunkedAnalyzer(dataset, summary=summary)
+
+    def put(self, key: str, file_path: str) -> ChunkedAnalyzer:
+        """
+        Move an uploaded file into the store and summarize it.
+
+        Args:
+            key: The content hash from hash_file.
+            file_path: The uploaded file, which is moved rather than copied.
+
+        Returns:
+            A ChunkedAnalyzer reading the stored file.
+
+        Raises:
+            DatasetError: If the file cannot be parsed.
+        """
+        frame_path = self._frame_path(key)
+        self._write_atomic(frame_path, lambda path: shutil.move(file_path, path))
+        try:
+            analyzer = ChunkedAnalyzer(ChunkedDataset(frame_path))
+            summary = analyzer.get_summary()
+        except Exception:
+            self._remove(key)
+            raise
+
+        try:
+            self._write_atomic(self._summary_path(key), lambda path: self._write_summary(path, summary))
+        except Exception as e:
+            print(f"Out-of-core store write error: {e}")
+        self._evict(keep=key)
+        return analyzer
+
+
+def open_out_of_core(file_path: str, store: ChunkedStore, key: str = None) -> tuple:
+    """
+    Analyze a large CSV file from disk, reusing a stored summary if present.
+
+    Args:
+        file_path: Path to the uploaded CSV file. It is moved into the store
+            unless the store already holds the same contents.
+        store: The ChunkedStore keeping files for later passes.
+        key: The file's content hash, if already computed while receiving it.
+
+    Returns:
+        A tuple of (content hash, ChunkedAnalyzer).
+
+    Raises:
+        DatasetError: If the store is disabled or the file cannot be parsed.
+    """
+    if not store.enabled:
+        raise DatasetError("Out-of-core analysis is disabled (OUT_OF_CORE_MAX_MB is 0)")
+    if key is None:
+        key = hash_file(file_path)
+    analyzer = store.get(key)
+    if analyzer is None:
+        analyzer = store.put(key, file_path)
+    return key, analyzer
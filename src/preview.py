@@ -0,0 +1,191 @@
+"""Paged, sorted and filtered views of a dataset for the preview table."""
+
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .config import PREVIEW_CACHE_ENTRIES
+from .query_engine import QueryPlanError, filter_mask, validate_plan
+
+
+class ViewCache:
+    """
+    Row positions of sorted and filtered views, least recently used first.
+
+    Building a view sorts or scans the whole dataset; paging through it
+    afterwards only slices the cached positions, so each page costs the
+    same however large the dataset is.
+    """
+
+    def __init__(self, max_entries: int = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Views kept. Defaults to PREVIEW_CACHE_ENTRIES.
+        """
+        self.max_entries = max_entries or PREVIEW_CACHE_ENTRIES
+        self._entries = OrderedDict()
+        # Reentrant, since building a view gets the column's sort order;
+        # held while building so concurrent requests sort only once
+        self._lock = threading.RLock()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the cached positions."""
+        with self._lock:
+            return sum(positions.nbytes for positions in self._entries.values())
+
+    def get(self, key, build) -> np.ndarray:
+        """
+        Get a view's row positions, building them on a miss.
+
+        Args:
+            key: A hashable description of the view.
+            build: Function returning the positions.
+
+        Returns:
+            The positions.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            positions = build()
+            self._entries[key] = positions
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return positions
+
+    def clear(self):
+        """Forget every view, e.g. after rows were appended."""
+        with self._lock:
+            self._entries.clear()
+
+
+def _compact(positions: np.ndarray) -> np.ndarray:
+    """Store positions as 32-bit integers when they fit, halving their memory."""
+    if len(positions) < np.iinfo(np.int32).max:
+        return positions.astype(np.int32)
+    return positions
+
+
+def sort_order(values: pd.Series) -> np.ndarray:
+    """
+    Get the positions that sort a column ascending, with missing values last.
+
+    The sort is stable. Columns mixing types that cannot be compared, such
+    as numbers and text in one object column, are sorted by their text.
+
+    Args:
+        values: The column.
+
+    Returns:
+        An array of row positions.
+    """
+    values = values.reset_index(drop=True)
+    try:
+        ordered = values.sort_values(kind="stable", na_position="last")
+    except TypeError:
+        ordered = values.astype(str).where(values.notna()).sort_values(kind="stable", na_position="last")
+    return _compact(ordered.index.to_numpy())
+
+
+def parse_filters(text: str, df: pd.DataFrame) -> list:
+    """
+    Parse and validate preview filters.
+
+    Args:
+        text: A JSON list of {"column", "op", "value"} objects, using the
+            operators of query plans (==, !=, >, >=, <, <=, in, not_in,
+            between, contains, is_null, not_null). Empty means no filter.
+        df: The dataset being filtered.
+
+    Returns:
+        The normalized filters.
+
+    Raises:
+        QueryPlanError: If the filters are malformed or name unknown columns.
+    """
+    if not text:
+        return []
+    try:
+        filters = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise QueryPlanError(f"Invalid filters: {e}") from e
+    if not isinstance(filters, list):
+        raise QueryPlanError("Filters must be a JSON list")
+    return validate_plan({"filters": filters}, df)["filters"]
+
+
+def view_positions(df: pd.DataFrame, cache: ViewCache, sort=None,
+                   descending: bool = False, filters: list = None):
+    """
+    Get the row positions of a sorted and filtered view, from the cache.
+
+    Ascending sort orders are cached per column and shared by every view
+    sorted by that column. Descending views reverse them, keeping missing
+    values last, so tied rows appear in reverse row order.
+
+    Args:
+        df: The dataset.
+        cache: The dataset's ViewCache.
+        sort: Optional column to sort by.
+        descending: Whether to sort in descending order.
+        filters: Optional filters from parse_filters().
+
+    Returns:
+        An array of row positions, or None for the dataset in row order.
+
+    Raises:
+        QueryPlanError: If a filter value does not fit its column.
+    """
+    if sort is None and not filters:
+        return None
+    filters = filters or []
+
+    def build_view():
+        if sort is None:
+            return _compact(np.flatnonzero(filter_mask(df, filters)))
+
+        positions = cache.get(("order", sort), lambda: sort_order(df[sort]))
+        if descending:
+            present = len(positions) - int(df[sort].isna().sum())
+            positions = np.concatenate([positions[:present][::-1], positions[present:]])
+        if filters:
+            positions = positions[filter_mask(df, filters)[positions]]
+        return positions
+
+    if sort is not None and not descending and not filters:
+        return cache.get(("order", sort), lambda: sort_order(df[sort]))
+    key = ("view", sort, descending, json.dumps(filters, sort_keys=True, default=str))
+    return cache.get(key, build_view)
+
+
+def preview_page(df: pd.DataFrame, cache: ViewCache, offset: int, limit: int,
+                 sort=None, descending: bool = False, filters: list = None) -> tuple:
+    """
+    Get one page of a sorted and filtered view of the dataset.
+
+    Args:
+        df: The dataset.
+        cache: The dataset's ViewCache.
+        offset: Position of the first row of the page within the view.
+        limit: Largest number of rows on the page.
+        sort: Optional column to sort by.
+        descending: Whether to sort in descending order.
+        filters: Optional filters from parse_filters().
+
+    Returns:
+        A tuple of (page rows, number of rows in the view).
+
+    Raises:
+        QueryPlanError: If a filter value does not fit its column.
+    """
+    positions = view_positions(df, cache, sort, descending, filters)
+    if positions is None:
+        return df.iloc[offset:offset + limit], len(df)
+    return df.iloc[positions[offset:offset + limit]], len(positions)
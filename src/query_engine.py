@@ -0,0 +1,397 @@
+"""Restricted query plans executed against a dataset with pandas."""
+
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from .config import CONTEXT_TOKEN_BUDGET, QUERY_MAX_RESULT_ROWS
+from .context_builder import estimate_tokens, shorten
+from .intent_router import normalize
+
+# Comparison operators a plan may use in its filters
+FILTER_OPS = {
+    "==", "!=", ">", ">=", "<", "<=",
+    "in", "not_in", "between", "contains", "is_null", "not_null",
+}
+
+# Aggregations a plan may apply, mapped to their pandas names
+AGGREGATIONS = {
+    "count": "count",
+    "sum": "sum",
+    "mean": "mean",
+    "median": "median",
+    "min": "min",
+    "max": "max",
+    "std": "std",
+    "nunique": "nunique",
+}
+
+# Aggregations that only make sense on numbers
+NUMERIC_AGGREGATIONS = {"sum", "mean", "median", "std"}
+
+PLAN_KEYS = {"filters", "group_by", "aggregations", "select", "sort", "limit"}
+
+
+class QueryPlanError(ValueError):
+    """Raised when a query plan is malformed or refers to unknown columns."""
+    pass
+
+
+def parse_plan(text: str):
+    """
+    Extract a query plan from a model response.
+
+    Args:
+        text: The response text, which may wrap the JSON in prose or fences.
+
+    Returns:
+        The plan dictionary, or None if the model said no query is needed.
+
+    Raises:
+        QueryPlanError: If no JSON object can be parsed.
+    """
+    match = re.search(r'\{[\s\S]*\}', text)
+    if not match:
+        raise QueryPlanError("No JSON object in the response")
+    try:
+        data = json.loads(match.group())
+    except json.JSONDecodeError as e:
+        raise QueryPlanError(f"Invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise QueryPlanError("The plan must be a JSON object")
+    if "plan" in data:
+        data = data["plan"]
+    return data or None
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _check_column(df: pd.DataFrame, column):
+    if not isinstance(column, str) or column not in df.columns:
+        raise QueryPlanError(f"Unknown column: {column!r}")
+    return column
+
+
+def validate_plan(plan: dict, df: pd.DataFrame) -> dict:
+    """
+    Check a query plan against the dataset and normalize it.
+
+    A plan may only filter, group, aggregate, select, sort and limit. Every
+    column must exist and every operator must be on the allow list, so
+    executing a plan never evaluates model-written code.
+
+    Args:
+        plan: The plan, e.g. from parse_plan().
+        df: The dataset the plan will run against.
+
+    Returns:
+        The normalized plan, with every section present.
+
+    Raises:
+        QueryPlanError: If the plan is invalid.
+    """
+    if not isinstance(plan, dict):
+        raise QueryPlanError("The plan must be a JSON object")
+    unknown = set(plan) - PLAN_KEYS
+    if unknown:
+        raise QueryPlanError(f"Unknown plan keys: {sorted(unknown)}")
+
+    filters = []
+    for item in _as_list(plan.get("filters")):
+        if not isinstance(item, dict):
+            raise QueryPlanError("Each filter must be an object")
+        op = item.get("op")
+        if op not in FILTER_OPS:
+            raise QueryPlanError(f"Unsupported filter operator: {op!r}")
+        value = item.get("value")
+        if op in ("in", "not_in") and not isinstance(value, list):
+            raise QueryPlanError(f"'{op}' needs a list value")
+        if op == "between" and not (isinstance(value, list) and len(value) == 2):
+            raise QueryPlanError("'between' needs a [low, high] value")
+        filters.append({"column": _check_column(df, item.get("column")), "op": op, "value": value})
+
+    group_by = [_check_column(df, col) for col in _as_list(plan.get("group_by"))]
+
+    aggregations = []
+    for item in _as_list(plan.get("aggregations")):
+        if not isinstance(item, dict):
+            raise QueryPlanError("Each aggregation must be an object")
+        func = item.get("func")
+        if func not in AGGREGATIONS:
+            raise QueryPlanError(f"Unsupported aggregation: {func!r}")
+        column = item.get("column")
+        if column is None and func == "count":
+            column = "*"
+        elif func in NUMERIC_AGGREGATIONS:
+            if not pd.api.types.is_numeric_dtype(df[_check_column(df, column)]):
+                raise QueryPlanError(f"'{func}' needs a numeric column, got {column!r}")
+        else:
+            _check_column(df, column)
+        name = item.get("as") or (f"{func}_{column}" if column != "*" else "count")
+        aggregations.append({"column": column, "func": func, "as": str(name)})
+
+    if group_by and not aggregations:
+        aggregations.append({"column": "*", "func": "count", "as": "count"})
+
+    select = [_check_column(df, col) for col in _as_list(plan.get("select"))]
+
+    # Sorting may use any column of the result
+    if aggregations:
+        output_columns = set(group_by) | {a["as"] for a in aggregations}
+    else:
+        output_columns = set(select or df.columns)
+    sort = []
+    for item in _as_list(plan.get("sort")):
+        if isinstance(item, str):
+            item = {"column": item}
+        if not isinstance(item, dict) or item.get("column") not in output_columns:
+            raise QueryPlanError(f"Cannot sort by {item!r}")
+        sort.append({"column": item["column"], "descending": bool(item.get("descending", False))})
+
+    limit = plan.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise QueryPlanError(f"Invalid limit: {limit!r}")
+        if limit < 1:
+            raise QueryPlanError("The limit must be positive")
+
+    return {
+        "filters": filters,
+        "group_by": group_by,
+        "aggregations": aggregations,
+        "select": select,
+        "sort": sort,
+        "limit": limit,
+    }
+
+
+def _as_year(value):
+    """The year named by an integer or all-digit string such as 2000 or "2000", or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value.strip())
+    return value if isinstance(value, int) else None
+
+
+def _coerce_date(series: pd.Series, value) -> pd.Timestamp:
+    """Convert a plan value to a timestamp for a datetime column."""
+    # Bare numbers would count nanoseconds since 1970; years are handled
+    # by _filter_mask, so any other number is a mistake
+    if not isinstance(value, (str, pd.Timestamp)):
+        raise QueryPlanError(f"{value!r} is not a date or year")
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        raise QueryPlanError(f"{value!r} is not a date or year")
+
+    tz = series.dt.tz
+    if tz is not None and timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(tz)
+    return timestamp
+
+
+def _coerce(series: pd.Series, value):
+    """Convert a plan value to the column's type so comparisons are exact."""
+    if isinstance(value, list):
+        return [_coerce(series, v) for v in value]
+    if value is None:
+        return value
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return _coerce_date(series, value)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise QueryPlanError(f"{value!r} is not a number")
+    return value
+
+
+def _filter_mask(df: pd.DataFrame, item: dict) -> pd.Series:
+    series = df[item["column"]]
+    op = item["op"]
+    if op == "is_null":
+        return series.isna()
+    if op == "not_null":
+        return series.notna()
+    if op == "contains":
+        return series.astype("string").str.contains(str(item["value"]), case=False, regex=False, na=False)
+
+    value = item["value"]
+    years = [_as_year(v) for v in _as_list(value)]
+    if pd.api.types.is_datetime64_any_dtype(series) and years and None not in years:
+        # "released after 2000" compares years, so all of 2000 is excluded
+        series = series.dt.year
+        value = years if isinstance(value, list) else years[0]
+    else:
+        value = _coerce(series, value)
+    if op == "==":
+        return series == value
+    if op == "!=":
+        return series != value
+    if op == ">":
+        return series > value
+    if op == ">=":
+        return series >= value
+    if op == "<":
+        return series < value
+    if op == "<=":
+        return series <= value
+    if op == "in":
+        return series.isin(value)
+    if op == "not_in":
+        return ~series.isin(value)
+    low, high = value
+    return series.between(low, high)
+
+
+def filter_mask(df: pd.DataFrame, filters: list) -> np.ndarray:
+    """
+    Evaluate validated filters as one boolean row mask.
+
+    Args:
+        df: The dataset.
+        filters: The 'filters' section of a plan returned by validate_plan().
+
+    Returns:
+        A boolean array, True for rows matching every filter.
+
+    Raises:
+        QueryPlanError: If a filter value does not fit its column.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for item in filters:
+        try:
+            mask &= _filter_mask(df, item).fillna(False).to_numpy(dtype=bool)
+        except QueryPlanError:
+            raise
+        except (TypeError, ValueError) as e:
+            # e.g. a list compared with '==', or a scalar 'in' a number column
+            raise QueryPlanError(f"Cannot compare {item['column']!r} with {item['value']!r}: {e}")
+    return mask
+
+
+def execute_plan(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """
+    Run a validated query plan with vectorized pandas operations.
+
+    Args:
+        df: The dataset.
+        plan: A plan returned by validate_plan().
+
+    Returns:
+        The result table.
+
+    Raises:
+        QueryPlanError: If a filter value does not fit its column.
+    """
+    rows = df[filter_mask(df, plan["filters"])] if plan["filters"] else df
+
+    if plan["aggregations"]:
+        named = {}
+        for agg in plan["aggregations"]:
+            if agg["column"] == "*":
+                # Count rows, including ones with missing values
+                named[agg["as"]] = pd.NamedAgg(column=rows.columns[0], aggfunc="size")
+            else:
+                named[agg["as"]] = pd.NamedAgg(column=agg["column"], aggfunc=AGGREGATIONS[agg["func"]])
+        if plan["group_by"]:
+            result = rows.groupby(plan["group_by"], observed=True, dropna=False).agg(**named).reset_index()
+        else:
+            values = {}
+            for name, agg in named.items():
+                values[name] = len(rows) if agg.aggfunc == "size" else rows[agg.column].agg(agg.aggfunc)
+            result = pd.DataFrame([values])
+    else:
+        result = rows[plan["select"]] if plan["select"] else rows
+
+    if plan["sort"]:
+        result = result.sort_values(
+            [s["column"] for s in plan["sort"]],
+            ascending=[not s["descending"] for s in plan["sort"]],
+            kind="stable",
+        )
+    if plan["limit"] is not None:
+        result = result.head(plan["limit"])
+    return result
+
+
+def format_result(result: pd.DataFrame, max_rows: int = None, max_cell_chars: int = 40) -> str:
+    """
+    Render a query result as compact text for a prompt.
+
+    Args:
+        result: The table from execute_plan().
+        max_rows: Rows shown before truncating. Defaults to QUERY_MAX_RESULT_ROWS.
+        max_cell_chars: Longest text kept for a single cell.
+
+    Returns:
+        A header line, then pipe-separated rows.
+    """
+    max_rows = max_rows or QUERY_MAX_RESULT_ROWS
+
+    def cell(value):
+        if isinstance(value, (float, np.floating)):
+            return "" if np.isnan(value) else f"{value:.6g}"
+        if value is None or value is pd.NA or value is pd.NaT:
+            return ""
+        return shorten(value, max_cell_chars)
+
+    lines = [f"{len(result)} row(s)"]
+    lines.append(" | ".join(shorten(c, max_cell_chars) for c in result.columns))
+    for row in result.head(max_rows).itertuples(index=False):
+        lines.append(" | ".join(cell(v) for v in row))
+    if len(result) > max_rows:
+        lines.append(f"... {len(result) - max_rows} more rows not shown")
+    return "\n".join(lines)
+
+
+def describe_schema(df: pd.DataFrame, question: str = None, max_tokens: int = None,
+                    max_name_chars: int = 80) -> str:
+    """
+    List the columns and their types for the planning prompt, within a
+    token budget.
+
+    Columns named in the question come first, then the rest in dataset
+    order until the budget is used; the columns left out are counted on a
+    last line.
+
+    Args:
+        df: The dataset.
+        question: Optional question, whose columns are listed first.
+        max_tokens: The token budget. Defaults to CONTEXT_TOKEN_BUDGET.
+        max_name_chars: Longest column name listed in full.
+
+    Returns:
+        One "- name (dtype)" line per listed column.
+    """
+    max_tokens = max_tokens or CONTEXT_TOKEN_BUDGET
+    types = dict(zip(df.columns, df.dtypes.astype(str)))
+    columns = list(types)
+    if question:
+        padded = f" {normalize(question)} "
+        named = [col for col in columns if normalize(col) and f" {normalize(col)} " in padded]
+        columns = named + [col for col in columns if col not in named]
+
+    lines = []
+    used = 0
+    for col in columns:
+        line = f"- {shorten(col, max_name_chars)} ({types[col]})"
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    if len(lines) < len(columns):
+        lines.append(f"... and {len(columns) - len(lines)} more columns")
+    return "\n".join(lines)
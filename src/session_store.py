@@ -0,0 +1,269 @@
+"""Per-session dataset storage with least-recently-used eviction."""
+
+import json
+import re
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import SESSION_MEMORY_BUDGET_BYTES, SESSION_INDEX_DIR, SESSION_INDEX_TTL_SECONDS
+
+# Tokens are generated by new_token(); anything else is rejected before it
+# reaches the filesystem
+_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{32,64}$")
+
+
+def is_shared_column(values: pd.Series) -> bool:
+    """
+    Check whether a column only views read-only buffers, such as the pages
+    of a memory-mapped dataset file, rather than owning private memory.
+    """
+    array = values.array
+    if isinstance(array, pd.arrays.ArrowExtensionArray):
+        chunks = array.__arrow_array__().chunks
+        return bool(chunks) and not any(
+            buffer.is_mutable
+            for chunk in chunks
+            for buffer in chunk.buffers()
+            if buffer is not None
+        )
+    data = array.codes if isinstance(array, pd.Categorical) else np.asarray(array)
+    return not data.flags.writeable
+
+
+def session_memory(session: dict) -> int:
+    """
+    Measure the private memory held by a session's DataFrame.
+
+    Columns memory-mapped from the dataset cache are shared with every
+    other process and stay in the page cache, so they are not counted.
+    Cached preview views and the exact statistics kept for appends are.
+
+    Args:
+        session: A session dictionary with a 'df' entry.
+
+    Returns:
+        The deep memory usage of the DataFrame's private columns in bytes.
+    """
+    df = session.get("df")
+    if df is None:
+        return 0
+    usage = df.memory_usage(deep=True)
+    shared = [
+        i + 1 for i in range(len(df.columns)) if is_shared_column(df.iloc[:, i])
+    ]
+    stats_bytes = getattr(session.get("analyzer"), "stats_bytes", 0)
+    return int(usage.sum() - usage.iloc[shared].sum()) + view_memory(session) + stats_bytes
+
+
+def view_memory(session: dict) -> int:
+    """Measure the memory held by a session's cached preview views."""
+    views = getattr(session.get("analyzer"), "view_cache", None)
+    return views.nbytes if views is not None else 0
+
+
+class SessionStore:
+    """
+    Holds one dataset session per token and evicts the least recently used
+    sessions once their DataFrames exceed a memory budget.
+
+    Each session is a dictionary with 'df', 'analyzer', 'chat_service',
+    'filename' and 'dataset_key' entries. The dataset key and filename are
+    also written to a small on-disk index so a session evicted here, or
+    created by another worker process, can be restored from the dataset cache.
+    Index entries unused for longer than the TTL are deleted.
+    """
+
+    def __init__(self, max_bytes: int = None, index_dir: str = None,
+                 ttl_seconds: int = None):
+        """
+        Initialize the store.
+
+        Args:
+            max_bytes: Memory budget in bytes. Defaults to SESSION_MEMORY_BUDGET_BYTES.
+            index_dir: Directory for the session index. Defaults to SESSION_INDEX_DIR.
+            ttl_seconds: How long an unused index entry is kept. Defaults to
+                SESSION_INDEX_TTL_SECONDS.
+        """
+        self.max_bytes = SESSION_MEMORY_BUDGET_BYTES if max_bytes is None else max_bytes
+        self.index_dir = Path(index_dir or SESSION_INDEX_DIR)
+        self.ttl_seconds = SESSION_INDEX_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._sessions = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def new_token() -> str:
+        """Generate a new unguessable session token."""
+        return secrets.token_urlsafe(32)
+
+    @staticmethod
+    def is_valid_token(token: str) -> bool:
+        """Check that a client-supplied token has the expected shape."""
+        return bool(token) and bool(_TOKEN_PATTERN.match(token))
+
+    @property
+    def total_bytes(self) -> int:
+        """Memory currently attributed to stored sessions."""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, token: str):
+        """
+        Get a session and mark it as most recently used.
+
+        Args:
+            token: The session token.
+
+        Returns:
+            The session dictionary, or None if it is not held in memory.
+        """
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is not None:
+                self._sessions.move_to_end(token)
+        if session is not None:
+            self._touch_index(token, session)
+        return session
+
+    def put(self, token: str, session: dict):
+        """
+        Store a session, replacing any existing one for the token, and evict
+        least recently used sessions until the store fits its budget.
+
+        The session being stored is never evicted, even if it alone exceeds
+        the budget.
+
+        Args:
+            token: The session token.
+            session: The session dictionary.
+        """
+        session["memory_bytes"] = session_memory(session)
+        session["view_bytes"] = view_memory(session)
+
+        with self._lock:
+            self._discard(token)
+            self._sessions[token] = session
+            self._total_bytes += session["memory_bytes"]
+            self._evict_over_budget()
+
+        self._purge_expired()
+        if session.get("dataset_key"):
+            self._write_index(token, session)
+
+    def update_views(self, token: str):
+        """
+        Account for preview views a session cached or dropped since it was
+        stored, evicting other sessions if it no longer fits the budget.
+
+        Only the views are re-measured, so this is cheap enough to call
+        after every preview request.
+
+        Args:
+            token: The session token.
+        """
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return
+            view_bytes = view_memory(session)
+            growth = view_bytes - session.get("view_bytes", 0)
+            if growth == 0:
+                return
+            session["view_bytes"] = view_bytes
+            session["memory_bytes"] = session.get("memory_bytes", 0) + growth
+            self._total_bytes += growth
+            self._sessions.move_to_end(token)
+            self._evict_over_budget()
+
+    def _evict_over_budget(self):
+        """Evict least recently used sessions, never the newest, until within budget."""
+        while self._total_bytes > self.max_bytes and len(self._sessions) > 1:
+            oldest = next(iter(self._sessions))
+            self._discard(oldest)
+
+    def pop(self, token: str):
+        """
+        Remove a session from memory and from the on-disk index.
+
+        Args:
+            token: The session token.
+
+        Returns:
+            The removed session dictionary, or None.
+        """
+        with self._lock:
+            session = self._discard(token)
+        try:
+            self._index_path(token).unlink()
+        except OSError:
+            pass
+        return session
+
+    def get_index(self, token: str):
+        """
+        Read the persisted dataset reference for a session.
+
+        Args:
+            token: The session token.
+
+        Returns:
+            A dictionary with 'dataset_key' and 'filename', or None.
+        """
+        try:
+            with open(self._index_path(token), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _discard(self, token: str):
+        session = self._sessions.pop(token, None)
+        if session is not None:
+            self._total_bytes -= session.get("memory_bytes", 0)
+        return session
+
+    def _index_path(self, token: str) -> Path:
+        return self.index_dir / f"{token}.json"
+
+    def _write_index(self, token: str, session: dict):
+        try:
+            with open(self._index_path(token), "w", encoding="utf-8") as f:
+                json.dump(
+                    {"dataset_key": session["dataset_key"], "filename": session.get("filename")},
+                    f,
+                )
+            session["index_touched"] = time.time()
+        except OSError as e:
+            print(f"Session index write error: {e}")
+
+    def _touch_index(self, token: str, session: dict):
+        """Keep the index entry of a session in use from expiring."""
+        now = time.time()
+        # At most a few writes per TTL rather than one per request
+        if not session.get("dataset_key") or now - session.get("index_touched", 0) < self.ttl_seconds / 10:
+            return
+        try:
+            os.utime(self._index_path(token))
+            session["index_touched"] = now
+        except OSError:
+            # Purged, e.g. by another worker process; write it again
+            self._write_index(token, session)
+
+    def _purge_expired(self):
+        """Delete index entries not used for longer than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for path in self.index_dir.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
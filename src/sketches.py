@@ -0,0 +1,616 @@
+"""
+Mergeable sketches for approximate dataset statistics.
+
+Each sketch is updated one chunk at a time and can be merged with another
+sketch of the same kind, so statistics for data larger than memory can be
+built while streaming, or computed per chunk in parallel and combined.
+
+Error bounds, for n values seen:
+
+- KLLSketch (quantiles): with k=200 the rank of a returned quantile is
+  within about 1.3% of n of the requested rank, with 99% confidence.
+  Error shrinks roughly in proportion to 1/k. Memory is O(k) values.
+- HyperLogLog (distinct counts): relative standard error 1.04/sqrt(2^p),
+  0.81% at p=14. Memory is 2^p bytes. Small cardinalities use linear
+  counting and are near exact.
+- MisraGries (heavy hitters): every value occurring more than n/(k+1)
+  times is kept. Its count is underestimated by at most n/(k+1).
+- Count, sum, mean, standard deviation, min and max are exact (up to
+  floating point), merged with Chan's parallel algorithm.
+
+ExactDatasetStats is not a sketch: it keeps sorted values and distinct
+value hashes, O(n) memory, so that appending rows to an in-memory dataset
+updates exact statistics without another pass over the earlier rows.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from .config import SKETCH_KLL_K, SKETCH_HLL_PRECISION, SKETCH_TOP_K
+
+
+class KLLSketch:
+    """
+    Quantile sketch from Karnin, Lang and Liberty (2016).
+
+    Values are kept in levels of compactors. A value at level h stands for
+    2^h input values. When the sketch is over capacity, the lowest full
+    level is sorted and every other value, from a random offset, moves up a
+    level. Lower levels get geometrically smaller capacities, which gives
+    the O(k) memory bound.
+    """
+
+    # Capacity ratio between consecutive levels
+    DECAY = 2 / 3
+
+    def __init__(self, k: int = None, seed: int = 0):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            k: Accuracy parameter; the top level holds k values. Defaults to SKETCH_KLL_K.
+            seed: Seed for the compaction offsets.
+        """
+        self.k = k or SKETCH_KLL_K
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * self.DECAY ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+    def _total_capacity(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        """Compact levels until the sketch fits its capacity."""
+        while self._size() > self._total_capacity():
+            for h, items in enumerate(self.levels):
+                if len(items) >= self._capacity(h):
+                    break
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            items = np.sort(self.levels[h])
+            # An odd value out stays behind so weights are preserved
+            if len(items) % 2:
+                kept, items = items[:1], items[1:]
+            else:
+                kept = np.empty(0)
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[h] = kept
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+
+    def update(self, values):
+        """
+        Add a chunk of values. NaNs are ignored.
+
+        Args:
+            values: An array-like of numbers.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        """
+        Fold another sketch into this one.
+
+        Args:
+            other: A KLLSketch, ideally with the same k.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, qs) -> list:
+        """
+        Estimate quantiles.
+
+        Args:
+            qs: Quantiles between 0 and 1.
+
+        Returns:
+            The estimated values, or Nones if the sketch is empty.
+        """
+        if not self.count:
+            return [None for _ in qs]
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind="stable")
+        values, cumulative = values[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, np.asarray(qs) * total, side="left")
+        positions = np.minimum(positions, len(values) - 1)
+        return [float(values[i]) for i in positions]
+
+    def quantile(self, q: float):
+        """Estimate a single quantile between 0 and 1."""
+        return self.quantiles([q])[0]
+
+
+class HyperLogLog:
+    """
+    Distinct-value counter from Flajolet et al. (2007), fed with 64-bit
+    hashes.
+
+    The first p bits of a hash pick a register. The register keeps the
+    highest position of the first set bit seen in the remaining bits.
+    """
+
+    def __init__(self, p: int = None):
+        """
+        Initialize an empty counter.
+
+        Args:
+            p: Precision; the counter uses 2^p registers. Defaults to SKETCH_HLL_PRECISION.
+        """
+        self.p = p or SKETCH_HLL_PRECISION
+        self.m = 1 << self.p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray):
+        """
+        Add a chunk of 64-bit hashes.
+
+        Args:
+            hashes: A uint64 array, e.g. from pandas.util.hash_pandas_object.
+        """
+        if not len(hashes):
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # A sentinel bit bounds the rank when the remaining bits are all zero
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        ranks = (64 - np.floor(np.log2(rest.astype(float)))).astype(np.uint8)
+        np.maximum.at(self.registers, index, ranks)
+
+    def merge(self, other: "HyperLogLog"):
+        """Fold another counter with the same precision into this one."""
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog counters of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        """Estimate the number of distinct values added."""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.exp2(-self.registers.astype(float)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(self.m * math.log(self.m / zeros)))
+        return int(round(raw))
+
+
+class MisraGries:
+    """
+    Heavy-hitter summary from Misra and Gries (1982), in its mergeable form
+    (Agarwal et al., 2012).
+
+    At most k counters are kept. When there are more, the (k+1)-th largest
+    count is subtracted from every counter and counters at zero or below
+    are dropped.
+    """
+
+    def __init__(self, k: int = None):
+        """
+        Initialize an empty summary.
+
+        Args:
+            k: Counters kept. Defaults to SKETCH_TOP_K.
+        """
+        self.k = k or SKETCH_TOP_K
+        self.counters = {}
+        self.count = 0
+
+    def _add_counts(self, counts: dict, total: int):
+        for value, count in counts.items():
+            self.counters[value] = self.counters.get(value, 0) + count
+        self.count += total
+        if len(self.counters) > self.k:
+            cutoff = sorted(self.counters.values(), reverse=True)[self.k]
+            self.counters = {
+                value: count - cutoff
+                for value, count in self.counters.items()
+                if count > cutoff
+            }
+
+    def update(self, values: pd.Series):
+        """
+        Add a chunk of values. Missing values are ignored.
+
+        The chunk is first reduced to its own k-counter summary with
+        vectorized operations, then merged, so high-cardinality chunks do
+        not pass every distinct value through Python.
+
+        Args:
+            values: A pandas Series.
+        """
+        counts = values.value_counts(dropna=True, sort=True)
+        # Categorical columns also list categories absent from the chunk
+        counts = counts[counts > 0]
+        total = int(counts.sum())
+        if len(counts) > self.k:
+            cutoff = counts.iloc[self.k]
+            counts = counts.iloc[:self.k] - cutoff
+            counts = counts[counts > 0]
+        self._add_counts(dict(zip(counts.index.tolist(), counts.to_numpy().tolist())), total)
+
+    def merge(self, other: "MisraGries"):
+        """Fold another summary into this one."""
+        self._add_counts(other.counters, other.count)
+
+    @property
+    def max_error(self) -> float:
+        """Largest possible undercount of any value's frequency."""
+        return self.count / (self.k + 1)
+
+    def top(self, n: int = 10) -> list:
+        """
+        Get the most frequent values.
+
+        Args:
+            n: Number of values to return.
+
+        Returns:
+            A list of (value, estimated count) pairs, most frequent first.
+            True counts are at most max_error higher.
+        """
+        ranked = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:n]
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """
+    Hash a column's non-missing values to uint64 for HyperLogLog.
+
+    Numbers are hashed as floats, so 1 and 1.0 read from different chunks
+    count as the same value.
+    """
+    values = values.dropna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        values = values.astype(float)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def merge_moments(n_a: int, mean_a: float, m2_a: float, n_b: int, mean_b: float, m2_b: float) -> tuple:
+    """
+    Combine the count, mean and sum of squared deviations of two sets of values.
+
+    Chan's parallel form of Welford's algorithm, exact up to floating point.
+
+    Returns:
+        A tuple of (count, mean, sum of squared deviations).
+    """
+    combined = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / combined
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / combined
+    return combined, mean, m2
+
+
+class ColumnSketch:
+    """Mergeable statistics for one column."""
+
+    def __init__(self, numeric: bool):
+        """
+        Initialize an empty column sketch.
+
+        Args:
+            numeric: Whether to keep numeric statistics and quantiles.
+        """
+        self.numeric = numeric
+        self.rows = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        self.frequent = MisraGries()
+        # Exact moments, merged with Chan's algorithm
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.quantiles = KLLSketch() if numeric else None
+
+    def update(self, values: pd.Series):
+        """Add a chunk of the column."""
+        self.rows += len(values)
+        self.nulls += int(values.isna().sum())
+        try:
+            hashes = hash_values(values)
+        except TypeError:
+            # Unhashable cells such as lists from nested JSON
+            values = values.map(str, na_action="ignore")
+            hashes = hash_values(values)
+        self.distinct.update_hashes(hashes)
+        self.frequent.update(values)
+        if not self.numeric:
+            return
+
+        numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        numbers = numbers[~np.isnan(numbers)]
+        if not len(numbers):
+            return
+        self._merge_moments(len(numbers), float(numbers.mean()),
+                            float(((numbers - numbers.mean()) ** 2).sum()),
+                            float(numbers.sum()), float(numbers.min()), float(numbers.max()))
+        self.quantiles.update(numbers)
+
+    def _merge_moments(self, n: int, mean: float, m2: float, total: float, low: float, high: float):
+        self.n, self.mean, self.m2 = merge_moments(self.n, self.mean, self.m2, n, mean, m2)
+        self.total += total
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def merge(self, other: "ColumnSketch"):
+        """Fold another sketch of the same column into this one."""
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        if self.numeric and other.n:
+            self._merge_moments(other.n, other.mean, other.m2, other.total, other.min, other.max)
+            self.quantiles.merge(other.quantiles)
+
+    def describe(self) -> dict:
+        """
+        Get describe()-style statistics for a numeric column.
+
+        Returns:
+            A dictionary with count, mean, std, min, 25%, 50%, 75% and max.
+            Quartiles are approximate; the rest are exact.
+        """
+        if not self.n:
+            return {"count": 0.0, "mean": None, "std": None, "min": None,
+                    "25%": None, "50%": None, "75%": None, "max": None}
+        q1, median, q3 = self.quantiles.quantiles([0.25, 0.5, 0.75])
+        std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+        return {
+            "count": float(self.n),
+            "mean": self.mean,
+            "std": std,
+            "min": self.min,
+            "25%": q1,
+            "50%": median,
+            "75%": q3,
+            "max": self.max,
+        }
+
+
+class DatasetSketch:
+    """Mergeable sketches for every column of a dataset."""
+
+    def __init__(self):
+        """Initialize an empty sketch; columns are added as they are seen."""
+        self.columns = {}
+        self.row_count = 0
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Add a chunk of rows.
+
+        A column's numeric type is fixed by the first chunk it appears in.
+
+        Args:
+            chunk: A DataFrame chunk.
+        """
+        self.row_count += len(chunk)
+        for col in chunk.columns:
+            if col not in self.columns:
+                values = chunk[col]
+                numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+                self.columns[col] = ColumnSketch(numeric)
+            self.columns[col].update(chunk[col])
+
+    def merge(self, other: "DatasetSketch"):
+        """Fold a sketch of other rows of the same dataset into this one."""
+        self.row_count += other.row_count
+        for col, sketch in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(sketch)
+            else:
+                self.columns[col] = sketch
+
+    @classmethod
+    def from_chunks(cls, chunks) -> "DatasetSketch":
+        """
+        Build a sketch from an iterable of DataFrame chunks.
+
+        Only one chunk is held in memory at a time, so this works for data
+        far larger than memory, e.g. pandas.read_csv(..., chunksize=n).
+        """
+        sketch = cls()
+        for chunk in chunks:
+            sketch.update(chunk)
+        return sketch
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, chunksize: int) -> "DatasetSketch":
+        """Build a sketch of an in-memory frame, one slice of rows at a time."""
+        return cls.from_chunks(
+            df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize)
+        )
+
+    def basic_stats(self) -> dict:
+        """Get describe()-style statistics for the numeric columns."""
+        return {
+            col: sketch.describe()
+            for col, sketch in self.columns.items()
+            if sketch.numeric
+        }
+
+    def distinct_counts(self) -> dict:
+        """Get the estimated number of distinct non-missing values per column."""
+        return {col: sketch.distinct.estimate() for col, sketch in self.columns.items()}
+
+    def heavy_hitters(self, n: int = 5) -> dict:
+        """Get the most frequent values of each column, with estimated counts."""
+        return {col: sketch.frequent.top(n) for col, sketch in self.columns.items()}
+
+
+def _sorted_quantile(values: np.ndarray, q: float) -> float:
+    """A quantile of sorted values, interpolated linearly as numpy does."""
+    position = q * (len(values) - 1)
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return float(values[low] + (values[high] - values[low]) * (position - low))
+
+
+def _sorted_unique(values: np.ndarray) -> np.ndarray:
+    """Sort values and drop repeats; much faster than np.unique for large arrays."""
+    values = np.sort(values)
+    if len(values) > 1:
+        values = values[np.concatenate(([True], values[1:] != values[:-1]))]
+    return values
+
+
+def _insert_sorted(values: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Insert sorted new values into a sorted array, keeping it sorted."""
+    return np.insert(values, np.searchsorted(values, new), new)
+
+
+class ExactColumnStats:
+    """
+    Exact statistics for one column that can be extended with new rows.
+
+    Numeric columns keep their values sorted, which gives exact quartiles,
+    min, max and distinct counts; count, mean and variance are merged with
+    merge_moments(). Other columns keep the sorted hashes of their distinct
+    values. Adding rows costs a binary search per new value plus one copy
+    of the sorted array, rather than a pass over every row.
+    """
+
+    def __init__(self, numeric: bool):
+        """
+        Initialize empty statistics.
+
+        Args:
+            numeric: Whether to keep numeric statistics and quartiles.
+        """
+        self.numeric = numeric
+        self.sorted = np.empty(0, dtype=float if numeric else np.uint64)
+        self.distinct = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the sorted values or hashes."""
+        return self.sorted.nbytes
+
+    def _add_distinct(self, unique: np.ndarray):
+        """Count and insert the sorted unique values not seen before."""
+        positions = np.searchsorted(self.sorted, unique)
+        found = positions < len(self.sorted)
+        found[found] = self.sorted[positions[found]] == unique[found]
+        self.distinct += int(len(unique) - found.sum())
+        if not self.numeric:
+            self.sorted = np.insert(self.sorted, positions[~found], unique[~found])
+
+    def update(self, values: pd.Series):
+        """Add new rows of the column."""
+        if not self.numeric:
+            try:
+                hashes = hash_values(values)
+            except TypeError:
+                # Unhashable cells such as lists from nested JSON
+                hashes = hash_values(values.map(str, na_action="ignore"))
+            self._add_distinct(_sorted_unique(hashes))
+            return
+
+        numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        numbers = np.sort(numbers[~np.isnan(numbers)])
+        if not len(numbers):
+            return
+        self._add_distinct(_sorted_unique(numbers))
+        self.sorted = _insert_sorted(self.sorted, numbers)
+        mean = float(numbers.mean())
+        self.n, self.mean, self.m2 = merge_moments(
+            self.n, self.mean, self.m2, len(numbers), mean, float(((numbers - mean) ** 2).sum())
+        )
+
+    def describe(self) -> dict:
+        """
+        Get describe()-style statistics for a numeric column.
+
+        Returns:
+            A dictionary with count, mean, std, min, 25%, 50%, 75% and max.
+        """
+        if not self.n:
+            return {"count": 0.0, "mean": None, "std": None, "min": None,
+                    "25%": None, "50%": None, "75%": None, "max": None}
+        return {
+            "count": float(self.n),
+            "mean": self.mean,
+            "std": math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None,
+            "min": float(self.sorted[0]),
+            "25%": _sorted_quantile(self.sorted, 0.25),
+            "50%": _sorted_quantile(self.sorted, 0.5),
+            "75%": _sorted_quantile(self.sorted, 0.75),
+            "max": float(self.sorted[-1]),
+        }
+
+
+class ExactDatasetStats:
+    """Exact statistics for every column of a dataset, extended chunk by chunk."""
+
+    def __init__(self):
+        """Initialize empty statistics; columns are added as they are seen."""
+        self.columns = {}
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by every column's statistics."""
+        return sum(stats.nbytes for stats in self.columns.values())
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Add a chunk of rows.
+
+        A column's numeric type is fixed by the first chunk it appears in.
+
+        Args:
+            chunk: A DataFrame chunk.
+        """
+        for col in chunk.columns:
+            if col not in self.columns:
+                values = chunk[col]
+                numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+                self.columns[col] = ExactColumnStats(numeric)
+            self.columns[col].update(chunk[col])
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "ExactDatasetStats":
+        """Build the statistics of an in-memory frame."""
+        stats = cls()
+        stats.update(df)
+        return stats
+
+    def basic_stats(self) -> dict:
+        """Get describe()-style statistics for the numeric columns."""
+        return {
+            col: stats.describe()
+            for col, stats in self.columns.items()
+            if stats.numeric
+        }
+
+    def distinct_counts(self) -> dict:
+        """Get the number of distinct non-missing values per column."""
+        return {col: stats.distinct for col, stats in self.columns.items()}
@@ -0,0 +1,374 @@
+"""Receive dataset uploads straight from the request body as it arrives."""
+
+import io
+import os
+import queue
+import tempfile
+import threading
+
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+
+from .config import ENCODING_SNIFF_BYTES, OUT_OF_CORE_MIN_BYTES, UPLOAD_SPOOL_MAX_BYTES
+from .dataset_cache import DatasetCache, analyze_dataset, content_hasher
+from .dataset_handler import DatasetError, read_dataset
+from .out_of_core import ChunkedStore, open_out_of_core
+
+# Bytes read from the request body at a time
+UPLOAD_BLOCK_SIZE = 64 * 1024
+
+# Received bytes between progress reports
+PROGRESS_STEP_BYTES = 1024 * 1024
+
+# Received blocks held for a parser that is behind the request body
+PARSER_QUEUE_BLOCKS = 64
+
+
+class UploadStream(io.RawIOBase):
+    """
+    The contents of one file field of a multipart/form-data request body,
+    readable as the body arrives.
+
+    The body is decoded incrementally and the stream keeps no copy of it;
+    open_upload() decides which bytes are spooled. The file's bytes are
+    hashed as they are read, for the dataset cache key.
+    """
+
+    def __init__(self, body, boundary: bytes, content_length: int = None, progress=None):
+        """
+        Initialize the stream. Call open() before reading.
+
+        Args:
+            body: The request body, a binary stream such as request.stream.
+            boundary: The multipart boundary from the Content-Type header.
+            content_length: Size of the body in bytes, if known.
+            progress: Optional function called as progress(bytes_received,
+                content_length) at least every PROGRESS_STEP_BYTES.
+        """
+        super().__init__()
+        self.body = body
+        self.content_length = content_length
+        self.progress = progress
+        self.filename = None
+        self.bytes_received = 0
+        # Set before reading to hash the file's bytes
+        self.hasher = None
+        self._decoder = MultipartDecoder(boundary)
+        self._pending = bytearray()
+        self._body_done = False
+        self._file_done = False
+        self._reported = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def open(self, field: str = "file"):
+        """
+        Read up to the start of a file field's contents.
+
+        Args:
+            field: The form field holding the file.
+
+        Returns:
+            The filename sent by the client.
+
+        Raises:
+            DatasetError: If the body has no such file field.
+        """
+        while True:
+            event = self._next_event()
+            if isinstance(event, File) and event.name == field:
+                self.filename = event.filename
+                return self.filename
+            if isinstance(event, Epilogue):
+                raise DatasetError("No file provided")
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._file_done:
+            event = self._next_event()
+            if isinstance(event, Data):
+                self._pending += event.data
+                self._file_done = not event.more_data
+            else:
+                # Any other event means the file's part has ended
+                self._file_done = True
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        if self.hasher is not None:
+            self.hasher.update(buffer[:size])
+        del self._pending[:size]
+        return size
+
+    def hexdigest(self) -> str:
+        """Get the content hash of the file, once it has been read to the end."""
+        return self.hasher.hexdigest()
+
+    def drain(self):
+        """Read and discard the rest of the body, e.g. the closing boundary."""
+        while not self._body_done:
+            self._receive()
+
+    def _next_event(self):
+        """Get the next multipart event, reading from the body as needed."""
+        while True:
+            try:
+                event = self._decoder.next_event()
+            except ValueError as e:
+                raise DatasetError(f"Malformed upload: {str(e)}") from e
+            if not isinstance(event, NeedData):
+                return event
+            if self._body_done:
+                raise DatasetError("The upload ended before the file was complete")
+            self._receive()
+
+    def _receive(self):
+        block = self.body.read(UPLOAD_BLOCK_SIZE)
+        self.bytes_received += len(block)
+        if block:
+            self._decoder.receive_data(block)
+        else:
+            self._body_done = True
+            self._decoder.receive_data(None)
+
+        if self.progress is not None and (
+            self._body_done or self.bytes_received - self._reported >= PROGRESS_STEP_BYTES
+        ):
+            self._reported = self.bytes_received
+            self.progress(self.bytes_received, self.content_length)
+
+
+class UploadSpool:
+    """
+    The bytes of an uploaded file, buffered in memory up to a size limit
+    and then in a named file on disk that can be moved elsewhere.
+    """
+
+    def __init__(self, max_memory: int = None, dir: str = None):
+        """
+        Initialize an empty spool.
+
+        Args:
+            max_memory: Bytes kept in memory. Defaults to UPLOAD_SPOOL_MAX_BYTES.
+            dir: Directory for the file on disk. Defaults to the system's.
+        """
+        self.max_memory = UPLOAD_SPOOL_MAX_BYTES if max_memory is None else max_memory
+        self.dir = dir
+        self.size = 0
+        # Set once the bytes outgrow memory
+        self.path = None
+        self._buffer = io.BytesIO()
+        self._file = None
+
+    def write(self, data) -> int:
+        if self._file is None and self.size + len(data) > self.max_memory:
+            self._roll_over()
+        (self._file or self._buffer).write(data)
+        self.size += len(data)
+        return len(data)
+
+    def _roll_over(self):
+        fd, self.path = tempfile.mkstemp(dir=self.dir, suffix=".upload")
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(self._buffer.getbuffer())
+        self._buffer = None
+
+    def to_disk(self) -> str:
+        """Get the path of the file on disk, writing it out if still in memory."""
+        if self._file is None:
+            self._roll_over()
+        self._file.flush()
+        return self.path
+
+    def source(self):
+        """Get the bytes for read_dataset(): a path on disk, or a buffered stream."""
+        if self._file is not None:
+            self._file.flush()
+            return self.path
+        self._buffer.seek(0)
+        return io.BufferedReader(self._buffer, ENCODING_SNIFF_BYTES)
+
+    def close(self):
+        """Discard the bytes, removing the file unless it was moved away."""
+        if self._file is not None:
+            self._file.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        self._buffer = None
+
+
+class ParseCancelled(Exception):
+    """Raised inside a StreamParser's thread when its result is no longer needed."""
+
+
+class StreamParser(io.RawIOBase):
+    """
+    Parses a CSV file in a background thread from blocks handed to it as
+    they are received, so parsing overlaps the upload.
+
+    At most PARSER_QUEUE_BLOCKS blocks wait for the parser; beyond that,
+    feed() waits, which slows the upload down to the parser's pace.
+    """
+
+    def __init__(self, extension: str = ".csv"):
+        """
+        Start the parser thread.
+
+        Args:
+            extension: The file extension, passed to read_dataset().
+        """
+        super().__init__()
+        self.extension = extension
+        self._blocks = queue.Queue(PARSER_QUEUE_BLOCKS)
+        self._pending = b""
+        self._eof = False
+        self._cancelled = False
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._eof:
+            block = self._blocks.get()
+            if self._cancelled:
+                raise ParseCancelled()
+            if not block:
+                self._eof = True
+            self._pending = block
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def _run(self):
+        try:
+            self._result = read_dataset(io.BufferedReader(self, ENCODING_SNIFF_BYTES), self.extension)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def _put(self, block: bytes):
+        # A parser that stopped early, e.g. on malformed input, takes no more
+        while not self._done.is_set():
+            try:
+                self._blocks.put(block, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def feed(self, block: bytes):
+        """Hand the next bytes of the file to the parser."""
+        if block:
+            self._put(bytes(block))
+
+    def finish(self):
+        """Tell the parser the file is complete."""
+        self._put(b"")
+
+    def cancel(self):
+        """Stop parsing and discard the result, e.g. on a dataset cache hit."""
+        self._cancelled = True
+        while True:
+            try:
+                self._blocks.get_nowait()
+            except queue.Empty:
+                break
+        # Wakes a parser waiting for bytes
+        self._put(b"")
+
+    def result(self):
+        """
+        Wait for the parsed DataFrame, after finish().
+
+        Raises:
+            DatasetError: If parsing failed.
+        """
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def open_upload(upload: UploadStream, cache: DatasetCache = None,
+                store: ChunkedStore = None, report=None) -> tuple:
+    """
+    Receive an uploaded dataset, then load and analyze it unless cached.
+
+    - CSV files are parsed by a StreamParser as their bytes arrive, and
+      hashed at the same time. The content hash is only known at the end,
+      so on a dataset cache hit the parsed rows are discarded rather than
+      analyzed again; parsing overlapped the upload either way.
+    - CSV files of at least OUT_OF_CORE_MIN_BYTES, counted as they arrive
+      whatever the request declared, are moved into the out-of-core store
+      without being loaded. When the request's length does not rule that
+      out, CSV files are also received into an UploadSpool next to the
+      store's files, so moving them in is a rename.
+    - Excel and JSON parsers need random access, so those files are
+      received into an UploadSpool and parsed only on a cache miss. They
+      are rejected once they reach OUT_OF_CORE_MIN_BYTES.
+
+    Args:
+        upload: An UploadStream after open().
+        cache: Optional DatasetCache to consult and fill.
+        store: ChunkedStore for out-of-core files.
+        report: Optional job report function, told when the stage moves
+            from receiving to 'summarizing'.
+
+    Returns:
+        A tuple of (content hash, analyzer).
+
+    Raises:
+        DatasetError: If the file is unsupported, too large for its format,
+            or cannot be parsed.
+    """
+    extension = os.path.splitext(upload.filename or "")[1].lower()
+    upload.hasher = content_hasher(extension)
+    csv = extension == ".csv"
+    store_dir = store.cache_dir if store is not None and store.enabled else None
+    length = upload.content_length
+    spool = None
+    if not csv or length is None or length >= OUT_OF_CORE_MIN_BYTES:
+        spool = UploadSpool(dir=store_dir if csv else None)
+    parser = StreamParser(extension) if csv else None
+    received = 0
+    try:
+        while True:
+            block = upload.read(UPLOAD_BLOCK_SIZE)
+            if not block:
+                break
+            received += len(block)
+            if spool is not None:
+                spool.write(block)
+            if received >= OUT_OF_CORE_MIN_BYTES:
+                if not csv:
+                    limit = OUT_OF_CORE_MIN_BYTES // (1024 * 1024)
+                    raise DatasetError(f"Files over {limit}MB must be CSV")
+                if parser is not None:
+                    # Analyzed out of core instead
+                    parser.cancel()
+                    parser = None
+            if parser is not None:
+                parser.feed(block)
+        upload.drain()
+        if report is not None:
+            report("summarizing")
+        key = upload.hexdigest()
+
+        if received >= OUT_OF_CORE_MIN_BYTES:
+            if store_dir is None:
+                raise DatasetError("Out-of-core analysis is disabled (OUT_OF_CORE_MAX_MB is 0)")
+            return open_out_of_core(spool.to_disk(), store, key=key)
+
+        if parser is not None:
+            parser.finish()
+            return key, analyze_dataset(key, parser.result, cache)
+        return key, analyze_dataset(key, lambda: read_dataset(spool.source(), extension), cache)
+    finally:
+        if parser is not None:
+            parser.cancel()
+        if spool is not None:
+            spool.close()
@@ -21,6 +21,21 @@ const mainApp = document.getElementById('main-app');
 
 // State
 let isDatasetLoaded = false;
+let chartJobId = null;
+
+// Preview table: current page, sort and row counts; sorting and paging
+// are done by the server
+const previewState = { offset: 0, shown: 0, sort: null, order: 'asc', total: 0, matched: 0, outOfCore: false };
+let previewRequest = 0;
+
+// Rows per preview page
+const PREVIEW_PAGE_SIZE = 50;
+
+// How often to poll background jobs for charts (ms)
+const JOB_POLL_INTERVAL = 1000;
+
+// How often to poll upload progress (ms)
+const UPLOAD_POLL_INTERVAL = 500;
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
@@ -49,6 +64,10 @@ function setupEventListeners() {
     uploadArea.addEventListener('dragleave', handleDragLeave);
     uploadArea.addEventListener('drop', handleDrop);
 
+    // Preview paging
+    document.getElementById('btn-prev').addEventListener('click', () => loadPreviewPage(previewState.offset - PREVIEW_PAGE_SIZE));
+    document.getElementById('btn-next').addEventListener('click', () => loadPreviewPage(previewState.offset + previewState.shown));
+
     // Chat
     btnSend.addEventListener('click', sendMessage);
     chatInput.addEventListener('keypress', (e) => {
@@ -126,16 +145,23 @@ async function uploadFile(file) {
         return;
     }
 
-    showLoading('Analyzing dataset and generating insights...');
+    showLoading('Uploading dataset...');
 
     const formData = new FormData();
     formData.append('file', file);
 
+    // The server parses the file as it arrives and reports progress under this ID
+    const uploadId = newJobId();
+    let uploading = true;
+    pollUploadProgress(uploadId, () => uploading);
+
     try {
         const response = await fetch('/api/upload', {
             method: 'POST',
+            headers: { 'X-Upload-Id': uploadId },
             body: formData
         });
+        uploading = false;
 
         const data = await response.json();
 
@@ -148,10 +174,41 @@ async function uploadFile(file) {
     } catch (error) {
         showError('Network error. Please try again.');
     } finally {
+        uploading = false;
         hideLoading();
     }
 }
 
+// Random 32-character hex ID, the format the server expects for job IDs
+function newJobId() {
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+}
+
+// Show how much of an upload the server has received and parsed
+async function pollUploadProgress(uploadId, isUploading) {
+    if (!isUploading()) return;
+
+    try {
+        const response = await fetch(`/api/jobs/${uploadId}`);
+        if (response.ok && isUploading()) {
+            const job = await response.json();
+            const received = job.result.bytes_received;
+            const total = job.result.total_bytes;
+            if (job.stage === 'summarizing') {
+                loadingText.textContent = 'Analyzing dataset...';
+            } else if (received !== undefined && total) {
+                const percent = Math.min(100, Math.round(received / total * 100));
+                loadingText.textContent = `Uploading dataset... ${percent}% (${formatBytes(received)} of ${formatBytes(total)})`;
+            }
+        }
+    } catch (error) {
+        // Transient network errors: keep polling
+    }
+
+    setTimeout(() => pollUploadProgress(uploadId, isUploading), UPLOAD_POLL_INTERVAL);
+}
+
 // Display Dataset Information
 function displayDataset(data) {
     // Hide upload, show dataset section
@@ -166,19 +223,60 @@ function displayDataset(data) {
     document.getElementById('metric-cols').textContent = data.summary.columns;
     document.getElementById('metric-empty').textContent = formatNumber(data.summary.empty_values);
 
-    // Display AI-generated charts
-    if (data.charts && data.charts.length > 0) {
+    // Display AI-generated charts, or wait for the background job
+    chartJobId = data.job_id || null;
+    if (chartJobId) {
+        chartsGrid.innerHTML = '<p class="charts-loading">Generating charts...</p>';
+        pollChartJob(chartJobId);
+    } else if (data.charts && data.charts.length > 0) {
         displayCharts(data.charts);
     } else {
         chartsGrid.innerHTML = '<p class="charts-loading">No charts generated</p>';
     }
 
     // Build preview table
+    Object.assign(previewState, {
+        offset: 0, sort: null, order: 'asc',
+        total: data.summary.rows, matched: data.summary.rows,
+        outOfCore: data.summary.out_of_core
+    });
     buildPreviewTable(data.preview);
+    updatePreviewPager(data.preview.data.length);
 
     isDatasetLoaded = true;
 }
 
+// Poll a background chart job until it finishes
+async function pollChartJob(jobId) {
+    // Stop if the dataset was cleared or replaced meanwhile
+    if (jobId !== chartJobId) return;
+
+    try {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        const job = await response.json();
+
+        if (!response.ok) {
+            chartsGrid.innerHTML = '<p class="charts-loading">No charts generated</p>';
+            return;
+        }
+
+        if (job.status === 'done' || job.status === 'failed') {
+            if (jobId !== chartJobId) return;
+            const charts = job.result.charts || [];
+            if (charts.length > 0) {
+                displayCharts(charts);
+            } else {
+                chartsGrid.innerHTML = '<p class="charts-loading">No charts generated</p>';
+            }
+            return;
+        }
+    } catch (error) {
+        // Transient network errors: keep polling
+    }
+
+    setTimeout(() => pollChartJob(jobId), JOB_POLL_INTERVAL);
+}
+
 // Build Preview Table
 function buildPreviewTable(preview) {
     const thead = document.getElementById('table-head');
@@ -188,11 +286,18 @@ function buildPreviewTable(preview) {
     thead.innerHTML = '';
     tbody.innerHTML = '';
 
-    // Build header
+    // Build header; clicking a column sorts by it, ascending then descending
     const headerRow = document.createElement('tr');
     preview.columns.forEach(col => {
         const th = document.createElement('th');
         th.textContent = col;
+        if (!previewState.outOfCore) {
+            th.classList.add('sortable');
+            if (previewState.sort === col) {
+                th.textContent += previewState.order === 'asc' ? ' ▲' : ' ▼';
+            }
+            th.addEventListener('click', () => toggleSort(col));
+        }
         headerRow.appendChild(th);
     });
     thead.appendChild(headerRow);
@@ -210,6 +315,66 @@ function buildPreviewTable(preview) {
     });
 }
 
+// Cycle a column's sort: ascending, descending, then row order
+function toggleSort(col) {
+    if (previewState.sort !== col) {
+        previewState.sort = col;
+        previewState.order = 'asc';
+    } else if (previewState.order === 'asc') {
+        previewState.order = 'desc';
+    } else {
+        previewState.sort = null;
+        previewState.order = 'asc';
+    }
+    loadPreviewPage(0);
+}
+
+// Fetch one page of the preview table from the server
+async function loadPreviewPage(offset) {
+    const params = new URLSearchParams({
+        offset: Math.max(offset, 0),
+        limit: PREVIEW_PAGE_SIZE,
+        order: previewState.order
+    });
+    if (previewState.sort) params.set('sort', previewState.sort);
+
+    // Only the latest request updates the table
+    const request = ++previewRequest;
+    try {
+        const response = await fetch(`/api/preview?${params}`);
+        const data = await response.json();
+        if (request !== previewRequest) return;
+        if (!response.ok) {
+            showError(data.error || 'Failed to load preview');
+            return;
+        }
+
+        previewState.offset = data.offset;
+        previewState.total = data.total_rows;
+        previewState.matched = data.matched_rows;
+        buildPreviewTable(data);
+        updatePreviewPager(data.data.length);
+    } catch (error) {
+        if (request === previewRequest) showError('Failed to load preview: ' + error.message);
+    }
+}
+
+// Show which rows are displayed and enable the paging buttons that apply
+function updatePreviewPager(rowsShown) {
+    previewState.shown = rowsShown;
+    const { offset, total, matched } = previewState;
+    const note = document.getElementById('preview-note');
+    if (rowsShown === 0) {
+        note.textContent = `No rows of ${formatNumber(total)}`;
+    } else {
+        note.textContent = `Rows ${formatNumber(offset + 1)}–${formatNumber(offset + rowsShown)} of ${formatNumber(matched)}`;
+    }
+    if (matched !== total) note.textContent += ` (filtered from ${formatNumber(total)})`;
+
+    document.getElementById('btn-prev').disabled = offset === 0;
+    document.getElementById('btn-next').disabled = offset + rowsShown >= matched;
+}
+
 // Display AI-Generated Charts
 function displayCharts(charts) {
     chartsGrid.innerHTML = '';
@@ -220,7 +385,7 @@ function displayCharts(charts) {
 
         const img = document.createElement('img');
         img.className = 'chart-image';
-        img.src = chart.image;
+        img.src = chart.url || chart.image;
         img.alt = chart.title;
 
         const info = document.createElement('div');
@@ -282,7 +447,7 @@ async function sendMessage() {
     const typingId = showTyping();
 
     try {
-        const response = await fetch('/api/chat', {
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -290,22 +455,66 @@ async function sendMessage() {
             body: JSON.stringify({ message })
         });
 
-        const data = await response.json();
-
-        // Remove typing indicator
-        removeTyping(typingId);
-
-        if (response.ok && data.success) {
-            addMessage(data.response, 'assistant');
-        } else {
+        if (!response.ok) {
+            const data = await response.json();
+            removeTyping(typingId);
             addMessage('Sorry, I encountered an error: ' + (data.error || 'Unknown error'), 'assistant');
+            return;
         }
+
+        // Replace the typing indicator with the answer as tokens arrive
+        let contentDiv = null;
+        let answer = '';
+        await readEventStream(response, (event, data) => {
+            if (event === 'error') {
+                removeTyping(typingId);
+                addMessage('Sorry, I encountered an error: ' + (data.error || 'Unknown error'), 'assistant');
+            } else if (data.token) {
+                if (!contentDiv) {
+                    removeTyping(typingId);
+                    contentDiv = addMessage('', 'assistant');
+                }
+                answer += data.token;
+                contentDiv.textContent = answer;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            }
+        });
+
+        removeTyping(typingId);
     } catch (error) {
         removeTyping(typingId);
         addMessage('Sorry, there was a network error. Please try again.', 'assistant');
     }
 }
 
+// Read a Server-Sent Events response body, calling onEvent(event, data) per message
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Messages are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            raw.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
 // Add Message to Chat
 function addMessage(content, role) {
     const messageDiv = document.createElement('div');
@@ -320,6 +529,7 @@ function addMessage(content, role) {
 
     // Scroll to bottom
     chatMessages.scrollTop = chatMessages.scrollHeight;
+    return contentDiv;
 }
 
 // Show Typing Indicator
@@ -365,6 +575,7 @@ async function clearDataset() {
     disableChat();
 
     isDatasetLoaded = false;
+    chartJobId = null;
 
     // Reset file input
     fileInput.value = '';
@@ -378,6 +589,11 @@ function formatNumber(num) {
     return num.toLocaleString();
 }
 
+function formatBytes(bytes) {
+    if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(0)} KB`;
+    return `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+}
+
 function showLoading(text) {
     loadingText.textContent = text || 'Loading...';
     loadingOverlay.classList.remove('hidden');